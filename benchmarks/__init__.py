@@ -0,0 +1,13 @@
+# benchmarks/__init__.py
+"""
+Бенчмарки BookHive
+
+- crud_bench: время и число SQL запросов каждой функции database/crud.py
+  на фиксированном синтетическом наборе данных, сравнение с baseline
+- load_test: нагрузочный тест бота (настоящий Application, заглушка Bot API)
+- replay: воспроизведение записанных апдейтов (bot/utils/update_recorder.py)
+- query_budget: бюджеты SQL запросов хендлеров (N+1) по маршрутам бота
+- fake_telegram: заглушка Telegram Bot API
+- bot_api_server: локальная замена Bot API по HTTP (задержки, 429, ошибки)
+- notify_bench: пропускная способность рассылок через bot_api_server
+"""
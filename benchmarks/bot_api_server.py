@@ -0,0 +1,561 @@
+# benchmarks/bot_api_server.py
+"""
+Локальная замена Telegram Bot API для сквозных тестов производительности
+
+HTTP сервер с теми же URL, что у api.telegram.org (/bot<token>/<метод>):
+бот работает через настоящий HTTP слой python-telegram-bot (httpx,
+пул соединений, RetryAfter), только сервер свой. Ответы на методы -
+benchmarks/fake_telegram.FakeBotAPI.
+
+- Задержка ответа: --latency-ms (+ случайная --jitter-ms)
+- Ограничения Telegram: --global-rate сообщений в секунду на бота,
+  --chat-rate в секунду на чат; превышение - 429 с retry_after (RetryAfter)
+- Ошибки: --errors 400:0.01,403:0.005,502:0.001 - код и доля ответов
+- Апдейты для бота: getUpdates (long polling) или доставка на адрес
+  из setWebhook; источник - POST /stub/updates или --replay файлы записи
+  (bot/utils/update_recorder.py)
+- Статистика: GET /stub/stats, сброс - POST /stub/reset
+
+Запуск:
+    python -m benchmarks.bot_api_server --port 8081 --latency-ms 40
+    python -m benchmarks.bot_api_server --errors 429:0,502:0.01 --replay records/ --speed 10
+
+    # бот - в .env: BOT_API_URL=http://127.0.0.1:8081
+    # или в коде: Application.builder().base_url("http://127.0.0.1:8081/bot")
+"""
+
+import argparse
+import asyncio
+import email.parser
+import email.policy
+import json
+import logging
+import math
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import httpx
+
+from benchmarks.fake_telegram import FakeBotAPI
+
+logger = logging.getLogger(__name__)
+
+# Методы, на которые действуют ограничения частоты
+FLOOD_METHOD_PREFIXES = ('send', 'edit', 'copy', 'forward')
+
+# Методы, которые не ломаются инъекцией ошибок (управление ботом)
+CONTROL_METHODS = {'getme', 'getupdates', 'setwebhook', 'deletewebhook', 'getwebhookinfo'}
+
+ERROR_DESCRIPTIONS = {
+    400: "Bad Request: message to edit not found",
+    403: "Forbidden: bot was blocked by the user",
+    409: "Conflict: terminated by other getUpdates request",
+    429: "Too Many Requests: retry after 1",
+    500: "Internal Server Error",
+    502: "Bad Gateway",
+}
+
+# Максимальный timeout getUpdates (long polling)
+MAX_POLL_TIMEOUT = 50.0
+
+
+@dataclass
+class ServerConfig:
+    """
+    Настройки сервера
+
+    Attributes:
+        latency_ms: Задержка каждого ответа
+        jitter_ms: Случайная добавка к задержке (0..jitter_ms)
+        global_rate: Сообщений в секунду на бота (0 - без ограничения)
+        global_burst: Сколько сообщений можно отправить разом
+        chat_rate: Сообщений в секунду в один чат (0 - без ограничения)
+        chat_burst: Сколько сообщений в один чат можно отправить разом
+        errors: {HTTP код: доля ответов с этой ошибкой}
+        seed: Seed случайных задержек и ошибок
+    """
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    global_rate: float = 30.0
+    global_burst: float = 30.0
+    chat_rate: float = 1.0
+    chat_burst: float = 3.0
+    errors: Dict[int, float] = field(default_factory=dict)
+    seed: int = 1
+
+
+class TokenBucket:
+    """Ограничение частоты: rate событий в секунду, не больше burst разом"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """
+        Взять одно событие
+
+        Returns:
+            0 - можно; иначе через сколько секунд появится место
+        """
+        if self.rate <= 0:
+            return 0.0
+
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class ApiError(Exception):
+    """Ответ Bot API с ошибкой"""
+
+    def __init__(self, code: int, description: str, retry_after: Optional[int] = None):
+        super().__init__(description)
+        self.code = code
+        self.description = description
+        self.retry_after = retry_after
+
+    def payload(self) -> dict:
+        payload = {'ok': False, 'error_code': self.code, 'description': self.description}
+        if self.retry_after is not None:
+            payload['parameters'] = {'retry_after': self.retry_after}
+        return payload
+
+
+class BotApiServer:
+    """
+    Сервер Bot API поверх FakeBotAPI
+
+    Args:
+        config: Задержки, ограничения, ошибки
+        api: Состояние Bot API (по умолчанию новое)
+    """
+
+    def __init__(self, config: ServerConfig, api: Optional[FakeBotAPI] = None):
+        self.config = config
+        self.api = api or FakeBotAPI()
+        self.rng = random.Random(config.seed)
+
+        self.global_bucket = TokenBucket(config.global_rate, config.global_burst)
+        self.chat_buckets: Dict[Any, TokenBucket] = defaultdict(
+            lambda: TokenBucket(config.chat_rate, config.chat_burst)
+        )
+
+        # Апдейты для бота
+        self.updates: List[dict] = []
+        self.next_update_id = 1
+        self._next_unseen = 1
+        self._new_updates = asyncio.Event()
+        self.webhook: Optional[dict] = None
+        self._delivery: Optional[asyncio.Task] = None
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.reset_stats()
+
+    # СТАТИСТИКА
+
+    def reset_stats(self) -> None:
+        self.started = time.time()
+        self.responses: Counter = Counter()
+        self.methods: Counter = Counter()
+        self.succeeded: Counter = Counter()
+        self.flood_limited: Counter = Counter()
+        self.injected: Counter = Counter()
+        self.delivered = 0
+
+    def stats(self) -> dict:
+        elapsed = time.time() - self.started
+        sent = sum(count for method, count in self.succeeded.items() if method.lower().startswith('send'))
+        return {
+            'elapsed_s': round(elapsed, 2),
+            'methods': dict(self.methods.most_common()),
+            'succeeded': dict(self.succeeded.most_common()),
+            'responses': {str(code): count for code, count in self.responses.items()},
+            'flood_limited': dict(self.flood_limited),
+            'injected_errors': {str(code): count for code, count in self.injected.items()},
+            'messages_sent': sent,
+            'messages_per_s': round(sent / elapsed, 2) if elapsed else 0,
+            'pending_updates': len(self.updates),
+            'delivered_updates': self.delivered,
+            'webhook': (self.webhook or {}).get('url', ''),
+        }
+
+    # BOT API
+
+    async def call(self, method: str, params: dict) -> Any:
+        """
+        Выполнить метод Bot API (с задержкой, ограничениями и ошибками)
+
+        Raises:
+            ApiError: Ответ с ошибкой
+        """
+        self.methods[method] += 1
+        name = method.lower()
+
+        delay = self.config.latency_ms + self.rng.random() * self.config.jitter_ms
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        if name not in CONTROL_METHODS:
+            for code, share in self.config.errors.items():
+                if self.rng.random() < share:
+                    self.injected[code] += 1
+                    raise ApiError(code, ERROR_DESCRIPTIONS.get(code, "Error"),
+                                   retry_after=1 if code == 429 else None)
+
+        if name.startswith(FLOOD_METHOD_PREFIXES):
+            self._check_flood(method, params)
+
+        if name == 'getupdates':
+            return await self._get_updates(params)
+        if name == 'setwebhook':
+            return self._set_webhook(params)
+        if name == 'deletewebhook':
+            return self._delete_webhook(params)
+        if name == 'getwebhookinfo':
+            return {
+                'url': (self.webhook or {}).get('url', ''),
+                'has_custom_certificate': False,
+                'pending_update_count': len(self.updates),
+            }
+
+        return self.api.call(method, params)
+
+    def _check_flood(self, method: str, params: dict) -> None:
+        chat_id = params.get('chat_id')
+        waits = [self.global_bucket.take()]
+        if chat_id is not None:
+            waits.append(self.chat_buckets[str(chat_id)].take())
+
+        wait = max(waits)
+        if wait > 0:
+            self.flood_limited[method] += 1
+            retry_after = max(math.ceil(wait), 1)
+            raise ApiError(429, f"Too Many Requests: retry after {retry_after}", retry_after=retry_after)
+
+    # АПДЕЙТЫ
+
+    def add_updates(self, updates: List[dict]) -> int:
+        """Поставить апдейты в очередь бота (update_id - по порядку, если не задан)"""
+        for update in updates:
+            update = dict(update)
+            if 'update_id' not in update or update['update_id'] < self.next_update_id:
+                update['update_id'] = self.next_update_id
+            self.next_update_id = update['update_id'] + 1
+            self.updates.append(update)
+
+        self._new_updates.set()
+        return len(updates)
+
+    async def _get_updates(self, params: dict) -> list:
+        if self.webhook:
+            raise ApiError(409, "Conflict: can't use getUpdates method while webhook is active; "
+                                "use deleteWebhook to delete the webhook first")
+
+        offset = int(params.get('offset') or 0)
+        if offset:
+            self.updates = [update for update in self.updates if update['update_id'] >= offset]
+
+        timeout = min(float(params.get('timeout') or 0), MAX_POLL_TIMEOUT)
+        if not self.updates and timeout > 0:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        limit = int(params.get('limit') or 100)
+        batch = self.updates[:limit]
+
+        # Без подтверждения (offset) те же апдейты вернутся снова - считаем один раз
+        fresh = [update for update in batch if update['update_id'] >= self._next_unseen]
+        if fresh:
+            self.delivered += len(fresh)
+            self._next_unseen = fresh[-1]['update_id'] + 1
+        return batch
+
+    def _set_webhook(self, params: dict) -> bool:
+        self.webhook = {
+            'url': params['url'],
+            'secret_token': params.get('secret_token'),
+            'max_connections': int(params.get('max_connections') or 40),
+        }
+        if params.get('drop_pending_updates'):
+            self.updates.clear()
+
+        if self._delivery is None or self._delivery.done():
+            self._delivery = asyncio.create_task(self._deliver_webhook())
+        return True
+
+    def _delete_webhook(self, params: dict) -> bool:
+        self.webhook = None
+        if params.get('drop_pending_updates'):
+            self.updates.clear()
+        if self._delivery is not None:
+            self._delivery.cancel()
+            self._delivery = None
+        return True
+
+    async def _deliver_webhook(self) -> None:
+        """POST апдейтов на адрес webhook (не больше max_connections одновременно)"""
+        webhook = self.webhook
+        slots = asyncio.Semaphore(webhook['max_connections'])
+        headers = {}
+        if webhook['secret_token']:
+            headers['X-Telegram-Bot-Api-Secret-Token'] = webhook['secret_token']
+
+        async def deliver(client: httpx.AsyncClient, update: dict) -> None:
+            try:
+                response = await client.post(webhook['url'], json=update, headers=headers)
+                if response.status_code == 200:
+                    self.delivered += 1
+                else:
+                    logger.warning(f"Webhook answered {response.status_code} to update {update['update_id']}")
+            except httpx.HTTPError as e:
+                logger.warning(f"Webhook delivery failed: {e}")
+            finally:
+                slots.release()
+
+        async with httpx.AsyncClient(
+            timeout=30,
+            limits=httpx.Limits(max_connections=webhook['max_connections'])
+        ) as client:
+            tasks = set()
+            while self.webhook is webhook:
+                if not self.updates:
+                    self._new_updates.clear()
+                    await self._new_updates.wait()
+                    continue
+
+                await slots.acquire()
+                update = self.updates.pop(0)
+                task = asyncio.create_task(deliver(client, update))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+    async def replay(self, paths: List[str], speed: float) -> None:
+        """Подавать боту апдейты из файлов записи в темпе записи (speed 0 - сразу)"""
+        from benchmarks.replay import read_records, record_files
+
+        started, first_ts = time.monotonic(), None
+        for ts, update in read_records(record_files(paths)):
+            if first_ts is None:
+                first_ts = ts
+            if speed:
+                delay = started + (ts - first_ts) / speed - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            self.add_updates([update])
+        logger.info("Replay finished")
+
+    # HTTP
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8081) -> None:
+        self._server = await asyncio.start_server(self._serve_connection, host, port)
+        logger.info(f"Bot API stand-in listening on http://{host}:{port}")
+
+    async def close(self) -> None:
+        if self._delivery is not None:
+            self._delivery.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Соединение HTTP/1.1 (keep-alive): запрос за запросом"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+
+                http_method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length') or 0)
+                body = await reader.readexactly(length) if length else b''
+
+                status, payload = await self._route(http_method, target, headers, body)
+                data = json.dumps(payload, ensure_ascii=False).encode()
+                keep_alive = headers.get('connection', '').lower() != 'close'
+
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                    + data
+                )
+                await writer.drain()
+                self.responses[status] += 1
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, http_method: str, target: str, headers: dict, body: bytes) -> Tuple[int, dict]:
+        url = urlsplit(target)
+        parts = url.path.strip('/').split('/')
+
+        # Управление заглушкой
+        if parts[0] == 'stub':
+            action = parts[1] if len(parts) > 1 else ''
+            if action == 'stats':
+                return 200, self.stats()
+            if action == 'reset':
+                self.reset_stats()
+                return 200, {'ok': True}
+            if action == 'updates' and http_method == 'POST':
+                updates = json.loads(body or b'[]')
+                added = self.add_updates(updates if isinstance(updates, list) else [updates])
+                return 200, {'ok': True, 'added': added}
+            return 404, {'ok': False, 'error_code': 404, 'description': "Not Found"}
+
+        if len(parts) != 2 or not parts[0].startswith('bot'):
+            return 404, {'ok': False, 'error_code': 404, 'description': "Not Found"}
+
+        params = dict(parse_qsl(url.query))
+        params.update(parse_body(headers.get('content-type', ''), body))
+
+        try:
+            result = await self.call(parts[1], params)
+        except ApiError as e:
+            return e.code, e.payload()
+        except (KeyError, ValueError) as e:
+            return 400, {'ok': False, 'error_code': 400, 'description': f"Bad Request: {e}"}
+
+        self.succeeded[parts[1]] += 1
+        return 200, {'ok': True, 'result': result}
+
+
+def _json_value(value: str) -> Any:
+    """Значение формы: объекты и списки приходят строкой JSON"""
+    if value[:1] in ('{', '['):
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    return value
+
+
+def parse_body(content_type: str, body: bytes) -> dict:
+    """Параметры метода из тела запроса (JSON, форма или multipart)"""
+    if not body:
+        return {}
+
+    if content_type.startswith('application/json'):
+        return json.loads(body)
+
+    if content_type.startswith('multipart/form-data'):
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + body
+        )
+        params = {}
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            if part.get_filename():
+                params[name] = f"upload_{part.get_filename()}"
+            else:
+                params[name] = _json_value(part.get_content().strip())
+        return params
+
+    return {name: _json_value(value) for name, value in parse_qsl(body.decode())}
+
+
+# CLI
+
+def parse_errors(value: str) -> Dict[int, float]:
+    """'400:0.01,502:0.001' -> {400: 0.01, 502: 0.001}"""
+    errors = {}
+    for part in filter(None, value.split(',')):
+        code, _, share = part.partition(':')
+        errors[int(code)] = float(share)
+    return errors
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Локальная замена Telegram Bot API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="задержка ответа")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="случайная добавка к задержке")
+    parser.add_argument('--global-rate', type=float, default=30.0,
+                        help="сообщений в секунду на бота (0 - без ограничения)")
+    parser.add_argument('--global-burst', type=float, default=30.0)
+    parser.add_argument('--chat-rate', type=float, default=1.0,
+                        help="сообщений в секунду в один чат (0 - без ограничения)")
+    parser.add_argument('--chat-burst', type=float, default=3.0)
+    parser.add_argument('--errors', type=parse_errors, default={},
+                        help="ошибки: код:доля через запятую (400:0.01,502:0.001)")
+    parser.add_argument('--replay', nargs='*', default=[],
+                        help="файлы или каталоги записи апдейтов - подать боту")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="ускорение --replay (0 - все сразу)")
+    parser.add_argument('--seed', type=int, default=1)
+    return parser.parse_args()
+
+
+async def serve(args: argparse.Namespace) -> None:
+    server = BotApiServer(ServerConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        global_rate=args.global_rate,
+        global_burst=args.global_burst,
+        chat_rate=args.chat_rate,
+        chat_burst=args.chat_burst,
+        errors=args.errors,
+        seed=args.seed,
+    ))
+    await server.start(args.host, args.port)
+
+    if args.replay:
+        asyncio.create_task(server.replay(args.replay, args.speed))
+
+    try:
+        while True:
+            await asyncio.sleep(10)
+            logger.info(f"Stats: {server.stats()}")
+    finally:
+        await server.close()
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    args = parse_args()
+
+    print("🛰️  BookHive Bot API stand-in")
+    print("=" * 60)
+    print(f"URL: http://{args.host}:{args.port}  (BOT_API_URL для бота)")
+    print(f"Latency: {args.latency_ms} ms (+{args.jitter_ms}), flood: {args.global_rate}/s per bot, "
+          f"{args.chat_rate}/s per chat, errors: {args.errors or 'none'}\n")
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,796 @@
+# benchmarks/crud_bench.py
+"""
+Бенчмарк database/crud.py
+
+Каждая публичная функция crud вызывается много раз на фиксированном
+синтетическом наборе данных (BENCH_DATASET, database/synthetic.py).
+Для каждой - задержка p50/p95/p99 и число SQL запросов на вызов
+(database/query_counter.py). Результат сравнивается с сохранённым
+baseline: медленнее порога или больше запросов - регрессия, код выхода 1.
+Больше запросов, чем в baseline - почти всегда случайный N+1.
+
+Изменяющие функции выполняются в транзакции, которая в конце
+откатывается - набор данных после прогона тот же.
+
+Запуск:
+    python -m benchmarks.crud_bench --load              # создать набор (очищает БД!)
+    python -m benchmarks.crud_bench --save-baseline     # прогон -> baseline
+    python -m benchmarks.crud_bench                     # прогон + сравнение с baseline
+    python -m benchmarks.crud_bench --only search_books,get_category_page
+    python -m benchmarks.crud_bench --threshold 0.5 --output results.json
+
+Новая функция в crud.py без бенчмарка - тоже ошибка (см. NOT_BENCHMARKED).
+"""
+
+import argparse
+import dataclasses
+import inspect
+import json
+import logging
+import platform
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from database import crud
+from database.connection import engine
+from database.models import User, Category, Book, Booking
+from database.query_counter import count_queries
+from database.synthetic import DatasetConfig, TITLE_HEADS, TITLE_TAILS, generate
+
+# Набор данных бенчмарка: меняется - baseline нужно пересохранить
+BENCH_DATASET = DatasetConfig(
+    categories=12,
+    books=20_000,
+    users=5_000,
+    bookings=100_000,
+    seed=2024
+)
+
+BASELINE_PATH = Path(__file__).parent / 'baselines' / 'crud.json'
+
+# Регрессия: медленнее baseline больше чем на threshold (доля)
+# и больше чем на min_delta_ms (шум быстрых функций)
+DEFAULT_THRESHOLD = 0.5
+DEFAULT_MIN_DELTA_MS = 2.0
+
+# Метрики времени, которые сравниваются с baseline.
+# p95/p99 на десятках вызовов слишком шумные - только в отчёте;
+# включить: --metrics p50_ms,p95_ms
+COMPARED_METRICS = ('p50_ms',)
+
+# Вызовов перед замером (прогрев кэшей, планов, пула соединений)
+WARMUP_ITERATIONS = 3
+
+# Публичные функции crud, которые не измеряются
+NOT_BENCHMARKED = {
+    'get_session': "служебная: сессия",
+    'bind_session': "служебная: привязка сессии",
+    'after_commit': "служебная: колбэк после COMMIT",
+    'commit_returning': "служебная: commit без refresh",
+    'book_cursor': "без запросов к БД",
+}
+
+
+# ДАННЫЕ
+
+@dataclass
+class BenchData:
+    """
+    ID из набора данных, из которых бенчмарки берут аргументы
+
+    Выборки фиксированы (seed) - от прогона к прогону вызовы одинаковые.
+    """
+    rng: random.Random
+    book_ids: List[int]
+    telegram_ids: List[int]
+    category_ids: List[int]
+    active_bookings: List[tuple]          # (booking_id, telegram_id, book_id)
+    genres: List[str]
+
+    @classmethod
+    def load(cls, session: Session, seed: int = 1) -> 'BenchData':
+        rng = random.Random(seed)
+
+        def sample(query, k: int) -> list:
+            rows = session.execute(query).all()
+            return rng.sample(rows, min(k, len(rows)))
+
+        genres = session.execute(
+            select(func.jsonb_array_elements_text(Book.genres)).distinct()
+        ).scalars().all()
+
+        return cls(
+            rng=rng,
+            book_ids=[row.id for row in sample(select(Book.id).order_by(Book.id), 2000)],
+            telegram_ids=[
+                row.telegram_id
+                for row in sample(select(User.telegram_id).order_by(User.telegram_id), 2000)
+            ],
+            category_ids=session.execute(select(Category.id).order_by(Category.id)).scalars().all(),
+            active_bookings=[
+                tuple(row) for row in sample(
+                    select(Booking.id, User.telegram_id, Booking.book_id)
+                    .join(User, User.id == Booking.user_id)
+                    .where(Booking.status == 'active')
+                    .order_by(Booking.id),
+                    2000
+                )
+            ],
+            genres=sorted(genres),
+        )
+
+    def book_id(self) -> int:
+        return self.rng.choice(self.book_ids)
+
+    def telegram_id(self) -> int:
+        return self.rng.choice(self.telegram_ids)
+
+    def category_id(self) -> int:
+        return self.rng.choice(self.category_ids)
+
+    def active_booking(self) -> tuple:
+        """Каждый раз другая активная бронь (отмена / завершение меняют статус)"""
+        return self.active_bookings.pop()
+
+    def search_query(self) -> str:
+        return self.rng.choice(TITLE_HEADS + TITLE_TAILS).split()[0]
+
+
+# РЕЕСТР
+
+@dataclass
+class Benchmark:
+    """
+    Бенчмарк функции crud
+
+    prepare(data) вызывается перед каждым замером (не замеряется)
+    и возвращает вызов без аргументов, который замеряется.
+    """
+    name: str
+    function: str
+    prepare: Callable[[BenchData], Callable[[], Any]]
+    iterations: int = 30
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(function: Callable, variant: str = '', iterations: int = 30):
+    """Зарегистрировать бенчмарк функции crud (variant - для нескольких режимов)"""
+    def register(prepare):
+        name = f"{function.__name__}[{variant}]" if variant else function.__name__
+        BENCHMARKS[name] = Benchmark(name, function.__name__, prepare, iterations)
+        return prepare
+    return register
+
+
+def unbenchmarked_functions() -> List[str]:
+    """Публичные функции crud без бенчмарка"""
+    covered = {bench.function for bench in BENCHMARKS.values()}
+    return sorted(
+        name for name, member in inspect.getmembers(crud, inspect.isfunction)
+        if member.__module__ == crud.__name__
+        and not name.startswith('_')
+        and name not in covered
+        and name not in NOT_BENCHMARKED
+    )
+
+
+# БЕНЧМАРКИ: ПОЛЬЗОВАТЕЛИ
+
+@benchmark(crud.create_user)
+def _(data):
+    telegram_id = 2_000_000_000 + data.rng.randrange(10 ** 8)
+    return lambda: crud.create_user(telegram_id, "Бенчмарк", ["фантастика"])
+
+
+@benchmark(crud.create_user, 'existing')
+def _(data):
+    telegram_id = data.telegram_id()
+    return lambda: crud.create_user(telegram_id, "Бенчмарк")
+
+
+@benchmark(crud.get_user_by_telegram_id)
+def _(data):
+    telegram_id = data.telegram_id()
+    return lambda: crud.get_user_by_telegram_id(telegram_id)
+
+
+@benchmark(crud.get_user_by_id)
+def _(data):
+    user_id = data.rng.randint(1, BENCH_DATASET.users)
+    return lambda: crud.get_user_by_id(user_id)
+
+
+@benchmark(crud.update_user_genres)
+def _(data):
+    telegram_id, genres = data.telegram_id(), data.rng.sample(data.genres, 3)
+    return lambda: crud.update_user_genres(telegram_id, genres)
+
+
+@benchmark(crud.toggle_user_notifications)
+def _(data):
+    telegram_id = data.telegram_id()
+    return lambda: crud.toggle_user_notifications(telegram_id)
+
+
+@benchmark(crud.get_all_users_with_notifications, iterations=10)
+def _(data):
+    return crud.get_all_users_with_notifications
+
+
+@benchmark(crud.get_recent_users)
+def _(data):
+    return lambda: crud.get_recent_users(limit=10)
+
+
+@benchmark(crud.get_users_count)
+def _(data):
+    return crud.get_users_count
+
+
+@benchmark(crud.delete_user, iterations=10)
+def _(data):
+    telegram_id = data.telegram_ids.pop()
+    return lambda: crud.delete_user(telegram_id)
+
+
+# БЕНЧМАРКИ: КАТЕГОРИИ
+
+@benchmark(crud.create_category)
+def _(data):
+    name = f"Бенчмарк {data.rng.randrange(10 ** 9)}"
+    return lambda: crud.create_category(name, "🧪", "Категория бенчмарка")
+
+
+@benchmark(crud.get_all_categories)
+def _(data):
+    return crud.get_all_categories
+
+
+@benchmark(crud.get_category_by_id)
+def _(data):
+    category_id = data.category_id()
+    return lambda: crud.get_category_by_id(category_id)
+
+
+@benchmark(crud.get_category_by_name)
+def _(data):
+    return lambda: crud.get_category_by_name("Фантастика")
+
+
+@benchmark(crud.update_category)
+def _(data):
+    category_id = data.category_id()
+    return lambda: crud.update_category(category_id, description="Обновлено бенчмарком")
+
+
+@benchmark(crud.delete_category)
+def _(data):
+    # Пустая категория - удаление книг каскадом измеряют delete_books
+    category = crud.create_category(f"Удаляемая {data.rng.randrange(10 ** 9)}")
+    return lambda: crud.delete_category(category.id)
+
+
+@benchmark(crud.get_categories_count)
+def _(data):
+    return crud.get_categories_count
+
+
+@benchmark(crud.get_categories_with_counts)
+def _(data):
+    return crud.get_categories_with_counts
+
+
+# БЕНЧМАРКИ: КНИГИ
+
+@benchmark(crud.create_book)
+def _(data):
+    category_id = data.category_id()
+    return lambda: crud.create_book(
+        "Книга бенчмарка", "Автор Бенчмарков", 499.0, category_id,
+        description="Создана бенчмарком", genres=["фантастика"]
+    )
+
+
+@benchmark(crud.upsert_books, iterations=10)
+def _(data):
+    rows = [
+        {
+            'title': f"Импорт {number}",
+            'author': "Автор Импортов",
+            'price': 100.0 + number,
+            'category_id': data.category_id(),
+            'isbn': f"978{data.rng.randrange(10 ** 10):010d}",
+            'genres': ["импорт"],
+        }
+        for number in range(200)
+    ]
+    return lambda: crud.upsert_books(rows)
+
+
+@benchmark(crud.get_book_by_id)
+def _(data):
+    book_id = data.book_id()
+    return lambda: crud.get_book_by_id(book_id)
+
+
+@benchmark(crud.get_books_by_category)
+def _(data):
+    category_id = data.category_id()
+    return lambda: crud.get_books_by_category(category_id, limit=10)
+
+
+@benchmark(crud.get_books_by_category, 'offset')
+def _(data):
+    category_id = data.category_id()
+    return lambda: crud.get_books_by_category(category_id, limit=10, offset=500)
+
+
+@benchmark(crud.get_books_by_category, 'after')
+def _(data):
+    category_id = data.category_id()
+    page = crud.get_books_by_category(category_id, limit=10, offset=490)
+    after = crud.book_cursor(page[-1]) if page else None
+    return lambda: crud.get_books_by_category(category_id, limit=10, after=after)
+
+
+@benchmark(crud.get_books_count_by_category)
+def _(data):
+    category_id = data.category_id()
+    return lambda: crud.get_books_count_by_category(category_id)
+
+
+@benchmark(crud.get_category_page)
+def _(data):
+    category_id = data.category_id()
+    return lambda: crud.get_category_page(category_id, page=1)
+
+
+@benchmark(crud.get_category_page, 'page_20')
+def _(data):
+    category_id = data.category_id()
+    return lambda: crud.get_category_page(category_id, page=20)
+
+
+@benchmark(crud.get_all_books)
+def _(data):
+    return lambda: crud.get_all_books(available_only=False, limit=20)
+
+
+@benchmark(crud.search_books)
+def _(data):
+    query_text = data.search_query()
+    return lambda: crud.search_books(query_text)
+
+
+@benchmark(crud.has_trigram_search)
+def _(data):
+    return crud.has_trigram_search
+
+
+@benchmark(crud.search_books_fuzzy)
+def _(data):
+    # Опечатка: переставлены две последние буквы
+    word = data.search_query()
+    query_text = word[:-2] + word[-1] + word[-2]
+    return lambda: crud.search_books_fuzzy(query_text)
+
+
+@benchmark(crud.get_books_by_genres)
+def _(data):
+    genres = data.rng.sample(data.genres, 2)
+    return lambda: crud.get_books_by_genres(genres)
+
+
+@benchmark(crud.get_books_by_genres, 'rank_by_overlap')
+def _(data):
+    genres = data.rng.sample(data.genres, 3)
+    return lambda: crud.get_books_by_genres(genres, rank_by_overlap=True)
+
+
+@benchmark(crud.get_new_books)
+def _(data):
+    return lambda: crud.get_new_books(days=30)
+
+
+@benchmark(crud.update_book)
+def _(data):
+    book_id = data.book_id()
+    return lambda: crud.update_book(book_id, price=555.0)
+
+
+@benchmark(crud.update_book_photo)
+def _(data):
+    book_id = data.book_id()
+    return lambda: crud.update_book_photo(book_id, "bench_photo_file_id")
+
+
+@benchmark(crud.remove_book_photo)
+def _(data):
+    book_id = data.book_id()
+    return lambda: crud.remove_book_photo(book_id)
+
+
+@benchmark(crud.update_books_photos)
+def _(data):
+    covers = [(data.book_id(), f"bench_photo_{number}") for number in range(10)]
+    return lambda: crud.update_books_photos(covers)
+
+
+@benchmark(crud.bulk_update_books, iterations=10)
+def _(data):
+    changes = [
+        {'id': data.book_id(), 'price': float(data.rng.randrange(100, 2000)), 'is_available': None}
+        for _ in range(500)
+    ]
+    return lambda: crud.bulk_update_books(changes)
+
+
+@benchmark(crud.toggle_books_availability)
+def _(data):
+    book_ids = [data.book_id() for _ in range(50)]
+    return lambda: crud.toggle_books_availability(book_ids)
+
+
+@benchmark(crud.delete_books, iterations=10)
+def _(data):
+    book_ids = [data.book_ids.pop() for _ in range(20)]
+    return lambda: crud.delete_books(book_ids)
+
+
+@benchmark(crud.delete_book)
+def _(data):
+    book_id = data.book_ids.pop()
+    return lambda: crud.delete_book(book_id)
+
+
+@benchmark(crud.get_books_count)
+def _(data):
+    return crud.get_books_count
+
+
+# БЕНЧМАРКИ: БРОНИ
+
+@benchmark(crud.create_booking)
+def _(data):
+    telegram_id, book_id = data.telegram_id(), data.book_id()
+    pickup_date = date.today() + timedelta(days=3)
+    return lambda: crud.create_booking(telegram_id, book_id, pickup_date)
+
+
+@benchmark(crud.get_booking_by_id)
+def _(data):
+    booking_id = data.rng.randint(1, BENCH_DATASET.bookings)
+    return lambda: crud.get_booking_by_id(booking_id)
+
+
+@benchmark(crud.get_user_bookings)
+def _(data):
+    telegram_id = data.telegram_id()
+    return lambda: crud.get_user_bookings(telegram_id)
+
+
+@benchmark(crud.get_all_bookings, iterations=5)
+def _(data):
+    return lambda: crud.get_all_bookings(status='active')
+
+
+@benchmark(crud.cancel_booking)
+def _(data):
+    booking_id, telegram_id, _ = data.active_booking()
+    return lambda: crud.cancel_booking(booking_id, user_telegram_id=telegram_id, only_active=True)
+
+
+@benchmark(crud.complete_booking)
+def _(data):
+    booking_id, _, _ = data.active_booking()
+    return lambda: crud.complete_booking(booking_id, only_active=True)
+
+
+@benchmark(crud.get_active_booking)
+def _(data):
+    _, telegram_id, book_id = data.rng.choice(data.active_bookings)
+    return lambda: crud.get_active_booking(telegram_id, book_id)
+
+
+@benchmark(crud.get_bookings_count)
+def _(data):
+    return lambda: crud.get_bookings_count(status='active')
+
+
+@benchmark(crud.get_bookings_for_reminder, iterations=10)
+def _(data):
+    return lambda: crud.get_bookings_for_reminder(days_before=1)
+
+
+# БЕНЧМАРКИ: СТАТИСТИКА
+
+@benchmark(crud.get_database_stats, 'query')
+def _(data):
+    return lambda: crud.get_database_stats(source='query')
+
+
+@benchmark(crud.get_database_stats, 'counters')
+def _(data):
+    return lambda: crud.get_database_stats(source='counters')
+
+
+@benchmark(crud.get_counters_stats)
+def _(data):
+    return crud.get_counters_stats
+
+
+@benchmark(crud.compact_stats_counters, iterations=10)
+def _(data):
+    return crud.compact_stats_counters
+
+
+# ПРОГОН
+
+def _percentile(values: List[float], percent: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[percent - 1]
+
+
+def run_benchmark(bench: Benchmark, data: BenchData, iterations: Optional[int] = None) -> dict:
+    """
+    Прогнать один бенчмарк в транзакции, которая затем откатывается
+
+    На каждый вызов - новая сессия на том же соединении (как unit of work
+    на апдейт): объекты предыдущих вызовов не берутся из identity map.
+    """
+    timings, queries = [], []
+    iterations = iterations or bench.iterations
+
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            for iteration in range(WARMUP_ITERATIONS + iterations):
+                session = Session(
+                    bind=connection,
+                    join_transaction_mode='rollback_only',
+                    autoflush=False,
+                    expire_on_commit=False,
+                    # after_commit колбэки (поисковый индекс) не выполняются
+                    info={'after_commit': []}
+                )
+                with session, crud.bind_session(session):
+                    call = bench.prepare(data)
+
+                with Session(
+                    bind=connection,
+                    join_transaction_mode='rollback_only',
+                    autoflush=False,
+                    expire_on_commit=False,
+                    info={'after_commit': []}
+                ) as session, crud.bind_session(session), count_queries() as counter:
+                    started = time.perf_counter()
+                    call()
+                    elapsed = (time.perf_counter() - started) * 1000
+
+                if iteration >= WARMUP_ITERATIONS:
+                    timings.append(elapsed)
+                    queries.append(counter.count)
+        finally:
+            transaction.rollback()
+
+    return {
+        'iterations': len(timings),
+        'p50_ms': round(_percentile(timings, 50), 3),
+        'p95_ms': round(_percentile(timings, 95), 3),
+        'p99_ms': round(_percentile(timings, 99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries': max(queries),
+        'queries_min': min(queries),
+    }
+
+
+def dataset_rows() -> Dict[str, int]:
+    """Сколько строк в таблицах набора"""
+    with engine.connect() as connection:
+        return {
+            table: connection.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+            for table in ('categories', 'books', 'users', 'bookings')
+        }
+
+
+def expected_rows() -> Dict[str, int]:
+    return {
+        'categories': BENCH_DATASET.categories,
+        'books': BENCH_DATASET.books,
+        'users': BENCH_DATASET.users,
+        'bookings': BENCH_DATASET.bookings,
+    }
+
+
+def vacuum_dataset():
+    """
+    VACUUM ANALYZE таблиц набора
+
+    Откаченные транзакции прошлых прогонов оставляют мёртвые строки -
+    без очистки каждый следующий прогон медленнее предыдущего.
+    """
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        for table in ('categories', 'books', 'users', 'bookings', 'stats_counters'):
+            connection.execute(text(f"VACUUM ANALYZE {table}"))
+
+
+def run_all(names: List[str], iterations: Optional[int] = None) -> dict:
+    """Прогнать бенчмарки; результат - для сохранения в JSON"""
+    vacuum_dataset()
+
+    with Session(engine) as session:
+        data = BenchData.load(session, seed=BENCH_DATASET.seed)
+
+    results = {}
+    for name in names:
+        results[name] = run_benchmark(BENCHMARKS[name], data, iterations)
+        result = results[name]
+        print(
+            f"  {name:45} p50 {result['p50_ms']:9.2f} ms   p95 {result['p95_ms']:9.2f} ms   "
+            f"p99 {result['p99_ms']:9.2f} ms   queries {result['queries']}"
+        )
+
+    with engine.connect() as connection:
+        server_version = connection.execute(text("SHOW server_version")).scalar()
+
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'postgres': server_version,
+        'dataset': dataclasses.asdict(BENCH_DATASET),
+        'results': results,
+    }
+
+
+# СРАВНЕНИЕ
+
+def compare(
+        current: dict,
+        baseline: dict,
+        threshold: float,
+        min_delta_ms: float,
+        metrics: tuple = COMPARED_METRICS
+) -> List[str]:
+    """
+    Регрессии относительно baseline
+
+    Returns:
+        Описания регрессий (пусто - регрессий нет)
+    """
+    regressions = []
+
+    if current['dataset'] != baseline['dataset']:
+        regressions.append("набор данных отличается от baseline - пересохраните baseline")
+        return regressions
+
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+
+        if result['queries'] > base['queries']:
+            regressions.append(
+                f"{name}: запросов {base['queries']} -> {result['queries']} (N+1?)"
+            )
+
+        for metric in metrics:
+            limit = max(base[metric] * (1 + threshold), base[metric] + min_delta_ms)
+            if result[metric] > limit:
+                regressions.append(
+                    f"{name}: {metric} {base[metric]:.2f} -> {result[metric]:.2f} ms "
+                    f"(+{(result[metric] / base[metric] - 1) * 100:.0f}%)"
+                )
+
+    return regressions
+
+
+# CLI
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Бенчмарк database/crud.py")
+    parser.add_argument('--load', action='store_true',
+                        help="очистить БД и загрузить набор данных бенчмарка")
+    parser.add_argument('--only', default='',
+                        help="только эти бенчмарки (через запятую; имя функции - все её режимы)")
+    parser.add_argument('--iterations', type=int, default=None,
+                        help="вызовов на бенчмарк (по умолчанию - у каждого свой)")
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH,
+                        help=f"файл baseline (по умолчанию {BASELINE_PATH})")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="сохранить результат как baseline")
+    parser.add_argument('--output', type=Path, default=None,
+                        help="сохранить результат в файл")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"допустимое замедление, доля (по умолчанию {DEFAULT_THRESHOLD})")
+    parser.add_argument('--metrics', default=','.join(COMPARED_METRICS),
+                        help="метрики времени для сравнения (p50_ms, p95_ms, p99_ms, mean_ms)")
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help=f"замедление меньше этого - шум (по умолчанию {DEFAULT_MIN_DELTA_MS} ms)")
+    return parser.parse_args()
+
+
+def main() -> int:
+    # Логи crud на каждый вызов заглушили бы таблицу результатов
+    logging.getLogger('database').setLevel(logging.ERROR)
+    args = parse_args()
+
+    print("⏱️  BookHive crud benchmark")
+    print("=" * 60)
+
+    if args.load:
+        print("🧪 Loading benchmark dataset...")
+        stats = generate(BENCH_DATASET, truncate=True)
+        print(f"✅ Loaded {sum(stats.rows.values()):,} rows in {stats.total_seconds:.1f} s\n")
+
+    rows = dataset_rows()
+    if rows != expected_rows():
+        print(f"❌ В БД не набор бенчмарка: {rows}, нужно {expected_rows()}")
+        print("   Загрузите его: python -m benchmarks.crud_bench --load (очищает БД!)")
+        return 2
+
+    missing = unbenchmarked_functions()
+    if missing:
+        print(f"❌ Функции crud без бенчмарка: {', '.join(missing)}")
+        print("   Добавьте @benchmark в benchmarks/crud_bench.py (или NOT_BENCHMARKED)")
+        return 1
+
+    names = list(BENCHMARKS)
+    if args.only:
+        wanted = {name.strip() for name in args.only.split(',')}
+        names = [
+            name for name in names
+            if name in wanted or BENCHMARKS[name].function in wanted
+        ]
+
+    print(f"📊 {len(names)} benchmarks\n")
+    current = run_all(names, args.iterations)
+
+    if args.output:
+        args.output.write_text(json.dumps(current, ensure_ascii=False, indent=2))
+        print(f"\n💾 Results: {args.output}")
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        if args.baseline.exists() and args.only:
+            # Частичный прогон дополняет baseline, а не заменяет его
+            baseline = json.loads(args.baseline.read_text())
+            baseline['results'].update(current['results'])
+            current = {**current, 'results': baseline['results']}
+        args.baseline.write_text(json.dumps(current, ensure_ascii=False, indent=2))
+        print(f"\n💾 Baseline saved: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"\n⚠️  Baseline не найден ({args.baseline}) - сохраните его: --save-baseline")
+        return 0
+
+    regressions = compare(
+        current, json.loads(args.baseline.read_text()), args.threshold, args.min_delta_ms,
+        metrics=tuple(metric.strip() for metric in args.metrics.split(','))
+    )
+
+    print("\n" + "=" * 60)
+    if regressions:
+        print(f"❌ Регрессии ({len(regressions)}):")
+        for regression in regressions:
+            print(f"   • {regression}")
+        return 1
+
+    print(f"✅ Регрессий нет (порог {args.threshold:.0%}, шум < {args.min_delta_ms} ms)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
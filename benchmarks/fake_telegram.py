@@ -0,0 +1,260 @@
+# benchmarks/fake_telegram.py
+"""
+Заглушка Telegram Bot API для нагрузочных тестов
+
+FakeBotAPI отвечает на вызовы Bot API так, как ответил бы Telegram
+(sendMessage возвращает Message с новым message_id и т.д.), запоминает
+последнее сообщение бота в каждом чате и записывает все вызовы.
+
+StubRequest - транспорт python-telegram-bot поверх FakeBotAPI:
+Application, собранный с ним, работает как настоящий, только без сети.
+
+Использование:
+    api = FakeBotAPI()
+    application = build_application(stub_builder(api))
+    data = api.message_update(user, "/start")
+    await application.update_queue.put(to_update(data, application))
+"""
+
+import itertools
+import json
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from telegram import Update
+from telegram.ext import Application, ApplicationBuilder
+from telegram.request import BaseRequest, RequestData
+
+from bot.utils.update_processor import CommitBeforeSendRequest
+
+# Токен заглушки: формат как у настоящего, бот с ID 1
+STUB_TOKEN = '1:STUB-TOKEN'
+
+BOT_USER = {
+    'id': 1,
+    'is_bot': True,
+    'first_name': 'BookHive',
+    'username': 'bookhive_stub_bot',
+    'can_join_groups': False,
+    'can_read_all_group_messages': False,
+    'supports_inline_queries': True,
+}
+
+
+@dataclass
+class ApiCall:
+    """Вызов Bot API"""
+    method: str
+    params: dict
+    at: float
+
+
+class FakeBotAPI:
+    """
+    Состояние заглушки Bot API
+
+    Attributes:
+        calls: Все вызовы (при record_calls=True)
+        counts: Число вызовов по методам
+        last_messages: Последнее сообщение бота в чате {chat_id: message}
+    """
+
+    def __init__(self, record_calls: bool = False):
+        self.record_calls = record_calls
+        self.calls: List[ApiCall] = []
+        self.counts: Counter = Counter()
+        self.messages: Dict[Tuple[int, int], dict] = {}
+        self.last_messages: Dict[int, dict] = {}
+
+        self._message_ids = defaultdict(lambda: itertools.count(1))
+        self._update_ids = itertools.count(1)
+        self._callback_ids = itertools.count(1)
+
+    # BOT API
+
+    def call(self, method: str, params: dict) -> Any:
+        """
+        Выполнить метод Bot API
+
+        Returns:
+            Поле result ответа Telegram
+        """
+        self.counts[method] += 1
+        if self.record_calls:
+            self.calls.append(ApiCall(method, params, time.time()))
+
+        handler = getattr(self, f"_api_{method.lower()}", None)
+        return handler(params) if handler else True
+
+    def _api_getme(self, params: dict) -> dict:
+        return BOT_USER
+
+    def _api_getupdates(self, params: dict) -> list:
+        return []
+
+    def _api_sendmessage(self, params: dict) -> dict:
+        return self._new_message(params, text=params.get('text'))
+
+    def _api_sendphoto(self, params: dict) -> dict:
+        photo = params.get('photo')
+        file_id = photo if isinstance(photo, str) else f"stub_photo_{next(self._callback_ids)}"
+        return self._new_message(
+            params,
+            caption=params.get('caption'),
+            photo=[{'file_id': file_id, 'file_unique_id': file_id[-16:], 'width': 800, 'height': 1200}]
+        )
+
+    def _api_editmessagetext(self, params: dict) -> Any:
+        return self._edit_message(params, text=params.get('text'))
+
+    def _api_editmessagecaption(self, params: dict) -> Any:
+        return self._edit_message(params, caption=params.get('caption'))
+
+    def _api_editmessagereplymarkup(self, params: dict) -> Any:
+        return self._edit_message(params)
+
+    def _api_deletemessage(self, params: dict) -> bool:
+        key = (int(params['chat_id']), int(params['message_id']))
+        self.messages.pop(key, None)
+        return True
+
+    def _new_message(self, params: dict, **content) -> dict:
+        chat_id = int(params['chat_id'])
+        message = {
+            'message_id': next(self._message_ids[chat_id]),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': BOT_USER,
+            **{name: value for name, value in content.items() if value is not None},
+        }
+        if params.get('reply_markup'):
+            message['reply_markup'] = params['reply_markup']
+
+        self._remember(message)
+        return message
+
+    def _edit_message(self, params: dict, **content) -> Any:
+        if 'inline_message_id' in params:
+            return True
+
+        chat_id, message_id = int(params['chat_id']), int(params['message_id'])
+        message = dict(self.messages.get((chat_id, message_id)) or {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': BOT_USER,
+        })
+        message.update({name: value for name, value in content.items() if value is not None})
+        message['edit_date'] = int(time.time())
+        if params.get('reply_markup'):
+            message['reply_markup'] = params['reply_markup']
+        else:
+            message.pop('reply_markup', None)
+
+        self._remember(message)
+        return message
+
+    def _remember(self, message: dict) -> None:
+        chat_id = message['chat']['id']
+        self.messages[(chat_id, message['message_id'])] = message
+        self.last_messages[chat_id] = message
+
+    # АПДЕЙТЫ ОТ ПОЛЬЗОВАТЕЛЕЙ
+
+    def buttons(self, chat_id: int) -> List[str]:
+        """callback_data кнопок последнего сообщения бота в чате"""
+        message = self.last_messages.get(chat_id) or {}
+        keyboard = (message.get('reply_markup') or {}).get('inline_keyboard', [])
+        return [
+            button['callback_data']
+            for row in keyboard for button in row
+            if button.get('callback_data')
+        ]
+
+    def message_update(self, user: dict, text: str) -> dict:
+        """JSON апдейта с сообщением пользователя (команда - если начинается с /)"""
+        message = {
+            'message_id': next(self._message_ids[user['id']]),
+            'date': int(time.time()),
+            'chat': {'id': user['id'], 'type': 'private', 'first_name': user['first_name']},
+            'from': user,
+            'text': text,
+        }
+        if text.startswith('/'):
+            message['entities'] = [
+                {'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}
+            ]
+        return {'update_id': next(self._update_ids), 'message': message}
+
+    def callback_update(self, user: dict, data: str) -> Optional[dict]:
+        """
+        JSON апдейта с нажатием кнопки под последним сообщением бота
+
+        Returns:
+            None - если в чате нет сообщения бота
+        """
+        message = self.last_messages.get(user['id'])
+        if message is None:
+            return None
+
+        return {
+            'update_id': next(self._update_ids),
+            'callback_query': {
+                'id': str(next(self._callback_ids)),
+                'from': user,
+                'chat_instance': str(user['id']),
+                'message': message,
+                'data': data,
+            },
+        }
+
+
+class StubRequest(BaseRequest):
+    """
+    Транспорт python-telegram-bot без сети: запросы выполняет FakeBotAPI
+
+    Args:
+        api: Заглушка Bot API
+    """
+
+    def __init__(self, api: FakeBotAPI):
+        self.api = api
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def do_request(
+            self,
+            url: str,
+            method: str,
+            request_data: Optional[RequestData] = None,
+            read_timeout=None,
+            write_timeout=None,
+            connect_timeout=None,
+            pool_timeout=None,
+    ) -> Tuple[int, bytes]:
+        api_method = url.rsplit('/', 1)[-1]
+        params = request_data.parameters if request_data else {}
+
+        result = self.api.call(api_method, params)
+        return 200, json.dumps({'ok': True, 'result': result}).encode()
+
+
+def stub_builder(api: FakeBotAPI) -> ApplicationBuilder:
+    """ApplicationBuilder, у которого бот ходит в FakeBotAPI"""
+    return (
+        Application.builder()
+        .token(STUB_TOKEN)
+        .request(CommitBeforeSendRequest(StubRequest(api)))
+        .get_updates_request(StubRequest(api))
+    )
+
+
+def to_update(data: dict, application: Application) -> Update:
+    """Update из JSON апдейта (привязанный к боту Application)"""
+    return Update.de_json(data, application.bot)
@@ -0,0 +1,488 @@
+# benchmarks/load_test.py
+"""
+Нагрузочный тест бота без Telegram
+
+Собирает тот же Application, что и bot/main.main() (build_application),
+но бот ходит не в Telegram, а в заглушку Bot API (benchmarks/fake_telegram.py).
+Виртуальные пользователи проходят сценарии - /start, листание каталога,
+поиск, бронирование - нажимая кнопки из ответов бота, как настоящие.
+Апдейты подаются в update_queue с заданной общей частотой.
+
+Отчёт:
+- пропускная способность (апдейтов в секунду) и задержка апдейта
+- время, SQL запросы и время в БД по хендлерам (bot/utils/handler_metrics.py)
+- задержка event loop
+- SQL запросов и время в БД на апдейт, вызовы Bot API, ошибки
+
+Хендлер, превысивший бюджет запросов (handler_metrics.QUERY_BUDGETS), -
+код выхода 1.
+
+Запуск (на тестовой БД - сценарий бронирования создаёт брони):
+    python -m benchmarks.load_test --rate 50 --duration 30
+    python -m benchmarks.load_test --rate 0 --users 500          # максимум
+    python -m benchmarks.load_test --mix start=1 --rate 200      # шторм /start
+    python -m benchmarks.load_test --concurrency 16 --output load.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import re
+import statistics
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+from config.settings import CONCURRENT_UPDATES
+from database.query_counter import count_queries
+from database.synthetic import TITLE_HEADS, TITLE_TAILS
+from bot.main import build_application
+from bot.utils.handler_metrics import HandlerMetrics, instrument_handlers, timing_stats
+from bot.utils.update_processor import UnitOfWorkUpdateProcessor
+from benchmarks.fake_telegram import FakeBotAPI, stub_builder, to_update
+
+# Telegram ID виртуальных пользователей: FIRST_USER_ID, FIRST_USER_ID + 1, ...
+FIRST_USER_ID = 1_500_000_000
+
+# Сколько ждать обработки одного апдейта
+UPDATE_TIMEOUT = 30.0
+
+# Период проверки задержки event loop
+LAG_INTERVAL = 0.05
+
+
+# СЦЕНАРИИ
+
+@dataclass
+class Step:
+    """
+    Шаг сценария
+
+    kind='send' - сообщение пользователя (text - строка или функция от rng),
+    kind='press' - нажатие кнопки последнего сообщения бота,
+    callback_data которой подходит под регулярное выражение text
+    """
+    kind: str
+    text: Union[str, Callable[[random.Random], str]]
+
+
+def send(text) -> Step:
+    return Step('send', text)
+
+
+def press(pattern: str) -> Step:
+    return Step('press', pattern)
+
+
+def search_query(rng: random.Random) -> str:
+    return rng.choice(TITLE_HEADS + TITLE_TAILS).split()[0]
+
+
+SCENARIOS: Dict[str, List[Step]] = {
+    'start': [
+        send('/start'),
+    ],
+    'catalog': [
+        send('/start'),
+        press(r'^catalog$'),
+        press(r'^category_\d+$'),
+        press(r'^category_\d+_page_\d+_n_'),
+        press(r'^category_\d+_page_\d+_n_'),
+        press(r'^book_\d+$'),
+    ],
+    'search': [
+        send('/start'),
+        press(r'^search$'),
+        send(search_query),
+    ],
+    'booking': [
+        send('/start'),
+        press(r'^catalog$'),
+        press(r'^category_\d+$'),
+        press(r'^book_\d+$'),
+        press(r'^book_reserve_\d+$'),
+        press(r'^calendar_day_'),
+        press(r'^skip_comment$'),
+    ],
+}
+
+DEFAULT_MIX = 'start=1,catalog=4,search=2,booking=1'
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """'start=1,catalog=4' -> {'start': 1.0, 'catalog': 4.0}"""
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Неизвестный сценарий: {name} (есть: {', '.join(SCENARIOS)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+# ЗАМЕРЫ
+
+class MeasuringUpdateProcessor(UnitOfWorkUpdateProcessor):
+    """
+    UnitOfWorkUpdateProcessor, который замеряет каждый апдейт
+
+    Время обработки - от начала обработки (после ожидания свободного
+    слота) до конца; SQL запросы и время в БД - всех хендлеров апдейта и COMMIT.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        self.service_times: List[float] = []
+        self.queries: List[int] = []
+        self.db_times: List[float] = []
+        self._waiting: Dict[int, asyncio.Future] = {}
+
+    def expect(self, update_id: int) -> asyncio.Future:
+        """Future, который завершится, когда апдейт будет обработан"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[update_id] = future
+        return future
+
+    async def do_process_update(self, update, coroutine) -> None:
+        with count_queries() as counter:
+            started = time.perf_counter()
+            try:
+                await super().do_process_update(update, coroutine)
+            finally:
+                self.service_times.append(time.perf_counter() - started)
+                self.queries.append(counter.count)
+                self.db_times.append(counter.db_time)
+
+                future = self._waiting.pop(getattr(update, 'update_id', None), None)
+                if future is not None and not future.done():
+                    future.set_result(None)
+
+
+class Pacer:
+    """Общая частота апдейтов всех пользователей (0 - без ограничения)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_slot = 0.0
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+
+        now = time.perf_counter()
+        slot = max(self.next_slot, now)
+        self.next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+async def monitor_loop_lag(lags: List[float], stop: asyncio.Event) -> None:
+    """Насколько позже заказанного просыпается asyncio.sleep - задержка event loop"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        lags.append(max(time.perf_counter() - started - LAG_INTERVAL, 0.0))
+
+
+@dataclass
+class LoadStats:
+    """Счётчики прогона"""
+    sent: int = 0
+    completed: int = 0
+    timed_out: int = 0
+    scenarios: Counter = field(default_factory=Counter)
+    stuck: Counter = field(default_factory=Counter)
+    errors: Counter = field(default_factory=Counter)
+
+
+class Harness:
+    """
+    Application из bot/main.py на заглушке Bot API со всеми замерами
+
+    Использование:
+        async with Harness(concurrency=4) as harness:
+            await harness.send(harness.api.message_update(user, "/start"))
+        report = harness.report({...})
+
+    Args:
+        concurrency: Апдейтов одновременно
+        api: Заглушка Bot API (по умолчанию новая)
+    """
+
+    def __init__(self, concurrency: int, api: Optional[FakeBotAPI] = None):
+        self.api = api or FakeBotAPI()
+        self.processor = MeasuringUpdateProcessor(max(concurrency, 1))
+        self.application = build_application(stub_builder(self.api), update_processor=self.processor)
+
+        self.metrics = HandlerMetrics()
+        instrument_handlers(self.application, self.metrics)
+        self.application.add_error_handler(self._count_error)
+
+        self.stats = LoadStats()
+        self.latencies: List[float] = []
+        self.lags: List[float] = []
+        self.elapsed = 0.0
+
+        self._stop_monitor = asyncio.Event()
+        self._monitor: Optional[asyncio.Task] = None
+        self._started = 0.0
+
+    async def _count_error(self, update, context) -> None:
+        self.stats.errors[type(context.error).__name__] += 1
+
+    async def __aenter__(self) -> 'Harness':
+        application = self.application
+        await application.initialize()
+        if application.post_init:
+            await application.post_init(application)
+        await application.start()
+
+        self._monitor = asyncio.create_task(monitor_loop_lag(self.lags, self._stop_monitor))
+        self._started = time.perf_counter()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.elapsed = time.perf_counter() - self._started
+        self._stop_monitor.set()
+        await self._monitor
+
+        application = self.application
+        await application.stop()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+        await application.shutdown()
+
+    async def send(self, data: dict) -> bool:
+        """
+        Подать апдейт и дождаться конца его обработки
+
+        Returns:
+            False - не обработан за UPDATE_TIMEOUT
+        """
+        done = self.processor.expect(data['update_id'])
+        sent_at = time.perf_counter()
+        await self.application.update_queue.put(to_update(data, self.application))
+        self.stats.sent += 1
+
+        try:
+            await asyncio.wait_for(done, UPDATE_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.stats.timed_out += 1
+            return False
+
+        self.latencies.append(time.perf_counter() - sent_at)
+        self.stats.completed += 1
+        return True
+
+    def report(self, config: dict) -> dict:
+        """Отчёт прогона (для печати и JSON)"""
+        stats, queries = self.stats, self.processor.queries
+        return {
+            'config': config,
+            'elapsed_s': round(self.elapsed, 2),
+            'updates': {
+                'sent': stats.sent,
+                'completed': stats.completed,
+                'timed_out': stats.timed_out,
+                'throughput_per_s': round(stats.completed / self.elapsed, 1) if self.elapsed else 0,
+            },
+            'latency': timing_stats(self.latencies),
+            'service_time': timing_stats(self.processor.service_times),
+            'loop_lag': timing_stats(self.lags),
+            'queries_per_update': {
+                'mean': round(statistics.fmean(queries), 2) if queries else 0,
+                'max': max(queries, default=0),
+            },
+            'db_time_per_update': timing_stats(self.processor.db_times),
+            'scenarios': dict(stats.scenarios),
+            'stuck': dict(stats.stuck),
+            'errors': dict(stats.errors),
+            'bot_api_calls': dict(self.api.counts.most_common()),
+            'handlers': self.metrics.summary(),
+            'budget_violations': self.metrics.violations(),
+        }
+
+
+# ВИРТУАЛЬНЫЕ ПОЛЬЗОВАТЕЛИ
+
+async def virtual_user(
+        number: int,
+        harness: Harness,
+        pacer: Pacer,
+        weights: Dict[str, float],
+        deadline: float,
+        seed: int
+) -> None:
+    """Пользователь проходит случайные сценарии до конца теста"""
+    rng = random.Random(seed * 100_003 + number)
+    user = {
+        'id': FIRST_USER_ID + number,
+        'is_bot': False,
+        'first_name': f"Нагрузка {number}",
+        'language_code': 'ru',
+    }
+    api, stats = harness.api, harness.stats
+    names, scenario_weights = list(weights), list(weights.values())
+
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, scenario_weights)[0]
+        stats.scenarios[name] += 1
+
+        for step in SCENARIOS[name]:
+            await pacer.wait()
+            if time.perf_counter() >= deadline:
+                return
+
+            if step.kind == 'send':
+                text = step.text(rng) if callable(step.text) else step.text
+                data = api.message_update(user, text)
+            else:
+                buttons = [button for button in api.buttons(user['id']) if re.search(step.text, button)]
+                if not buttons:
+                    # В ответе бота нет такой кнопки (пустая категория, одна страница...)
+                    stats.stuck[f"{name}: {step.text}"] += 1
+                    break
+                data = api.callback_update(user, rng.choice(buttons))
+
+            if not await harness.send(data):
+                break
+
+
+# ПРОГОН
+
+async def run_load_test(
+        rate: float,
+        duration: float,
+        users: int,
+        weights: Dict[str, float],
+        concurrency: int,
+        seed: int
+) -> dict:
+    """
+    Прогнать нагрузочный тест
+
+    Returns:
+        Отчёт (для печати и JSON)
+    """
+    harness = Harness(concurrency)
+
+    async with harness:
+        pacer = Pacer(rate)
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(
+            virtual_user(number, harness, pacer, weights, deadline, seed)
+            for number in range(users)
+        ))
+
+    return harness.report({
+        'rate': rate,
+        'duration': duration,
+        'users': users,
+        'concurrency': concurrency,
+        'mix': weights,
+    })
+
+
+def print_report(report: dict) -> None:
+    updates = report['updates']
+    print(f"📨 Updates:    {updates['completed']:,} / {updates['sent']:,} "
+          f"in {report['elapsed_s']} s (timed out: {updates['timed_out']})")
+    print(f"🚀 Throughput: {updates['throughput_per_s']} updates/s")
+
+    for title, key in (('⏱️  Latency', 'latency'), ('⚙️  Service', 'service_time'), ('🌀 Loop lag', 'loop_lag')):
+        values = report[key]
+        if values:
+            print(f"{title:12} p50 {values['p50_ms']:8.2f} ms   p95 {values['p95_ms']:8.2f} ms   "
+                  f"p99 {values['p99_ms']:8.2f} ms   max {values['max_ms']:8.2f} ms")
+
+    queries = report['queries_per_update']
+    print(f"🗄️  Queries:    {queries['mean']} per update (max {queries['max']})")
+    db_time = report['db_time_per_update']
+    if db_time:
+        print(f"🗄️  DB time:    p50 {db_time['p50_ms']:.2f} ms   p95 {db_time['p95_ms']:.2f} ms per update")
+
+    print("\n📊 Handlers:")
+    for name, handler in report['handlers'].items():
+        budget = f" / {handler['budget']}" if handler['budget'] is not None else ""
+        print(f"  {name:45} calls {handler['calls']:6}   p50 {handler['p50_ms']:8.2f} ms   "
+              f"p95 {handler['p95_ms']:8.2f} ms   db {handler['db_mean_ms']:7.2f} ms   "
+              f"queries {handler['queries_mean']} (max {handler['queries_max']}{budget})")
+
+    print(f"\n🤖 Bot API: {report['bot_api_calls']}")
+    if report.get('scenarios'):
+        print(f"🎬 Scenarios: {report['scenarios']}")
+    if report.get('stuck'):
+        print(f"⚠️  Stuck: {report['stuck']}")
+    if report['errors']:
+        print(f"❌ Errors: {report['errors']}")
+
+    print_violations(report['budget_violations'])
+
+
+def print_violations(violations: Dict[str, dict]) -> None:
+    """Хендлеры сверх бюджета запросов - с запросами худшего вызова"""
+    if not violations:
+        return
+
+    print(f"\n🚨 Query budget exceeded: {len(violations)} handler(s)")
+    for name, violation in violations.items():
+        print(f"  {name}: {violation['queries_max']} queries (budget {violation['budget']}), "
+              f"{violation['calls']} call(s) over budget")
+        for statement in violation['statements']:
+            print(f"    {' '.join(statement.split())[:150]}")
+
+
+# CLI
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест BookHive без Telegram")
+    parser.add_argument('--rate', type=float, default=50,
+                        help="апдейтов в секунду от всех пользователей (0 - максимум)")
+    parser.add_argument('--duration', type=float, default=30, help="длительность, секунд")
+    parser.add_argument('--users', type=int, default=100, help="виртуальных пользователей")
+    parser.add_argument('--mix', default=DEFAULT_MIX,
+                        help=f"веса сценариев (по умолчанию {DEFAULT_MIX})")
+    parser.add_argument('--concurrency', type=int, default=max(CONCURRENT_UPDATES, 1),
+                        help="апдейтов одновременно (по умолчанию CONCURRENT_UPDATES)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--log-level', default='WARNING',
+                        help="уровень логов бота (INFO - как в продакшене)")
+    parser.add_argument('--output', type=Path, default=None, help="сохранить отчёт в JSON")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    logging.getLogger().setLevel(args.log_level)
+
+    try:
+        weights = parse_mix(args.mix)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+
+    print("🔥 BookHive load test")
+    print("=" * 60)
+    print(f"Rate: {args.rate or 'max'} updates/s, {args.users} users, "
+          f"{args.duration} s, concurrency {args.concurrency}, mix {args.mix}\n")
+
+    report = asyncio.run(run_load_test(
+        args.rate, args.duration, args.users, weights, args.concurrency, args.seed
+    ))
+    print_report(report)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+        print(f"\n💾 Report: {args.output}")
+
+    return 1 if report['budget_violations'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
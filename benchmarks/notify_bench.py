@@ -0,0 +1,120 @@
+# benchmarks/notify_bench.py
+"""
+Пропускная способность рассылок (bot/handlers/notifications.py)
+
+Задача рассылки выполняется один раз через настоящий HTTP слой
+python-telegram-bot против локальной замены Bot API
+(benchmarks/bot_api_server.py) с ограничениями частоты Telegram.
+Отчёт: сколько сообщений доставлено, сколько отклонено (429 и ошибки),
+за сколько времени.
+
+Запуск:
+    python -m benchmarks.notify_bench --job new_books
+    python -m benchmarks.notify_bench --job reminders --latency-ms 60
+    python -m benchmarks.notify_bench --global-rate 0 --chat-rate 0   # без ограничений
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+
+from telegram.ext import Application, CallbackContext
+from telegram.request import HTTPXRequest
+
+from bot.handlers import notifications
+from bot.main import build_application
+from bot.utils.update_processor import CommitBeforeSendRequest
+from benchmarks.bot_api_server import BotApiServer, ServerConfig, parse_errors
+from benchmarks.fake_telegram import STUB_TOKEN
+
+JOBS = {
+    'new_books': notifications.notify_new_books,
+    'reminders': notifications.check_booking_reminders,
+}
+
+
+async def run_job(job_name: str, config: ServerConfig, port: int) -> dict:
+    """
+    Выполнить задачу рассылки против локального Bot API
+
+    Returns:
+        Статистика сервера + время выполнения задачи
+    """
+    server = BotApiServer(config)
+    await server.start('127.0.0.1', port)
+
+    application = build_application(
+        Application.builder()
+        .token(STUB_TOKEN)
+        .base_url(f"http://127.0.0.1:{port}/bot")
+        .request(CommitBeforeSendRequest(HTTPXRequest(connection_pool_size=256)))
+    )
+
+    try:
+        async with application:
+            server.reset_stats()
+            started = time.perf_counter()
+            await JOBS[job_name](CallbackContext(application))
+            elapsed = time.perf_counter() - started
+    finally:
+        await server.close()
+
+    stats = server.stats()
+    stats['job_s'] = round(elapsed, 2)
+    return stats
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Пропускная способность рассылок BookHive")
+    parser.add_argument('--job', choices=sorted(JOBS), default='new_books')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=40.0,
+                        help="задержка ответа Bot API (по умолчанию 40 - как у api.telegram.org)")
+    parser.add_argument('--jitter-ms', type=float, default=20.0)
+    parser.add_argument('--global-rate', type=float, default=30.0,
+                        help="сообщений в секунду на бота (0 - без ограничения)")
+    parser.add_argument('--chat-rate', type=float, default=1.0,
+                        help="сообщений в секунду в один чат (0 - без ограничения)")
+    parser.add_argument('--errors', type=parse_errors, default={},
+                        help="ошибки: код:доля через запятую (403:0.02)")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    config = ServerConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        global_rate=args.global_rate,
+        global_burst=args.global_rate,
+        chat_rate=args.chat_rate,
+        errors=args.errors,
+    )
+
+    print("📣 BookHive notification throughput")
+    print("=" * 60)
+    print(f"Job: {args.job}, latency {args.latency_ms} ms, "
+          f"limits {args.global_rate or '∞'}/s per bot, {args.chat_rate or '∞'}/s per chat\n")
+
+    stats = asyncio.run(run_job(args.job, config, args.port))
+
+    attempted = sum(
+        count for method, count in stats['methods'].items() if method.lower().startswith('send')
+    )
+    print(f"⏱️  Job time:    {stats['job_s']} s")
+    print(f"📨 Delivered:   {stats['messages_sent']:,} / {attempted:,} "
+          f"({stats['messages_per_s']} per second)")
+    print(f"🚦 Flood limited (429): {sum(stats['flood_limited'].values()):,}")
+    if stats['injected_errors']:
+        print(f"💥 Injected errors: {stats['injected_errors']}")
+    print(f"🤖 Bot API: {stats['methods']}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
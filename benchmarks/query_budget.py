@@ -0,0 +1,162 @@
+# benchmarks/query_budget.py
+"""
+Проверка бюджетов SQL запросов хендлеров (N+1)
+
+Пользователь и администратор проходят маршруты по кнопкам бота
+(Application на заглушке Bot API, benchmarks/load_test.Harness) - так
+вызывается каждый хендлер из handler_metrics.QUERY_BUDGETS. Отчёт:
+запросы и время в БД на вызов по хендлерам. Хендлер сверх бюджета -
+код выхода 1 и тексты его запросов (обычно видно запрос в цикле).
+
+Запуск (на тестовой БД с данными, например benchmarks.crud_bench --load):
+    python -m benchmarks.query_budget
+    python -m benchmarks.query_budget --output budget.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+from config.settings import ADMIN_IDS
+from bot.utils.handler_metrics import QUERY_BUDGETS
+from benchmarks.load_test import FIRST_USER_ID, Harness, Step, press, print_violations, send
+
+# Администратор маршрута: Telegram ID вне диапазона виртуальных пользователей
+ADMIN_ID = FIRST_USER_ID - 1
+
+ROUTES: Dict[str, List[Step]] = {
+    'user': [
+        send('/start'),
+        press(r'^catalog$'),
+        press(r'^category_\d+$'),
+        press(r'^category_\d+_page_\d+_n_'),
+        press(r'^book_\d+$'),
+        send('/start'),
+        press(r'^new_books$'),
+        send('/start'),
+        press(r'^search$'),
+        send('война'),
+    ],
+    'admin': [
+        send('/admin'),
+        press(r'^admin_detailed_stats$'),
+        press(r'^admin_panel$'),
+        press(r'^admin_books$'),
+        press(r'^admin_panel$'),
+        press(r'^admin_users$'),
+        press(r'^admin_panel$'),
+        press(r'^admin_bookings$'),
+    ],
+}
+
+
+async def walk(harness: Harness, user: dict, steps: List[Step]) -> List[str]:
+    """
+    Пройти маршрут (первая подходящая кнопка на каждом шаге)
+
+    Returns:
+        Шаги, на которых в ответе бота не нашлось кнопки
+    """
+    api = harness.api
+    missing = []
+
+    for step in steps:
+        if step.kind == 'send':
+            data = api.message_update(user, step.text)
+        else:
+            buttons = [button for button in api.buttons(user['id']) if re.search(step.text, button)]
+            if not buttons:
+                missing.append(step.text)
+                continue
+            data = api.callback_update(user, buttons[0])
+
+        await harness.send(data)
+
+    return missing
+
+
+async def check_budgets() -> dict:
+    """
+    Пройти маршруты и собрать отчёт
+
+    Returns:
+        {'handlers', 'violations', 'not_called' (хендлеры с бюджетом без вызовов),
+         'missing' (шаги маршрутов без кнопки), 'errors'}
+    """
+    # is_admin() проверяет ADMIN_IDS из настроек - администратор маршрута добавляется туда
+    if ADMIN_ID not in ADMIN_IDS:
+        ADMIN_IDS.append(ADMIN_ID)
+
+    users = {
+        'user': {'id': FIRST_USER_ID, 'is_bot': False, 'first_name': "Бюджет", 'language_code': 'ru'},
+        'admin': {'id': ADMIN_ID, 'is_bot': False, 'first_name': "Админ", 'language_code': 'ru'},
+    }
+
+    harness = Harness(concurrency=1)
+    missing = {}
+    async with harness:
+        for name, steps in ROUTES.items():
+            skipped = await walk(harness, users[name], steps)
+            if skipped:
+                missing[name] = skipped
+
+    handlers = harness.metrics.summary()
+    return {
+        'handlers': handlers,
+        'violations': harness.metrics.violations(),
+        'not_called': sorted(set(QUERY_BUDGETS) - set(handlers)),
+        'missing': missing,
+        'errors': dict(harness.stats.errors),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Бюджеты SQL запросов хендлеров BookHive")
+    parser.add_argument('--log-level', default='WARNING', help="уровень логов бота")
+    parser.add_argument('--output', type=Path, default=None, help="сохранить отчёт в JSON")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    logging.getLogger().setLevel(args.log_level)
+
+    print("🧮 BookHive query budgets")
+    print("=" * 60)
+
+    report = asyncio.run(check_budgets())
+
+    for name, handler in report['handlers'].items():
+        budget = handler['budget']
+        mark = '  ' if budget is None else ('✅' if handler['queries_max'] <= budget else '❌')
+        limit = f" / {budget}" if budget is not None else ""
+        print(f"{mark} {name:45} queries {handler['queries_max']:3}{limit:5}   "
+              f"db {handler['db_mean_ms']:7.2f} ms   calls {handler['calls']}")
+
+    if report['missing']:
+        print(f"\n⚠️  No button for steps: {report['missing']}")
+    if report['not_called']:
+        print(f"⚠️  Budgeted handlers not called: {', '.join(report['not_called'])}")
+    if report['errors']:
+        print(f"❌ Errors: {report['errors']}")
+
+    print_violations(report['violations'])
+
+    if args.output:
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+        print(f"\n💾 Report: {args.output}")
+
+    if report['violations'] or report['not_called']:
+        return 1
+
+    print("\n✅ All handlers within query budget")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
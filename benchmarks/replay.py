@@ -0,0 +1,173 @@
+# benchmarks/replay.py
+"""
+Воспроизведение записанных апдейтов (bot/utils/update_recorder.py)
+
+Апдейты из файлов updates-*.jsonl.gz подаются в Application из
+bot/main.py (заглушка Bot API, benchmarks/load_test.Harness) с теми же
+интервалами, что в записи, ускоренными в --speed раз. --speed max -
+без пауз, как только апдейты успевают встать в очередь.
+
+Апдейты подаются по расписанию, не дожидаясь обработки предыдущих:
+если бот не успевает, растёт задержка апдейта, а не время прогона.
+Хендлер сверх бюджета запросов (handler_metrics.QUERY_BUDGETS) -
+код выхода 1.
+
+Запуск (на тестовой БД - апдейты выполняются по-настоящему):
+    python -m benchmarks.replay records/updates-20261012-*.jsonl.gz
+    python -m benchmarks.replay records/ --speed 10 --concurrency 8
+    python -m benchmarks.replay records/ --speed max --limit 50000 --output replay.json
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+from config.settings import CONCURRENT_UPDATES
+from bot.utils.handler_metrics import timing_stats
+from bot.utils.update_recorder import FILE_PATTERN
+from benchmarks.load_test import Harness, print_report
+
+# Сколько апдейтов может ждать обработки одновременно
+MAX_PENDING = 10_000
+
+
+def record_files(paths: List[str]) -> List[Path]:
+    """Файлы записи по путям (каталог - все updates-*.jsonl.gz в нём), по порядку"""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(path.glob(FILE_PATTERN))
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def read_records(files: List[Path], limit: int = 0) -> Iterator[Tuple[float, dict]]:
+    """(время получения, JSON апдейта) из файлов записи"""
+    count = 0
+    for path in files:
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                yield record['ts'], record['update']
+
+                count += 1
+                if limit and count >= limit:
+                    return
+
+
+def parse_speed(value: str) -> float:
+    """'10' -> 10.0, 'max' -> 0 (без пауз)"""
+    if value.lower() == 'max':
+        return 0.0
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("скорость должна быть больше 0 (или max)")
+    return speed
+
+
+async def replay(files: List[Path], speed: float, concurrency: int, limit: int) -> dict:
+    """
+    Воспроизвести записи
+
+    Returns:
+        Отчёт (как у benchmarks.load_test) + отставание от расписания
+    """
+    harness = Harness(concurrency)
+    pending = set()
+    schedule_lag: List[float] = []
+    first_ts = last_ts = None
+
+    async with harness:
+        started = time.perf_counter()
+
+        for ts, data in read_records(files, limit):
+            if first_ts is None:
+                first_ts = ts
+            last_ts = ts
+
+            if speed:
+                due = started + (ts - first_ts) / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                schedule_lag.append(max(time.perf_counter() - due, 0.0))
+
+            task = asyncio.create_task(harness.send(data))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+            # При --speed max не держать в памяти миллионы ждущих апдейтов
+            while len(pending) >= MAX_PENDING:
+                await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+        if pending:
+            await asyncio.gather(*pending)
+
+    recorded_span = (last_ts - first_ts) if first_ts is not None else 0.0
+    report = harness.report({
+        'files': [str(path) for path in files],
+        'speed': speed or 'max',
+        'concurrency': concurrency,
+        'limit': limit,
+    })
+    report['recorded_span_s'] = round(recorded_span, 2)
+    report['effective_speed'] = round(recorded_span / harness.elapsed, 2) if harness.elapsed else 0
+    report['schedule_lag'] = timing_stats(schedule_lag)
+    return report
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Воспроизвести записанные апдейты BookHive")
+    parser.add_argument('paths', nargs='+', help="файлы updates-*.jsonl.gz или каталоги с ними")
+    parser.add_argument('--speed', type=parse_speed, default=1.0,
+                        help="ускорение: 1, 10, ... или max (по умолчанию 1)")
+    parser.add_argument('--concurrency', type=int, default=max(CONCURRENT_UPDATES, 1),
+                        help="апдейтов одновременно (по умолчанию CONCURRENT_UPDATES)")
+    parser.add_argument('--limit', type=int, default=0, help="не больше N апдейтов")
+    parser.add_argument('--log-level', default='WARNING',
+                        help="уровень логов бота (INFO - как в продакшене)")
+    parser.add_argument('--output', type=Path, default=None, help="сохранить отчёт в JSON")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    logging.getLogger().setLevel(args.log_level)
+
+    files = record_files(args.paths)
+    if not files:
+        print(f"❌ Нет файлов записи в {', '.join(args.paths)}")
+        return 2
+
+    print("⏯️  BookHive replay")
+    print("=" * 60)
+    speed = f"{args.speed:g}x" if args.speed else 'max'
+    print(f"Files: {len(files)}, speed: {speed}, concurrency {args.concurrency}\n")
+
+    report = asyncio.run(replay(files, args.speed, args.concurrency, args.limit))
+
+    print(f"🎞️  Recorded:   {report['recorded_span_s']} s of traffic, "
+          f"replayed at {report['effective_speed']}x")
+    lag = report['schedule_lag']
+    if lag:
+        print(f"⏳ Behind schedule: p95 {lag['p95_ms']:.2f} ms, max {lag['max_ms']:.2f} ms")
+    print_report(report)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+        print(f"\n💾 Report: {args.output}")
+
+    return 1 if report['budget_violations'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -15,7 +15,7 @@ import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
-from database import crud
+from database import async_crud
 from config.settings import ADMIN_IDS
 from bot.handlers import notifications
 
@@ -61,7 +61,7 @@ async def show_admin_panel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info(f"Admin {user_id} opened admin panel")
 
     # Получаем статистику
-    stats = crud.get_database_stats()
+    stats = await async_crud.get_database_stats()
 
     text = (
         "👑 <b>Админ-панель</b>\n\n"
@@ -124,7 +124,7 @@ async def show_all_bookings(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     try:
         # Получаем активные брони
-        bookings = crud.get_all_bookings(status='active')
+        bookings = await async_crud.get_all_bookings(status='active')
 
         if not bookings:
             text = (
@@ -190,11 +190,12 @@ async def show_all_books(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info(f"Admin {user_id} viewing all books")
 
     try:
-        books = crud.get_all_books(available_only=False, limit=15)
+        books = await async_crud.get_all_books(available_only=False, limit=15)
+        total_books = await async_crud.get_books_count()
 
         text = (
             f"👑 <b>Все книги</b>\n\n"
-            f"Всего в базе: <b>{crud.get_books_count()}</b>\n\n"
+            f"Всего в базе: <b>{total_books}</b>\n\n"
         )
 
         for i, book in enumerate(books, 1):
@@ -206,8 +207,8 @@ async def show_all_books(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 f"   📁 {book.category.name}\n\n"
             )
 
-        if crud.get_books_count() > 15:
-            text += f"<i>... и ещё {crud.get_books_count() - 15} книг</i>\n"
+        if total_books > 15:
+            text += f"<i>... и ещё {total_books - 15} книг</i>\n"
 
         keyboard = [
             [InlineKeyboardButton("🔙 Админ-панель", callback_data="admin_panel")],
@@ -240,8 +241,8 @@ async def show_all_users(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info(f"Admin {user_id} viewing all users")
 
     try:
-        users = crud.get_all_users_with_notifications()  # Получим всех с уведомлениями
-        total_users = crud.get_users_count()
+        users = await async_crud.get_all_users_with_notifications()  # Получим всех с уведомлениями
+        total_users = await async_crud.get_users_count()
 
         text = (
             f"👑 <b>Все пользователи</b>\n\n"
@@ -250,21 +251,17 @@ async def show_all_users(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
         # Показываем последних 10
-        from database.connection import SessionLocal
-        with SessionLocal() as session:
-            recent_users = session.query(crud.User).order_by(
-                crud.User.created_at.desc()
-            ).limit(10).all()
-
-            for i, user in enumerate(recent_users, 1):
-                notif = "🔔" if user.notifications_enabled else "🔕"
-                genres = ", ".join(user.favorite_genres) if user.favorite_genres else "не указаны"
-                text += (
-                    f"{i}. {notif} <b>{user.name}</b>\n"
-                    f"   ID: <code>{user.telegram_id}</code>\n"
-                    f"   Жанры: <i>{genres}</i>\n"
-                    f"   С нами: {user.created_at.strftime('%d.%m.%Y')}\n\n"
-                )
+        recent_users = await async_crud.get_recent_users(limit=10)
+
+        for i, user in enumerate(recent_users, 1):
+            notif = "🔔" if user.notifications_enabled else "🔕"
+            genres = ", ".join(user.favorite_genres) if user.favorite_genres else "не указаны"
+            text += (
+                f"{i}. {notif} <b>{user.name}</b>\n"
+                f"   ID: <code>{user.telegram_id}</code>\n"
+                f"   Жанры: <i>{genres}</i>\n"
+                f"   С нами: {user.created_at.strftime('%d.%m.%Y')}\n\n"
+            )
 
         if total_users > 10:
             text += f"<i>... и ещё {total_users - 10} пользователей</i>\n"
@@ -300,34 +297,31 @@ async def show_detailed_stats(update: Update, context: ContextTypes.DEFAULT_TYPE
     logger.info(f"Admin {user_id} viewing detailed stats")
 
     try:
-        stats = crud.get_database_stats()
+        stats = await async_crud.get_database_stats()
 
-        # Получаем статистику по категориям
-        from database.connection import SessionLocal
-        with SessionLocal() as session:
-            categories = session.query(crud.Category).all()
+        # Категории с количеством книг - одним запросом
+        categories = await async_crud.get_categories_with_counts()
 
-            text = (
-                "👑 <b>Детальная статистика</b>\n\n"
-                "📊 <b>Общие данные:</b>\n"
-                f"👥 Пользователей: {stats['users_total']}\n"
-                f"📁 Категорий: {stats['categories_total']}\n"
-                f"📚 Книг: {stats['books_total']}\n"
-                f"📋 Броней: {stats['bookings_total']}\n\n"
-                "📁 <b>Книг по категориям:</b>\n"
-            )
+        text = (
+            "👑 <b>Детальная статистика</b>\n\n"
+            "📊 <b>Общие данные:</b>\n"
+            f"👥 Пользователей: {stats['users_total']}\n"
+            f"📁 Категорий: {stats['categories_total']}\n"
+            f"📚 Книг: {stats['books_total']}\n"
+            f"📋 Броней: {stats['bookings_total']}\n\n"
+            "📁 <b>Книг по категориям:</b>\n"
+        )
 
-            for cat in categories:
-                count = crud.get_books_count_by_category(cat.id, available_only=False)
-                text += f"  {cat.emoji} {cat.name}: <b>{count}</b>\n"
+        for cat, count in categories:
+            text += f"  {cat.emoji} {cat.name}: <b>{count}</b>\n"
 
-            text += (
-                f"\n"
-                f"📋 <b>Брони:</b>\n"
-                f"  ✅ Активных: {stats['bookings_active']}\n"
-                f"  ✔️ Завершённых: {stats['bookings_completed']}\n"
-                f"  ❌ Отменённых: {stats['bookings_cancelled']}\n"
-            )
+        text += (
+            f"\n"
+            f"📋 <b>Брони:</b>\n"
+            f"  ✅ Активных: {stats['bookings_active']}\n"
+            f"  ✔️ Завершённых: {stats['bookings_completed']}\n"
+            f"  ❌ Отменённых: {stats['bookings_cancelled']}\n"
+        )
 
         keyboard = [
             [InlineKeyboardButton("🔙 Админ-панель", callback_data="admin_panel")],
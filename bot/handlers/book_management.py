@@ -6,16 +6,26 @@
 - Добавление книг
 - Редактирование книг
 - Удаление книг
+- Импорт каталога из файла (CSV / JSON)
+- Массовое изменение цен и наличия
 - Добавление фото
 - Управление доступностью
 """
 
+import html
+import io
 import logging
+import re
+from typing import List, Optional
+from sqlalchemy.exc import SQLAlchemyError
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 
-from database import crud
+from database import async_crud
+from database.unit_of_work import without_unit_of_work
 from config.settings import ADMIN_IDS
+from bot.utils import catalog_files
+from bot.utils.progress import StatusMessage
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +39,8 @@ def is_admin(user_id: int) -> bool:
 (BOOK_TITLE, BOOK_AUTHOR, BOOK_PRICE, BOOK_CATEGORY,
  BOOK_DESCRIPTION, BOOK_GENRES, BOOK_CONFIRM,
  BOOK_ID_FOR_PHOTO, BOOK_PHOTO,
- BOOK_ID_FOR_DELETE) = range(10)
+ BOOK_ID_FOR_DELETE, BOOK_IMPORT_FILE,
+ BOOK_ID_FOR_TOGGLE, BOOK_BULK_UPDATE) = range(13)
 
 
 # ============================================
@@ -63,7 +74,7 @@ async def show_book_management_menu(update: Update, context: ContextTypes.DEFAUL
     logger.info(f"Admin {user_id} opened book management menu")
 
     # Получаем статистику
-    stats = crud.get_database_stats()
+    stats = await async_crud.get_database_stats()
 
     text = (
         "📚 <b>Управление книгами</b>\n\n"
@@ -86,9 +97,15 @@ async def show_book_management_menu(update: Update, context: ContextTypes.DEFAUL
         [
             InlineKeyboardButton("🔄 Вкл/Выкл доступность", callback_data="bookmgmt_toggle"),
         ],
+        [
+            InlineKeyboardButton("💰 Цены и наличие (списком)", callback_data="bookmgmt_bulk_update"),
+        ],
         [
             InlineKeyboardButton("🗑️ Удалить книгу", callback_data="bookmgmt_delete"),
         ],
+        [
+            InlineKeyboardButton("📥 Импорт из файла", callback_data="bookmgmt_import"),
+        ],
         [
             InlineKeyboardButton("📋 Список всех книг", callback_data="bookmgmt_list"),
         ],
@@ -229,7 +246,7 @@ async def add_book_price(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     context.user_data['book_price'] = price
 
-    categories = crud.get_all_categories()
+    categories = await async_crud.get_all_categories()
 
     if not categories:
         await update.message.reply_text("❌ Ошибка: нет категорий в БД")
@@ -440,7 +457,7 @@ async def add_book_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
     genres = context.user_data.get('book_genres', [])
 
     try:
-        book = crud.create_book(
+        book = await async_crud.create_book(
             title=title,
             author=author,
             price=price,
@@ -505,7 +522,7 @@ async def add_photo_to_book_start(update: Update, context: ContextTypes.DEFAULT_
         book_id = int(query.data.split('_')[2])
         context.user_data['photo_book_id'] = book_id
 
-        book = crud.get_book_by_id(book_id)
+        book = await async_crud.get_book_by_id(book_id)
         if not book:
             await query.edit_message_text("❌ Книга не найдена")
             return ConversationHandler.END
@@ -527,11 +544,14 @@ async def add_photo_to_book_start(update: Update, context: ContextTypes.DEFAULT_
 
         return BOOK_PHOTO
 
-    # Если вызвано из меню - просим ID
+    # Если вызвано из меню - просим ID или сразу фото с ID в подписи
     text = (
         "📸 <b>Добавление фото к книге</b>\n\n"
         "Введите ID книги:\n\n"
-        "<i>ID можно посмотреть: 📋 Список всех книг</i>"
+        "<i>ID можно посмотреть: 📋 Список всех книг</i>\n\n"
+        "📚 <b>Много обложек сразу</b>: отправьте фото или альбом "
+        "(до 10 фото) с ID или ISBN книги в подписи к каждому фото. "
+        "Можно одной подписью на весь альбом: ID / ISBN по порядку фото."
     )
 
     keyboard = [[
@@ -552,7 +572,7 @@ async def add_photo_get_book_id(update: Update, context: ContextTypes.DEFAULT_TY
         await update.message.reply_text("❌ Введите число (ID книги)")
         return BOOK_ID_FOR_PHOTO
 
-    book = crud.get_book_by_id(book_id)
+    book = await async_crud.get_book_by_id(book_id)
 
     if not book:
         await update.message.reply_text("❌ Книга не найдена. Попробуйте другой ID.")
@@ -586,7 +606,7 @@ async def add_photo_receive(update: Update, context: ContextTypes.DEFAULT_TYPE):
     photo = update.message.photo[-1]
     file_id = photo.file_id
 
-    book = crud.update_book_photo(book_id, file_id)
+    book = await async_crud.update_book_photo(book_id, file_id)
 
     if not book:
         await update.message.reply_text("❌ Ошибка при сохранении фото")
@@ -619,6 +639,171 @@ async def add_photo_receive(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return ConversationHandler.END
 
 
+# Фото альбома (media group) приходят отдельными апдейтами с общим
+# media_group_id: ждём столько секунд после последнего фото альбома
+MEDIA_GROUP_WAIT = 1.5
+
+
+def parse_cover_keys(caption: Optional[str]) -> list:
+    """
+    ID и ISBN книг из подписи к фото: "12", "9785171183661", "12 15 978-5-17-118366-1"
+
+    ID - число короче 10 цифр, остальное считается ISBN.
+
+    Raises:
+        ValueError: Если в подписи не ID и не ISBN
+    """
+    keys = []
+    for part in re.split(r'[\s,;]+', (caption or '').strip()):
+        part = part.lstrip('#№')
+        if not part:
+            continue
+        if part.isdigit() and len(part) < 10:
+            keys.append(int(part))
+        else:
+            keys.append(catalog_files.normalize_isbn(part))
+    return keys
+
+
+def match_album_covers(photos: list) -> tuple:
+    """
+    Сопоставить фото альбома книгам
+
+    - у каждого фото своя подпись с ID или ISBN книги
+    - или одна подпись на весь альбом: ID / ISBN по порядку фото
+
+    Args:
+        photos: (message_id, file_id, подпись) каждого фото
+
+    Returns:
+        (обложки [(ID или ISBN, file_id)], ошибки [текст])
+    """
+    photos = sorted(photos)
+    captioned = [photo for photo in photos if photo[2]]
+
+    if len(photos) > 1 and len(captioned) == 1:
+        try:
+            keys = parse_cover_keys(captioned[0][2])
+        except ValueError as e:
+            return [], [f"подпись: {e}"]
+        if len(keys) == len(photos):
+            return list(zip(keys, (file_id for _, file_id, _ in photos))), []
+        if len(keys) > 1:
+            return [], [f"в подписи {len(keys)} ID / ISBN, а фото {len(photos)}"]
+
+    covers, errors = [], []
+    for number, (_, file_id, caption) in enumerate(photos, start=1):
+        try:
+            keys = parse_cover_keys(caption)
+        except ValueError as e:
+            errors.append(f"фото {number}: {e}")
+            continue
+
+        if len(keys) != 1:
+            errors.append(
+                f"фото {number}: нет ID / ISBN в подписи" if not keys
+                else f"фото {number}: в подписи больше одного ID / ISBN"
+            )
+            continue
+
+        covers.append((keys[0], file_id))
+
+    return covers, errors
+
+
+async def add_photos_album_receive(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Фото с ID / ISBN книги в подписи (или альбом таких фото)
+
+    Каждое фото альбома откладывает его обработку ещё на MEDIA_GROUP_WAIT
+    секунд (задача JobQueue с именем по media_group_id). Когда альбом
+    собран, save_album_covers записывает все обложки одним запросом.
+    """
+    message = update.message
+    group_id = message.media_group_id or f"photo_{message.message_id}"
+    name = f"covers_{message.chat_id}_{group_id}"
+
+    photos = []
+    for job in context.job_queue.get_jobs_by_name(name):
+        photos = job.data
+        job.schedule_removal()
+
+    photos.append((message.message_id, message.photo[-1].file_id, message.caption))
+
+    context.job_queue.run_once(
+        save_album_covers,
+        when=MEDIA_GROUP_WAIT if message.media_group_id else 0,
+        data=photos,
+        name=name,
+        chat_id=message.chat_id,
+        user_id=update.effective_user.id
+    )
+
+    return BOOK_ID_FOR_PHOTO
+
+
+@without_unit_of_work
+async def save_album_covers(context: ContextTypes.DEFAULT_TYPE):
+    """
+    Записать обложки собранного альбома и прислать итог
+
+    Задача запланирована из апдейта и унаследовала бы его единицу работы,
+    завершённую к моменту запуска - поэтому выполняется вне неё,
+    в своей транзакции.
+    """
+    job = context.job
+    covers, errors = match_album_covers(job.data)
+
+    updated, not_found, duplicates = {}, [], []
+    if covers:
+        result = await async_crud.update_books_photos(covers)
+        updated, not_found, duplicates = result.updated, result.not_found, result.duplicates
+
+    text = f"📸 <b>Обложки</b> (фото: {len(job.data)})\n\n✅ Обновлено книг: <b>{len(updated)}</b>"
+
+    lines = [
+        f"• {html.escape(str(key))} → {html.escape(title)}"
+        for key, (_, title) in list(updated.items())[:IMPORT_ERRORS_SHOWN]
+    ]
+    if len(updated) > IMPORT_ERRORS_SHOWN:
+        lines.append(f"… и ещё {len(updated) - IMPORT_ERRORS_SHOWN}")
+    if lines:
+        text += "\n" + '\n'.join(lines)
+
+    if not_found:
+        text += f"\n\n❓ Не найдены: {html.escape(', '.join(map(str, not_found)))}"
+    if duplicates:
+        text += (
+            f"\n\n⚠️ Та же книга указана дважды, пропущено: "
+            f"{html.escape(', '.join(map(str, duplicates)))}"
+        )
+    if errors:
+        text += "\n\n⚠️ Без обложки:\n" + '\n'.join(
+            f"• {html.escape(error)}" for error in errors[:IMPORT_ERRORS_SHOWN]
+        )
+
+    text += "\n\nОтправьте ещё фото или нажмите «Готово»."
+
+    keyboard = [[
+        InlineKeyboardButton("✅ Готово", callback_data="bookmgmt_photos_done")
+    ]]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+
+    await context.bot.send_message(job.chat_id, text, parse_mode='HTML', reply_markup=reply_markup)
+
+    logger.info(
+        f"Admin {job.user_id} covers from album: {len(updated)} updated, "
+        f"{len(not_found)} not found, {len(errors)} errors"
+    )
+
+
+async def add_photos_done(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Закончить загрузку обложек - вернуться в меню"""
+    context.user_data.clear()
+    await show_book_management_menu(update, context)
+    return ConversationHandler.END
+
+
 # ============================================
 # СПИСОК КНИГ
 # ============================================
@@ -633,12 +818,12 @@ async def list_all_books(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.edit_message_text("❌ Нет прав")
         return
 
-    books = crud.get_all_books(available_only=False, limit=20)
+    books = await async_crud.get_all_books(available_only=False, limit=20)
 
     if not books:
         text = "📚 Книг пока нет в базе"
     else:
-        text = f"📚 <b>Все книги</b> (показано {len(books)} из {crud.get_books_count()})\n\n"
+        text = f"📚 <b>Все книги</b> (показано {len(books)} из {await async_crud.get_books_count()})\n\n"
 
         for book in books:
             status = "✅" if book.is_available else "❌"
@@ -661,32 +846,37 @@ async def list_all_books(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # ПЕРЕКЛЮЧЕНИЕ ДОСТУПНОСТИ
 # ============================================
 
-async def toggle_book_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Начать переключение доступности"""
-    query = update.callback_query
-    await query.answer()
+# ============================================
+# УДАЛЕНИЕ КНИГИ
+# ============================================
 
-    user_id = query.from_user.id
-    if not is_admin(user_id):
-        await query.edit_message_text("❌ Нет прав")
-        return
+# Максимум книг за одно массовое удаление
+MAX_BOOKS_PER_DELETE = 1000
 
-    text = (
-        "🔄 <b>Вкл/Выкл доступность книги</b>\n\n"
-        "Введите ID книги:"
-    )
 
-    keyboard = [[
-        InlineKeyboardButton("❌ Отмена", callback_data="bookmgmt_cancel")
-    ]]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+def parse_book_ids(text: str) -> List[int]:
+    """
+    ID книг из сообщения: "12", "12 15 40", "12, 15, 40-45"
 
-    await query.edit_message_text(text, parse_mode='HTML', reply_markup=reply_markup)
+    Raises:
+        ValueError: Если в тексте не числа / диапазоны или ID вне 1..MAX_BOOK_ID
+    """
+    book_ids = []
+    for part in re.split(r'[\s,;]+', text.strip()):
+        if not part:
+            continue
+        if '-' in part:
+            start, end = (catalog_files.parse_book_id(value) for value in part.split('-', 1))
+            if end < start or end - start >= MAX_BOOKS_PER_DELETE:
+                raise ValueError(f"Bad range: {part}")
+            book_ids.extend(range(start, end + 1))
+        else:
+            book_ids.append(catalog_files.parse_book_id(part))
 
+    if not book_ids:
+        raise ValueError("No IDs")
+    return list(dict.fromkeys(book_ids))
 
-# ============================================
-# УДАЛЕНИЕ КНИГИ
-# ============================================
 
 async def delete_book_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Начать удаление книги"""
@@ -700,7 +890,9 @@ async def delete_book_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     text = (
         "🗑️ <b>Удаление книги</b>\n\n"
-        "Введите ID книги для удаления:\n\n"
+        "Введите ID книги для удаления.\n"
+        "Несколько книг - через пробел или запятую, диапазон - через дефис:\n"
+        "<code>12, 15, 40-45</code>\n\n"
         "⚠️ <b>Внимание!</b> Действие нельзя отменить!"
     )
 
@@ -715,28 +907,48 @@ async def delete_book_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def delete_book_get_id(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Получить ID книги для удаления"""
+    """Получить ID книги (или нескольких книг) для удаления"""
     try:
-        book_id = int(update.message.text.strip())
+        book_ids = parse_book_ids(update.message.text)
     except ValueError:
-        await update.message.reply_text("❌ Введите число (ID книги)")
+        await update.message.reply_text("❌ Введите число (ID книги) или список ID")
         return BOOK_ID_FOR_DELETE
 
-    book = crud.get_book_by_id(book_id)
-
-    if not book:
-        await update.message.reply_text("❌ Книга не найдена")
+    if len(book_ids) > MAX_BOOKS_PER_DELETE:
+        await update.message.reply_text(
+            f"❌ Не больше {MAX_BOOKS_PER_DELETE} книг за раз"
+        )
         return BOOK_ID_FOR_DELETE
 
-    context.user_data['delete_book_id'] = book_id
+    if len(book_ids) == 1:
+        book_id = book_ids[0]
+        book = await async_crud.get_book_by_id(book_id)
 
-    text = (
-        f"⚠️ <b>Подтверждение удаления</b>\n\n"
-        f"📚 <b>{book.title}</b>\n"
-        f"✍️ {book.author}\n"
-        f"🆔 ID: {book_id}\n\n"
-        f"Вы уверены? Это действие нельзя отменить!"
-    )
+        if not book:
+            await update.message.reply_text("❌ Книга не найдена")
+            return BOOK_ID_FOR_DELETE
+
+        text = (
+            f"⚠️ <b>Подтверждение удаления</b>\n\n"
+            f"📚 <b>{book.title}</b>\n"
+            f"✍️ {book.author}\n"
+            f"🆔 ID: {book_id}\n\n"
+            f"Вы уверены? Это действие нельзя отменить!"
+        )
+    else:
+        shown = ', '.join(map(str, book_ids[:20]))
+        if len(book_ids) > 20:
+            shown += ', …'
+
+        text = (
+            f"⚠️ <b>Подтверждение удаления</b>\n\n"
+            f"📚 Книг: <b>{len(book_ids)}</b>\n"
+            f"🆔 ID: {shown}\n\n"
+            f"Книги с активными бронями удалены не будут.\n"
+            f"Вы уверены? Это действие нельзя отменить!"
+        )
+
+    context.user_data['delete_book_ids'] = book_ids
 
     keyboard = [
         [
@@ -759,25 +971,309 @@ async def delete_book_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE
     if query.data == "bookmgmt_cancel":
         return await cancel_book_operation(update, context)
 
-    book_id = context.user_data.get('delete_book_id')
+    book_ids = context.user_data.get('delete_book_ids')
 
-    if not book_id:
+    if not book_ids:
         await query.edit_message_text("❌ Ошибка: ID не найден")
         return ConversationHandler.END
 
-    book = crud.get_book_by_id(book_id)
-    if book:
-        book_title = book.title
+    # Один запрос DELETE ... RETURNING на все книги
+    result = await async_crud.delete_books(book_ids)
+
+    if len(book_ids) == 1:
+        if result.deleted:
+            text = f"✅ Книга <b>{result.deleted[book_ids[0]]}</b> удалена"
+        elif result.has_active_bookings:
+            text = "❌ Нельзя удалить: на книгу есть активные брони"
+        else:
+            text = "❌ Книга не найдена"
     else:
-        book_title = "Неизвестная"
+        text = f"🗑️ <b>Удалено книг: {len(result.deleted)}</b> из {len(book_ids)}"
+        if result.has_active_bookings:
+            text += (
+                f"\n\n📋 С активными бронями (не удалены): "
+                f"{len(result.has_active_bookings)}\n"
+                f"{', '.join(map(str, sorted(result.has_active_bookings)[:50]))}"
+            )
+        if result.not_found:
+            text += f"\n\n❓ Не найдены: {len(result.not_found)}"
 
-    success = crud.delete_book(book_id)
+    logger.info(f"Deleted {len(result.deleted)} of {len(book_ids)} books")
 
-    if success:
-        text = f"✅ Книга <b>{book_title}</b> удалена"
-        logger.info(f"Book {book_id} deleted")
-    else:
-        text = "❌ Ошибка при удалении книги"
+    keyboard = [
+        [InlineKeyboardButton("📚 Управление книгами", callback_data="bookmgmt_menu")],
+        [InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")]
+    ]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+
+    await query.edit_message_text(text, parse_mode='HTML', reply_markup=reply_markup)
+
+    context.user_data.clear()
+    return ConversationHandler.END
+
+
+# ============================================
+# ИМПОРТ КАТАЛОГА ИЗ ФАЙЛА
+# ============================================
+
+# Книг в одном INSERT ... ON CONFLICT (crud.upsert_books)
+IMPORT_BATCH_SIZE = 1000
+
+# Сколько ошибок показать в итоговом сообщении
+IMPORT_ERRORS_SHOWN = 15
+
+
+async def import_catalog_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Начать импорт каталога: попросить файл"""
+    query = update.callback_query
+    await query.answer()
+
+    if not is_admin(query.from_user.id):
+        await query.edit_message_text("❌ Нет прав")
+        return ConversationHandler.END
+
+    text = (
+        "📥 <b>Импорт каталога</b>\n\n"
+        "Отправьте файл <b>CSV</b>, <b>JSON</b> или <b>JSON Lines</b> (до 20 МБ).\n\n"
+        "Колонки (первая строка CSV):\n"
+        "• <code>title</code> / <code>название</code> - обязательно\n"
+        "• <code>author</code> / <code>автор</code> - обязательно\n"
+        "• <code>price</code> / <code>цена</code> - обязательно\n"
+        "• <code>category</code> / <code>категория</code> - название или ID\n"
+        "• <code>isbn</code> - книга с тем же ISBN будет обновлена\n"
+        "• <code>description</code>, <code>genres</code>, "
+        "<code>is_new</code>, <code>is_available</code>\n\n"
+        "Пример CSV:\n"
+        "<code>title;author;price;category;isbn\n"
+        "Дюна;Фрэнк Герберт;899;Фантастика;9785171183661</code>"
+    )
+
+    keyboard = [[
+        InlineKeyboardButton("❌ Отмена", callback_data="bookmgmt_cancel")
+    ]]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+
+    await query.edit_message_text(text, parse_mode='HTML', reply_markup=reply_markup)
+
+    return BOOK_IMPORT_FILE
+
+
+async def download_document(update: Update) -> Optional[io.BytesIO]:
+    """
+    Скачать присланный документ в память
+
+    Returns:
+        BytesIO с содержимым или None (файл слишком большой -
+        пользователю уже отправлено сообщение)
+    """
+    document = update.message.document
+
+    if document.file_size and document.file_size > catalog_files.MAX_FILE_SIZE:
+        await update.message.reply_text("❌ Файл больше 20 МБ - разбейте его на части")
+        return None
+
+    telegram_file = await document.get_file()
+    buffer = io.BytesIO()
+    await telegram_file.download_to_memory(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def format_row_errors(errors: List[catalog_files.RowError], total: int) -> str:
+    """Список ошибок строк для итогового сообщения"""
+    lines = [
+        f"• строка {error.line}: {html.escape(error.message)}"
+        for error in errors[:IMPORT_ERRORS_SHOWN]
+    ]
+    if total > IMPORT_ERRORS_SHOWN:
+        lines.append(f"… и ещё {total - IMPORT_ERRORS_SHOWN}")
+    return '\n'.join(lines)
+
+
+@without_unit_of_work
+async def upsert_import_batch(rows: List[dict]):
+    """
+    Записать пачку импорта в своей транзакции
+
+    Не в единице работы апдейта: та фиксируется только в конце,
+    а счётчики в сообщении о ходе импорта должны показывать
+    уже сохранённые книги.
+    """
+    return await async_crud.upsert_books(rows)
+
+
+async def import_catalog_file(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Импортировать присланный файл
+
+    Файл читается потоком, строки проверяются и пачками по
+    IMPORT_BATCH_SIZE отправляются в crud.upsert_books -
+    каждая пачка фиксируется сразу (upsert_import_batch).
+    Ход импорта - в одном редактируемом сообщении.
+    """
+    document = update.message.document
+    filename = document.file_name or ''
+
+    if not filename.lower().endswith(catalog_files.SUPPORTED_EXTENSIONS):
+        await update.message.reply_text(
+            f"❌ Нужен файл {', '.join(catalog_files.SUPPORTED_EXTENSIONS)}"
+        )
+        return BOOK_IMPORT_FILE
+
+    buffer = await download_document(update)
+    if buffer is None:
+        return BOOK_IMPORT_FILE
+
+    status = await StatusMessage.send(
+        update.message, f"⏳ Импорт <b>{html.escape(filename)}</b>..."
+    )
+    logger.info(f"Admin {update.effective_user.id} started catalog import: {filename}")
+
+    categories = catalog_files.build_category_lookup(await async_crud.get_all_categories())
+    created = updated = 0
+    errors: List[catalog_files.RowError] = []
+    error_count = 0
+    processed = 0
+    batch = []
+
+    async def flush():
+        nonlocal created, updated
+        result = await upsert_import_batch(batch)
+        created += result.created
+        updated += result.updated
+        batch.clear()
+
+        await status.update(
+            f"⏳ Импорт <b>{html.escape(filename)}</b>\n\n"
+            f"📄 Обработано строк: {processed}\n"
+            f"➕ Добавлено: {created}\n"
+            f"✏️ Обновлено: {updated}\n"
+            f"⚠️ Ошибок: {error_count}"
+        )
+
+    try:
+        for line, record in catalog_files.read_records(buffer, filename):
+            processed += 1
+            try:
+                batch.append(catalog_files.validate_book_row(record, categories))
+            except ValueError as e:
+                error_count += 1
+                if len(errors) < IMPORT_ERRORS_SHOWN:
+                    errors.append(catalog_files.RowError(line, str(e)))
+                continue
+
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await flush()
+
+        if batch:
+            await flush()
+
+    except catalog_files.CatalogFileError as e:
+        await status.update(
+            f"❌ Файл не прочитан: {html.escape(str(e))}\n\n"
+            f"Добавлено до ошибки: {created}, обновлено: {updated}",
+            force=True
+        )
+        return BOOK_IMPORT_FILE
+
+    except SQLAlchemyError as e:
+        # Ошибка записи пачки: предыдущие пачки уже зафиксированы
+        logger.error(f"Catalog import {filename} failed after {processed} rows: {e}")
+        await status.fail(
+            f"❌ Ошибка записи в БД: {html.escape(str(e).splitlines()[0][:300])}\n\n"
+            f"📄 Обработано строк: {processed}\n"
+            f"Сохранено до ошибки - добавлено: {created}, обновлено: {updated}"
+        )
+        context.user_data.clear()
+        return ConversationHandler.END
+
+    text = (
+        f"✅ <b>Импорт завершён</b>: {html.escape(filename)}\n\n"
+        f"📄 Строк: {processed}\n"
+        f"➕ Добавлено: <b>{created}</b>\n"
+        f"✏️ Обновлено: <b>{updated}</b>\n"
+        f"⚠️ Пропущено с ошибками: <b>{error_count}</b>"
+    )
+    if errors:
+        text += "\n\n" + format_row_errors(errors, error_count)
+
+    keyboard = [
+        [InlineKeyboardButton("📚 Управление книгами", callback_data="bookmgmt_menu")],
+        [InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")]
+    ]
+    await status.update(text, force=True, reply_markup=InlineKeyboardMarkup(keyboard))
+
+    logger.info(
+        f"Catalog import {filename}: {processed} rows, {created} created, "
+        f"{updated} updated, {error_count} errors"
+    )
+
+    context.user_data.clear()
+    return ConversationHandler.END
+
+
+async def toggle_book_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Начать переключение доступности"""
+    query = update.callback_query
+    await query.answer()
+
+    user_id = query.from_user.id
+    if not is_admin(user_id):
+        await query.edit_message_text("❌ Нет прав")
+        return ConversationHandler.END
+
+    text = (
+        "🔄 <b>Вкл/Выкл доступность книги</b>\n\n"
+        "Введите ID книги.\n"
+        "Несколько книг - через пробел или запятую, диапазон - через дефис:\n"
+        "<code>12, 15, 40-45</code>"
+    )
+
+    keyboard = [[
+        InlineKeyboardButton("❌ Отмена", callback_data="bookmgmt_cancel")
+    ]]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+
+    await query.edit_message_text(text, parse_mode='HTML', reply_markup=reply_markup)
+
+    return BOOK_ID_FOR_TOGGLE
+
+
+async def toggle_book_receive(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Переключить доступность введённых книг (один UPDATE)"""
+    try:
+        book_ids = parse_book_ids(update.message.text)
+    except ValueError:
+        await update.message.reply_text("❌ Введите число (ID книги) или список ID")
+        return BOOK_ID_FOR_TOGGLE
+
+    if len(book_ids) > MAX_BOOKS_PER_DELETE:
+        await update.message.reply_text(f"❌ Не больше {MAX_BOOKS_PER_DELETE} книг за раз")
+        return BOOK_ID_FOR_TOGGLE
+
+    books = await async_crud.toggle_books_availability(book_ids)
+
+    if not books:
+        await update.message.reply_text("❌ Книги не найдены")
+        return BOOK_ID_FOR_TOGGLE
+
+    lines = [
+        f"{'✅' if book.is_available else '❌'} {book.id}: {html.escape(book.title)}"
+        for book in books[:IMPORT_ERRORS_SHOWN]
+    ]
+    if len(books) > IMPORT_ERRORS_SHOWN:
+        lines.append(f"… и ещё {len(books) - IMPORT_ERRORS_SHOWN}")
+
+    available = sum(1 for book in books if book.is_available)
+    text = (
+        f"🔄 <b>Доступность изменена</b>: {len(books)}\n"
+        f"✅ Доступны: {available} • ❌ Недоступны: {len(books) - available}\n\n"
+        + '\n'.join(lines)
+    )
+
+    missing = len(book_ids) - len(books)
+    if missing:
+        text += f"\n\n❓ Не найдены: {missing}"
 
     keyboard = [
         [InlineKeyboardButton("📚 Управление книгами", callback_data="bookmgmt_menu")],
@@ -785,8 +1281,173 @@ async def delete_book_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
 
+    await update.message.reply_text(text, parse_mode='HTML', reply_markup=reply_markup)
+
+    logger.info(f"Admin {update.effective_user.id} toggled availability of {len(books)} books")
+
+    context.user_data.clear()
+    return ConversationHandler.END
+
+
+# ============================================
+# МАССОВОЕ ИЗМЕНЕНИЕ ЦЕН И НАЛИЧИЯ
+# ============================================
+
+async def bulk_update_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Начать массовое изменение: попросить файл или строки id;price;available"""
+    query = update.callback_query
+    await query.answer()
+
+    if not is_admin(query.from_user.id):
+        await query.edit_message_text("❌ Нет прав")
+        return ConversationHandler.END
+
+    text = (
+        "💰 <b>Цены и наличие</b>\n\n"
+        "Отправьте строки в формате <code>id;цена;наличие</code> "
+        "(пустое поле - не менять):\n"
+        "<code>12;499\n"
+        "15;;нет\n"
+        "40;1290,50;да</code>\n\n"
+        "Или файл CSV / JSON с колонками <code>id</code>, "
+        "<code>price</code>, <code>available</code>.\n\n"
+        "Все изменения применяются в одной транзакции."
+    )
+
+    keyboard = [[
+        InlineKeyboardButton("❌ Отмена", callback_data="bookmgmt_cancel")
+    ]]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+
     await query.edit_message_text(text, parse_mode='HTML', reply_markup=reply_markup)
 
+    return BOOK_BULK_UPDATE
+
+
+async def bulk_update_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Изменения, вставленные текстом"""
+    records = catalog_files.parse_update_lines(update.message.text)
+    return await apply_bulk_update(update, context, records, "сообщение")
+
+
+async def bulk_update_file(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Изменения из файла"""
+    filename = update.message.document.file_name or ''
+
+    if not filename.lower().endswith(catalog_files.SUPPORTED_EXTENSIONS):
+        await update.message.reply_text(
+            f"❌ Нужен файл {', '.join(catalog_files.SUPPORTED_EXTENSIONS)}"
+        )
+        return BOOK_BULK_UPDATE
+
+    buffer = await download_document(update)
+    if buffer is None:
+        return BOOK_BULK_UPDATE
+
+    records = catalog_files.read_records(buffer, filename)
+    return await apply_bulk_update(update, context, records, filename)
+
+
+def format_price_diff(change) -> str:
+    """Строка изменения книги: '#12 Дюна: 899₽ → 999₽, ✅ → ❌'"""
+    parts = []
+    if change.price != change.old_price:
+        parts.append(f"{change.old_price:g}₽ → {change.price:g}₽")
+    if change.is_available != change.old_available:
+        parts.append(f"{'✅' if change.old_available else '❌'} → {'✅' if change.is_available else '❌'}")
+    return f"#{change.id} {html.escape(change.title)}: {', '.join(parts)}"
+
+
+async def apply_bulk_update(update: Update, context: ContextTypes.DEFAULT_TYPE, records, source: str):
+    """
+    Проверить записи и применить одним вызовом crud.bulk_update_books
+
+    Ответ - сводка: что выросло / подешевело, что стало (не)доступно,
+    что не изменилось и каких ID нет.
+    """
+    status = await StatusMessage.send(update.message, "⏳ Проверяю изменения...")
+
+    changes = []
+    errors: List[catalog_files.RowError] = []
+    error_count = 0
+
+    try:
+        for line, record in records:
+            try:
+                changes.append(catalog_files.validate_update_row(record))
+            except ValueError as e:
+                error_count += 1
+                if len(errors) < IMPORT_ERRORS_SHOWN:
+                    errors.append(catalog_files.RowError(line, str(e)))
+    except catalog_files.CatalogFileError as e:
+        await status.update(f"❌ Файл не прочитан: {html.escape(str(e))}", force=True)
+        return BOOK_BULK_UPDATE
+
+    if not changes:
+        text = "❌ Нет ни одной корректной строки"
+        if errors:
+            text += "\n\n" + format_row_errors(errors, error_count)
+        await status.update(text, force=True)
+        return BOOK_BULK_UPDATE
+
+    await status.update(f"⏳ Применяю изменений: {len(changes)}...", force=True)
+
+    try:
+        result = await async_crud.bulk_update_books(changes)
+    except SQLAlchemyError as e:
+        # Один UPDATE: при ошибке не применено ничего
+        logger.error(f"Bulk update ({source}) failed: {e}")
+        await status.fail(
+            f"❌ Ошибка записи в БД, изменения не применены:\n"
+            f"{html.escape(str(e).splitlines()[0][:300])}"
+        )
+        context.user_data.clear()
+        return ConversationHandler.END
+
+    price_up = sum(1 for change in result.changed if change.price > change.old_price)
+    price_down = sum(1 for change in result.changed if change.price < change.old_price)
+    became_available = sum(
+        1 for change in result.changed if change.is_available and not change.old_available
+    )
+    became_unavailable = sum(
+        1 for change in result.changed if change.old_available and not change.is_available
+    )
+
+    text = (
+        f"✅ <b>Изменения применены</b> ({html.escape(source)})\n\n"
+        f"✏️ Изменено книг: <b>{len(result.changed)}</b>\n"
+        f"💰 Цена: ⬆️ {price_up} • ⬇️ {price_down}\n"
+        f"📦 Стали доступны: {became_available} • недоступны: {became_unavailable}\n"
+        f"➖ Без изменений: {len(result.unchanged)}"
+    )
+
+    if result.not_found:
+        shown = ', '.join(map(str, sorted(result.not_found)[:20]))
+        text += f"\n❓ Не найдены: {len(result.not_found)} ({shown})"
+
+    if result.changed:
+        text += "\n\n" + '\n'.join(
+            format_price_diff(change) for change in result.changed[:IMPORT_ERRORS_SHOWN]
+        )
+        if len(result.changed) > IMPORT_ERRORS_SHOWN:
+            text += f"\n… и ещё {len(result.changed) - IMPORT_ERRORS_SHOWN}"
+
+    if errors:
+        text += f"\n\n⚠️ Пропущено строк с ошибками: {error_count}\n"
+        text += format_row_errors(errors, error_count)
+
+    keyboard = [
+        [InlineKeyboardButton("📚 Управление книгами", callback_data="bookmgmt_menu")],
+        [InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")]
+    ]
+    await status.update(text, force=True, reply_markup=InlineKeyboardMarkup(keyboard))
+
+    logger.info(
+        f"Admin {update.effective_user.id} bulk update ({source}): "
+        f"{len(result.changed)} changed, {len(result.unchanged)} unchanged, "
+        f"{len(result.not_found)} not found, {error_count} errors"
+    )
+
     context.user_data.clear()
     return ConversationHandler.END
 
@@ -22,13 +22,22 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 from bot.utils.calendar import create_calendar, parse_calendar_callback
 
-from database import crud
+from database import async_crud
 
 logger = logging.getLogger(__name__)
 
 # Состояния ConversationHandler
 SELECTING_DATE, ENTERING_COMMENT, CONFIRMING = range(3)
 
+# Сообщения об отказе по BookingResult.reason (см. crud.create_booking)
+BOOKING_FAILURE_MESSAGES = {
+    'user_not_found': "❌ Не удалось создать бронь. Нажмите /start и попробуйте снова.",
+    'book_not_found': "❌ Эта книга больше не доступна в каталоге.",
+    'book_unavailable': "❌ К сожалению, эта книга сейчас недоступна для брони.",
+    'already_booked': "ℹ️ У вас уже есть активная бронь этой книги.\n"
+                      "Посмотреть брони: /start → 📋 Мои брони",
+}
+
 
 async def start_booking(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
@@ -48,7 +57,7 @@ async def start_booking(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     try:
         # Получаем книгу
-        book = crud.get_book_by_id(book_id)
+        book = await async_crud.get_book_by_id(book_id)
 
         if not book:
             await query.edit_message_text("❌ Книга не найдена")
@@ -64,7 +73,7 @@ async def start_booking(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return ConversationHandler.END
 
         # Проверяем, нет ли уже активной брони
-        existing_booking = crud.get_active_booking(
+        existing_booking = await async_crud.get_active_booking(
             user_telegram_id=user_id,
             book_id=book_id
         )
@@ -264,15 +273,19 @@ async def create_booking_in_db(
 
     try:
         # Создаём бронь
-        booking = crud.create_booking(
+        result = await async_crud.create_booking(
             user_telegram_id=user_id,
             book_id=book_id,
             pickup_date=pickup_date,
             comment=comment
         )
+        booking = result.booking
 
         if not booking:
-            text = "❌ Не удалось создать бронь. Возможно, книга уже забронирована."
+            text = BOOKING_FAILURE_MESSAGES.get(
+                result.reason,
+                "❌ Не удалось создать бронь. Попробуйте позже."
+            )
 
             keyboard = [[
                 InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")
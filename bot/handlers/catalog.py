@@ -8,16 +8,16 @@
 """
 
 import logging
-import math
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from database import crud
+from database import async_crud
 from bot.keyboards.catalog import (
-    get_books_keyboard,
+    get_category_page_keyboard,
     get_categories_keyboard,
     get_book_detail_keyboard
 )
+from bot.utils.pagination import parse_page_cursor, NEXT, PREV
 from config.settings import BOOKS_PER_PAGE
 
 logger = logging.getLogger(__name__)
@@ -34,7 +34,7 @@ async def show_catalog(update: Update, context: ContextTypes):
     logger.info(f"User {query.from_user.id} opened catalog")
 
     try:
-        categories = crud.get_all_categories()
+        categories = await async_crud.get_all_categories()
 
         if not categories:
             await query.edit_message_text(
@@ -71,7 +71,8 @@ async def show_category_books(update: Update, context: ContextTypes.DEFAULT_TYPE
     """
     Показать книги выбранной категории
 
-    Callback format: category_{id} или category_{id}_page_{page}
+    Callback format: category_{id} или
+    category_{id}_page_{page}_{n|p}_{created_at}_{book_id} (см. bot/utils/pagination.py)
     """
     query = update.callback_query
     await query.answer()
@@ -82,25 +83,32 @@ async def show_category_books(update: Update, context: ContextTypes.DEFAULT_TYPE
 
     category_id = int(parts[1])
 
-    # Определяем страницу
+    # Определяем страницу и курсор
     page = 1
+    direction, cursor = None, None
     if len(parts) >= 4 and parts[2] == 'page':
-        page = int(parts[3])
+        page = max(int(parts[3]), 1)
+        direction, cursor = parse_page_cursor(parts[4:])
 
     logger.info(f"User {query.from_user.id} opened category {category_id}, page {page}")
 
     try:
-        # Получаем категорию
-        category = crud.get_category_by_id(category_id)
+        # Категория, количество книг и страница - одним запросом.
+        # По курсору соседней страницы, а без него (старые кнопки) - по номеру
+        category_page = await async_crud.get_category_page(
+            category_id,
+            page=page,
+            per_page=BOOKS_PER_PAGE,
+            after=cursor if direction == NEXT else None,
+            before=cursor if direction == PREV else None
+        )
+        category = category_page.category
 
         if not category:
             await query.edit_message_text("❌ Категория не найдена")
             return
 
-        # Получаем общее количество книг
-        total_books = crud.get_books_count_by_category(category_id, available_only=True)
-
-        if total_books == 0:
+        if category_page.total == 0:
             text = (
                 f"{category.emoji} <b>{category.name}</b>\n\n"
                 f"В этой категории пока нет книг."
@@ -112,23 +120,24 @@ async def show_category_books(update: Update, context: ContextTypes.DEFAULT_TYPE
             )
             return
 
-        # Вычисляем пагинацию
-        total_pages = math.ceil(total_books / BOOKS_PER_PAGE)
-        offset = (page - 1) * BOOKS_PER_PAGE
+        # Книги сместились (добавили/убрали) и такой страницы больше нет -
+        # начинаем с первой
+        if not category_page.books:
+            category_page = await async_crud.get_category_page(
+                category_id,
+                page=1,
+                per_page=BOOKS_PER_PAGE
+            )
 
-        # Получаем книги для текущей страницы
-        books = crud.get_books_by_category(
-            category_id=category_id,
-            available_only=True,
-            limit=BOOKS_PER_PAGE,
-            offset=offset
-        )
+        # Номер страницы приходит из кнопки: после удаления книг (или со старой
+        # кнопки) он может быть больше числа страниц - «страница 5 из 3»
+        category_page.page = min(category_page.page, category_page.total_pages)
 
         # Формируем текст
         text = (
             f"{category.emoji} <b>{category.name}</b>\n\n"
-            f"📚 Найдено книг: {total_books}\n"
-            f"📄 Страница: {page}/{total_pages}\n\n"
+            f"📚 Найдено книг: {category_page.total}\n"
+            f"📄 Страница: {category_page.page}/{category_page.total_pages}\n\n"
             f"Нажмите на книгу для просмотра деталей 👇"
         )
 
@@ -136,7 +145,7 @@ async def show_category_books(update: Update, context: ContextTypes.DEFAULT_TYPE
         await query.edit_message_text(
             text,
             parse_mode='HTML',
-            reply_markup=get_books_keyboard(books, category_id, page, total_pages)
+            reply_markup=get_category_page_keyboard(category_page)
         )
 
     except Exception as e:
@@ -146,6 +155,82 @@ async def show_category_books(update: Update, context: ContextTypes.DEFAULT_TYPE
         )
 
 
+def format_book_card(book) -> str:
+    """
+    Текст карточки книги
+
+    Args:
+        book: Книга (с загруженной категорией)
+
+    Returns:
+        str: HTML текст карточки
+    """
+    text = (
+        f"📖 <b>{book.title}</b>\n\n"
+        f"✍️ <b>Автор:</b> {book.author}\n"
+        f"📁 <b>Категория:</b> {book.category.emoji} {book.category.name}\n"
+        f"💰 <b>Цена:</b> {book.price}₽\n"
+    )
+
+    # Добавляем жанры если есть
+    if book.genres:
+        genres_str = ", ".join(book.genres)
+        text += f"🎭 <b>Жанры:</b> {genres_str}\n"
+
+    # Добавляем описание если есть
+    if book.description:
+        description = book.description
+        if len(description) > 300:
+            description = description[:297] + "..."
+        text += f"\n📝 <b>Описание:</b>\n{description}\n"
+
+    # Статус доступности
+    if book.is_available:
+        text += "\n✅ <b>Статус:</b> Доступна для бронирования"
+    else:
+        text += "\n❌ <b>Статус:</b> Недоступна"
+
+    # Если новинка
+    if book.is_new:
+        text += "\n🆕 <b>Новинка!</b>"
+
+    return text
+
+
+async def send_book_card(message, book_id: int):
+    """
+    Отправить карточку книги новым сообщением
+
+    Используется для ссылок вида /start book_{id} (inline-режим)
+
+    Args:
+        message: Сообщение, на которое отвечаем
+        book_id: ID книги
+    """
+    book = await async_crud.get_book_by_id(book_id)
+
+    if not book:
+        await message.reply_text("❌ Книга не найдена")
+        return
+
+    text = format_book_card(book)
+    reply_markup = get_book_detail_keyboard(book.id, book.category_id)
+
+    if book.cover_photo_id:
+        await message.reply_photo(
+            photo=book.cover_photo_id,
+            caption=text,
+            parse_mode='HTML',
+            reply_markup=reply_markup
+        )
+    else:
+        await message.reply_text(
+            text,
+            parse_mode='HTML',
+            reply_markup=reply_markup
+        )
+
+
 async def show_book_detail(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Показать детальную карточку книги
@@ -162,41 +247,14 @@ async def show_book_detail(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     try:
         # Получаем книгу с категорией
-        book = crud.get_book_by_id(book_id)
+        book = await async_crud.get_book_by_id(book_id)
 
         if not book:
             await query.edit_message_text("❌ Книга не найдена")
             return
 
         # Формируем карточку книги
-        text = (
-            f"📖 <b>{book.title}</b>\n\n"
-            f"✍️ <b>Автор:</b> {book.author}\n"
-            f"📁 <b>Категория:</b> {book.category.emoji} {book.category.name}\n"
-            f"💰 <b>Цена:</b> {book.price}₽\n"
-        )
-
-        # Добавляем жанры если есть
-        if book.genres:
-            genres_str = ", ".join(book.genres)
-            text += f"🎭 <b>Жанры:</b> {genres_str}\n"
-
-        # Добавляем описание если есть
-        if book.description:
-            description = book.description
-            if len(description) > 300:
-                description = description[:297] + "..."
-            text += f"\n📝 <b>Описание:</b>\n{description}\n"
-
-        # Статус доступности
-        if book.is_available:
-            text += "\n✅ <b>Статус:</b> Доступна для бронирования"
-        else:
-            text += "\n❌ <b>Статус:</b> Недоступна"
-
-        # Если новинка
-        if book.is_new:
-            text += "\n🆕 <b>Новинка!</b>"
+        text = format_book_card(book)
 
         # Клавиатура
         reply_markup = get_book_detail_keyboard(book.id, book.category_id)
@@ -51,9 +51,9 @@ async def cancel_operation(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if command == '/start':
             # Пользователь нажал /start - показываем главное меню
             from bot.keyboards.main_menu import get_main_menu_keyboard
-            from database import crud
+            from database import async_crud
 
-            user = crud.get_user_by_telegram_id(user_id)
+            user = await async_crud.get_user_by_telegram_id(user_id)
             if user:
                 text = (
                     f"👋 С возвращением, {user.name}!\n\n"
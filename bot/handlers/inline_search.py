@@ -0,0 +1,95 @@
+# bot/handlers/inline_search.py
+"""
+Inline-режим: поиск книг прямо из поля ввода (@bot запрос)
+
+- Ответ из поискового индекса в памяти (database/search_index.py),
+  без запросов к БД - inline запросы приходят на каждое нажатие клавиши
+- Постраничная выдача через next_offset
+- Каждый результат ведёт в бота на карточку книги (/start book_{id})
+
+Inline-режим нужно включить у @BotFather (/setinline).
+"""
+
+import html
+import logging
+from telegram import (
+    Update,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InlineQueryResultArticle,
+    InputTextMessageContent
+)
+from telegram.ext import ContextTypes
+
+from database import search_index
+from config.settings import INLINE_CACHE_TIME
+
+logger = logging.getLogger(__name__)
+
+# Результатов в одном ответе (Telegram допускает до 50)
+RESULTS_PER_PAGE = 20
+
+
+def book_deep_link(bot_username: str, book_id: int) -> str:
+    """Ссылка, открывающая карточку книги в боте"""
+    return f"https://t.me/{bot_username}?start=book_{book_id}"
+
+
+async def handle_inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Ответить на inline запрос
+
+    offset - номер первого результата (строка, пустая на первой странице)
+    """
+    inline_query = update.inline_query
+    query_text = inline_query.query.strip()
+
+    try:
+        offset = int(inline_query.offset or 0)
+    except ValueError:
+        offset = 0
+
+    if not query_text or not search_index.is_ready():
+        # Индекс ещё строится - не кешируем пустой ответ
+        await inline_query.answer([], cache_time=0 if query_text else INLINE_CACHE_TIME)
+        return
+
+    # На одну книгу больше - чтобы понять, есть ли следующая страница
+    books = search_index.search(query_text, limit=RESULTS_PER_PAGE + 1, offset=offset)
+    has_more = len(books) > RESULTS_PER_PAGE
+    books = books[:RESULTS_PER_PAGE]
+
+    bot_username = context.bot.username
+
+    results = []
+    for book in books:
+        title = html.escape(book.title)
+        author = html.escape(book.author)
+
+        results.append(
+            InlineQueryResultArticle(
+                id=str(book.id),
+                title=book.title,
+                description=f"✍️ {book.author} • 💰 {book.price}₽",
+                input_message_content=InputTextMessageContent(
+                    f"📖 <b>{title}</b>\n"
+                    f"✍️ {author}\n"
+                    f"💰 {book.price}₽",
+                    parse_mode='HTML'
+                ),
+                reply_markup=InlineKeyboardMarkup([[
+                    InlineKeyboardButton(
+                        "📚 Открыть в BookHive",
+                        url=book_deep_link(bot_username, book.id)
+                    )
+                ]])
+            )
+        )
+
+    await inline_query.answer(
+        results,
+        cache_time=INLINE_CACHE_TIME,
+        next_offset=str(offset + RESULTS_PER_PAGE) if has_more else ''
+    )
+
+    logger.debug(f"Inline query '{query_text}' (offset {offset}): {len(results)} results")
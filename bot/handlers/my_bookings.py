@@ -11,7 +11,7 @@ import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
-from database import crud
+from database import async_crud
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +31,7 @@ async def show_my_bookings(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     try:
         # Получаем активные брони пользователя
-        bookings = crud.get_user_bookings(
+        bookings = await async_crud.get_user_bookings(
             telegram_id=user_id,
             status='active'
         )
@@ -122,7 +122,7 @@ async def show_booking_detail(update: Update, context: ContextTypes.DEFAULT_TYPE
 
     try:
         # Получаем бронь с деталями
-        booking = crud.get_booking_by_id(booking_id)
+        booking = await async_crud.get_booking_by_id(booking_id)
 
         if not booking:
             await query.edit_message_text("❌ Бронь не найдена")
@@ -226,7 +226,7 @@ async def cancel_booking_confirm(update: Update, context: ContextTypes.DEFAULT_T
 
     try:
         # Получаем бронь
-        booking = crud.get_booking_by_id(booking_id)
+        booking = await async_crud.get_booking_by_id(booking_id)
 
         if not booking:
             await query.edit_message_text("❌ Бронь не найдена")
@@ -289,30 +289,27 @@ async def cancel_booking_execute(update: Update, context: ContextTypes.DEFAULT_T
     logger.info(f"User {user_id} confirmed cancellation of booking {booking_id}")
 
     try:
-        # Получаем бронь (проверка что она существует и активна)
-        booking = crud.get_booking_by_id(booking_id)
+        # Отменяем одним запросом: только активную бронь этого пользователя
+        booking = await async_crud.cancel_booking(
+            booking_id,
+            user_telegram_id=user_id,
+            only_active=True
+        )
 
         if not booking:
-            await query.edit_message_text("❌ Бронь не найдена")
-            return
-
-        # Проверяем владельца
-        if booking.user.telegram_id != user_id:
-            await query.edit_message_text("❌ Доступ запрещён")
-            return
-
-        # Проверяем статус
-        if booking.status != 'active':
-            await query.edit_message_text("❌ Бронь уже не активна")
-            return
-
-        # Отменяем бронь в БД
-        success = crud.cancel_booking(booking_id)
-
-        if not success:
-            await query.edit_message_text(
-                "❌ Не удалось отменить бронь. Попробуйте позже."
-            )
+            # Выясняем причину (только при отказе)
+            existing = await async_crud.get_booking_by_id(booking_id)
+
+            if not existing:
+                text = "❌ Бронь не найдена"
+            elif existing.user.telegram_id != user_id:
+                text = "❌ Доступ запрещён"
+            elif existing.status != 'active':
+                text = "❌ Бронь уже не активна"
+            else:
+                text = "❌ Не удалось отменить бронь. Попробуйте позже."
+
+            await query.edit_message_text(text)
             return
 
         # Успех!
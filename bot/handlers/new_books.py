@@ -9,7 +9,7 @@ import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
-from database import crud
+from database import async_crud
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +29,7 @@ async def show_new_books(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     try:
         # Получаем новинки за последние 30 дней
-        books = crud.get_new_books(days=30, limit=20)
+        books = await async_crud.get_new_books(days=30, limit=20)
 
         if not books:
             # Нет новинок
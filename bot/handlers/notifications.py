@@ -12,12 +12,14 @@ from datetime import datetime, timedelta
 from telegram import Bot
 from telegram.ext import ContextTypes
 
-from database import crud
-from config.settings import REMINDER_DAYS_BEFORE
+from database import async_crud
+from database.unit_of_work import without_unit_of_work
+from config.settings import REMINDER_DAYS_BEFORE, STATS_SOURCE
 
 logger = logging.getLogger(__name__)
 
 
+@without_unit_of_work
 async def check_booking_reminders(context: ContextTypes.DEFAULT_TYPE):
     """
     Проверить брони и отправить напоминания
@@ -28,7 +30,7 @@ async def check_booking_reminders(context: ContextTypes.DEFAULT_TYPE):
 
     try:
         # Получаем брони, о которых нужно напомнить
-        bookings = crud.get_bookings_for_reminder(days_before=REMINDER_DAYS_BEFORE)
+        bookings = await async_crud.get_bookings_for_reminder(days_before=REMINDER_DAYS_BEFORE)
 
         if not bookings:
             logger.info("No bookings to remind today")
@@ -82,6 +84,7 @@ async def check_booking_reminders(context: ContextTypes.DEFAULT_TYPE):
         logger.error(f"Error in check_booking_reminders: {e}")
 
 
+@without_unit_of_work
 async def notify_new_books(context: ContextTypes.DEFAULT_TYPE):
     """
     Уведомить пользователей о новых книгах
@@ -92,7 +95,7 @@ async def notify_new_books(context: ContextTypes.DEFAULT_TYPE):
 
     try:
         # Получаем новые книги за последние 7 дней
-        new_books = crud.get_new_books(days=7, limit=10)
+        new_books = await async_crud.get_new_books(days=7, limit=10)
 
         if not new_books:
             logger.info("No new books added this week")
@@ -101,7 +104,7 @@ async def notify_new_books(context: ContextTypes.DEFAULT_TYPE):
         logger.info(f"Found {len(new_books)} new books")
 
         # Получаем пользователей с включёнными уведомлениями
-        users = crud.get_all_users_with_notifications()
+        users = await async_crud.get_all_users_with_notifications()
 
         if not users:
             logger.info("No users with notifications enabled")
@@ -153,6 +156,19 @@ async def notify_new_books(context: ContextTypes.DEFAULT_TYPE):
         logger.error(f"Error in notify_new_books: {e}")
 
 
+@without_unit_of_work
+async def compact_stats_counters(context: ContextTypes.DEFAULT_TYPE):
+    """
+    Свернуть дельты счётчиков статистики (stats_counters)
+
+    Запускается каждый час при STATS_SOURCE=counters
+    """
+    try:
+        await async_crud.compact_stats_counters()
+    except Exception as e:
+        logger.error(f"Error in compact_stats_counters: {e}")
+
+
 def setup_jobs(application):
     """
     Настроить периодические задачи
@@ -180,6 +196,19 @@ def setup_jobs(application):
 
     logger.info("✅ Job: New books notifications scheduled (Monday at 12:00)")
 
+    # Свёртка счётчиков статистики - каждый час, только если статистика
+    # читается из stats_counters (при STATS_SOURCE=query таблицу никто не читает,
+    # накопленные дельты свернёт первый запуск после переключения)
+    if STATS_SOURCE == 'counters':
+        job_queue.run_repeating(
+            compact_stats_counters,
+            interval=3600,
+            first=60,
+            name="compact_stats_counters"
+        )
+
+        logger.info("✅ Job: Stats counters compaction scheduled (hourly)")
+
     # Для тестирования - запустить через 10 секунд после старта
     # job_queue.run_once(
     #     check_booking_reminders,
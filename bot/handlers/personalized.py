@@ -11,7 +11,7 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 from telegram.ext import filters, MessageHandler
 
-from database import crud
+from database import async_crud
 
 logger = logging.getLogger(__name__)
 
@@ -41,7 +41,7 @@ async def show_personalized(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     try:
         # Получаем пользователя
-        user = crud.get_user_by_telegram_id(user_id)
+        user = await async_crud.get_user_by_telegram_id(user_id)
 
         if not user:
             await query.edit_message_text("❌ Пользователь не найден")
@@ -71,7 +71,9 @@ async def show_personalized(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
 
         # Есть жанры - показываем рекомендации
-        books = crud.get_books_by_genres(user.favorite_genres, limit=15)
+        books = await async_crud.get_books_by_genres(
+            user.favorite_genres, limit=15, rank_by_overlap=True
+        )
 
         if not books:
             # Нет книг по жанрам
@@ -198,7 +200,7 @@ async def handle_genres_input(update: Update, context: ContextTypes.DEFAULT_TYPE
         return SELECTING_GENRES
 
     # Сохраняем жанры
-    user = crud.update_user_genres(user_id, valid_genres)
+    user = await async_crud.update_user_genres(user_id, valid_genres)
 
     if not user:
         await update.message.reply_text(
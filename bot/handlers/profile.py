@@ -11,7 +11,7 @@ import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
-from database import crud
+from database import async_crud
 
 logger = logging.getLogger(__name__)
 
@@ -29,17 +29,17 @@ async def show_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     try:
         # Получаем пользователя
-        user = crud.get_user_by_telegram_id(user_id)
+        user = await async_crud.get_user_by_telegram_id(user_id)
 
         if not user:
             await query.edit_message_text("❌ Пользователь не найден")
             return
 
         # Получаем статистику броней
-        all_bookings = crud.get_user_bookings(user_id)
-        active_bookings = crud.get_user_bookings(user_id, status='active')
-        completed_bookings = crud.get_user_bookings(user_id, status='completed')
-        cancelled_bookings = crud.get_user_bookings(user_id, status='cancelled')
+        all_bookings = await async_crud.get_user_bookings(user_id)
+        active_bookings = await async_crud.get_user_bookings(user_id, status='active')
+        completed_bookings = await async_crud.get_user_bookings(user_id, status='completed')
+        cancelled_bookings = await async_crud.get_user_bookings(user_id, status='cancelled')
 
         # Формируем текст профиля
         text = (
@@ -113,7 +113,7 @@ async def toggle_notifications(update: Update, context: ContextTypes.DEFAULT_TYP
 
     try:
         # Переключаем уведомления
-        new_value = crud.toggle_user_notifications(user_id)
+        new_value = await async_crud.toggle_user_notifications(user_id)
 
         if new_value is None:
             await query.answer("❌ Ошибка", show_alert=True)
@@ -151,7 +151,7 @@ async def show_user_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info(f"User {user_id} viewing stats")
 
     try:
-        user = crud.get_user_by_telegram_id(user_id)
+        user = await async_crud.get_user_by_telegram_id(user_id)
 
         if not user:
             text = "❌ Пользователь не найден"
@@ -162,7 +162,7 @@ async def show_user_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
 
         # Получаем все брони
-        all_bookings = crud.get_user_bookings(user_id)
+        all_bookings = await async_crud.get_user_bookings(user_id)
         active = [b for b in all_bookings if b.status == 'active']
         completed = [b for b in all_bookings if b.status == 'completed']
         cancelled = [b for b in all_bookings if b.status == 'cancelled']
@@ -7,16 +7,59 @@
 - Показ результатов поиска
 """
 
+import difflib
+import html
 import logging
+import re
+from typing import List, Optional
+
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes, ConversationHandler
 
-from database import crud
+from config.settings import INLINE_MODE
+from database import async_crud
 
 logger = logging.getLogger(__name__)
 
 WAITING_FOR_QUERY = 1
 
+# Насколько слово книги должно быть похоже на слово запроса, чтобы его заменить
+SUGGEST_MIN_RATIO = 0.6
+
+WORD_RE = re.compile(r'\w+')
+
+
+def suggest_query(query_text: str, books: List) -> Optional[str]:
+    """
+    Исправленный запрос по найденным похожим книгам ("Дюнна" -> "Дюна")
+
+    Каждое слово запроса заменяется самым похожим словом из названий
+    и авторов книг (если похожесть не ниже SUGGEST_MIN_RATIO).
+
+    Args:
+        query_text: Запрос пользователя
+        books: Книги нечёткого поиска (самые похожие - первыми)
+
+    Returns:
+        Исправленный запрос или None, если исправлять нечего
+    """
+    candidates = []
+    for book in books:
+        for word in WORD_RE.findall(f"{book.title} {book.author}"):
+            if word not in candidates:
+                candidates.append(word)
+    lowered = [word.lower() for word in candidates]
+
+    words = []
+    for word in WORD_RE.findall(query_text):
+        matches = difflib.get_close_matches(word.lower(), lowered, n=1, cutoff=SUGGEST_MIN_RATIO)
+        words.append(candidates[lowered.index(matches[0])] if matches else word)
+
+    suggestion = ' '.join(words)
+    if suggestion.lower() == ' '.join(WORD_RE.findall(query_text)).lower():
+        return None
+    return suggestion
+
 async def start_search(update: Update, context: ContextTypes):
     """
     Начать поиск книги
@@ -73,17 +116,48 @@ async def handle_search_query(update: Update, context: ContextTypes):
 
     try:
         # Ищем книги
-        books = crud.search_books(query_text, limit=20)
+        books = await async_crud.search_books(query_text, limit=20)
 
         if not books:
-            # Не найдено
-            text = (
-                f"🔍 <b>Результаты поиска</b>\n\n"
-                f"По запросу <i>\"{query_text}\"</i> ничего не найдено.\n\n"
-                f"Попробуйте другой запрос или просмотрите каталог."
-            )
+            # Точных совпадений нет - ищем похожие (опечатки)
+            suggestions = await async_crud.search_books_fuzzy(query_text)
+
+            keyboard = []
+
+            if suggestions:
+                text = (
+                    f"🔍 <b>Результаты поиска</b>\n\n"
+                    f"По запросу <i>\"{query_text}\"</i> ничего не найдено.\n\n"
+                )
+
+                corrected = suggest_query(query_text, suggestions)
+                if corrected:
+                    text += f"Возможно, вы искали: <b>{html.escape(corrected)}</b>\n\n"
+                    if INLINE_MODE:
+                        # Повторить поиск с исправленным запросом - inline-режимом в этом чате
+                        keyboard.append([InlineKeyboardButton(
+                            f"🔍 Искать «{corrected[:40]}»",
+                            switch_inline_query_current_chat=corrected
+                        )])
+
+                text += "Похожие книги 👇"
+
+                for book in suggestions:
+                    label = f"{book.title} — {book.author}"
+                    label = label if len(label) <= 40 else label[:37] + "..."
+
+                    keyboard.append([
+                        InlineKeyboardButton(f"💡 {label}", callback_data=f"book_{book.id}")
+                    ])
+            else:
+                # Не найдено
+                text = (
+                    f"🔍 <b>Результаты поиска</b>\n\n"
+                    f"По запросу <i>\"{query_text}\"</i> ничего не найдено.\n\n"
+                    f"Попробуйте другой запрос или просмотрите каталог."
+                )
 
-            keyboard = [
+            keyboard += [
                 [InlineKeyboardButton("📖 Каталог", callback_data="catalog")],
                 [InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")]
             ]
@@ -10,6 +10,8 @@
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from typing import List
 from database.models import Category, Book
+from database.crud import CategoryPage, book_cursor
+from bot.utils.pagination import encode_cursor, NEXT, PREV
 
 
 def get_categories_keyboard(categories: List[Category]) -> InlineKeyboardMarkup:
@@ -55,6 +57,10 @@ def get_books_keyboard(
     """
     Клавиатура со списком книг категории
 
+    Кнопки перелистывания несут курсор первой/последней книги страницы
+    (bot/utils/pagination.py) - следующая страница читается по индексу,
+    без OFFSET.
+
     Args:
         books: Список книг для отображения
         category_id: ID категории (для навигации)
@@ -89,7 +95,10 @@ def get_books_keyboard(
             pagination_row.append(
                 InlineKeyboardButton(
                     "◀️ Назад",
-                    callback_data=f"category_{category_id}_page_{page - 1}"
+                    callback_data=(
+                        f"category_{category_id}_page_{page - 1}_"
+                        f"{PREV}_{encode_cursor(book_cursor(books[0]))}"
+                    )
                 )
             )
 
@@ -106,7 +115,10 @@ def get_books_keyboard(
             pagination_row.append(
                 InlineKeyboardButton(
                     "Вперёд ▶️",
-                    callback_data=f"category_{category_id}_page_{page + 1}"
+                    callback_data=(
+                        f"category_{category_id}_page_{page + 1}_"
+                        f"{NEXT}_{encode_cursor(book_cursor(books[-1]))}"
+                    )
                 )
             )
 
@@ -121,6 +133,24 @@ def get_books_keyboard(
     return InlineKeyboardMarkup(keyboard)
 
 
+def get_category_page_keyboard(category_page: CategoryPage) -> InlineKeyboardMarkup:
+    """
+    Клавиатура страницы книг категории
+
+    Args:
+        category_page: Результат crud.get_category_page
+
+    Returns:
+        InlineKeyboardMarkup: Клавиатура с книгами и пагинацией
+    """
+    return get_books_keyboard(
+        category_page.books,
+        category_page.category.id,
+        category_page.page,
+        category_page.total_pages
+    )
+
+
 def get_book_detail_keyboard(book_id: int, category_id: int) -> InlineKeyboardMarkup:
     """
     Клавиатура для карточки книги
@@ -9,28 +9,39 @@
 """
 
 import logging
+from typing import Optional
+
 from telegram import Update, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.constants import ParseMode
+from telegram.request import HTTPXRequest
 from telegram.ext import (
     Application,
+    ApplicationBuilder,
     CommandHandler,
     ContextTypes,
     CallbackQueryHandler,
     MessageHandler,
     ConversationHandler,
+    InlineQueryHandler,
     filters
 )
 
-from config.settings import BOT_TOKEN
-from database import crud
+from config.settings import (
+    BOT_TOKEN, BOT_API_URL, CONCURRENT_UPDATES, DB_UNIT_OF_WORK, SEARCH_BACKEND, INLINE_MODE
+)
+from database import async_crud, search_index
+from database.async_connection import dispose_async_engine
+from database.offload import run_in_thread, shutdown_executor
 from bot.keyboards.main_menu import get_main_menu_keyboard
 from bot.handlers import (
     catalog, search, booking,
     my_bookings, new_books, personalized,
     profile, admin, notifications,
-    common, book_management
+    common, book_management, inline_search
 )
 from bot.utils.logger import setup_logger
+from bot.utils.update_processor import CommitBeforeSendRequest, UnitOfWorkUpdateProcessor
+from bot.utils.update_recorder import setup_recorder, shutdown_recorder
 
 logger = setup_logger('BookHive', 'bookhive.log', logging.INFO)
 
@@ -40,7 +51,8 @@ async def start_handler(update: Update, context: ContextTypes):
     """
     Обработчик команды /start
 
-    Регистрирует пользователя и показывает приветствие
+    Регистрирует пользователя и показывает приветствие.
+    /start book_{id} (ссылка из inline-режима) - сразу открывает карточку книги
     """
     user = update.effective_user
     user_id = user.id
@@ -49,22 +61,18 @@ async def start_handler(update: Update, context: ContextTypes):
     logger.info(f"User {user_id} ({user_name}) started the bot")
 
     try:
-        # Проверяем есть ли пользователь в БД
-        db_user = crud.get_user_by_telegram_id(user_id)
+        # Регистрируем или обновляем имя - один запрос (upsert)
+        db_user, created = await async_crud.create_user(
+            telegram_id=user_id,
+            name=user_name
+        )
 
-        if db_user:
-            # Пользователь уже существует
-            logger.info(f"User {user_id} already registered")
-            greeting = f"С возвращением, {user_name}! 👋"
-        else:
-            # Новый пользователь - регистрируем
-            db_user = crud.create_user(
-                telegram_id=user_id,
-                name=user_name,
-                favorite_genres=[]
-            )
+        if created:
             logger.info(f"User {user_id} registered")
             greeting = f"Привет, {user_name}! 🎉"
+        else:
+            logger.info(f"User {user_id} already registered")
+            greeting = f"С возвращением, {user_name}! 👋"
 
     except Exception as e:
         logger.error(f"Error registering user {user_id}: {e}")
@@ -73,6 +81,11 @@ async def start_handler(update: Update, context: ContextTypes):
         )
         return
 
+    # Ссылка на книгу из inline-режима
+    if context.args and context.args[0].startswith('book_') and context.args[0][5:].isdigit():
+        await catalog.send_book_card(update.message, int(context.args[0][5:]))
+        return
+
     welcome_message = (
         f"{greeting}\n\n"
         f"📚 Добро пожаловать в <b>BookHive</b>!\n\n"
@@ -184,7 +197,7 @@ async def handle_unknown_message(update: Update, context: ContextTypes.DEFAULT_T
     logger.info(f"User {user_id} sent unknown message: {message_text}")
 
     # Проверяем есть ли пользователь в БД
-    user = crud.get_user_by_telegram_id(user_id)
+    user = await async_crud.get_user_by_telegram_id(user_id)
 
     if not user:
         # Пользователь не зарегистрирован
@@ -299,7 +312,7 @@ async def about_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     Информация о боте
     """
-    stats = crud.get_database_stats()
+    stats = await async_crud.get_database_stats()
 
     text = (
         "📚 <b>О боте BookHive</b>\n\n"
@@ -371,25 +384,76 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             except:
                 pass
 
-# ГЛАВНАЯ ФУНКЦИЯ
+async def startup_handler(application: Application):
+    """
+    Запуск бота
 
-def main():
+    При SEARCH_BACKEND=memory или INLINE_MODE строит поисковый индекс каталога
+    (в пуле потоков - не блокируя event loop)
     """
-    Главная функция - запуск бота
+    if SEARCH_BACKEND == 'memory' or INLINE_MODE:
+        await run_in_thread(search_index.build, timeout=0)
+
+
+async def shutdown_handler(application: Application):
     """
-    logger.info("Starting BookHive Bot...")
+    Остановка бота
 
-    # Проверка токена
-    if not BOT_TOKEN or BOT_TOKEN == "your_bot_token_here":
-        logger.error("BOT_TOKEN not set in .env file!")
-        print("\n❌ ОШИБКА: BOT_TOKEN не установлен в .env файле!")
-        print("Получи токен у @BotFather и добавь в .env\n")
-        return
+    Закрывает соединения пула асинхронного движка БД,
+    останавливает пул потоков для CRUD и запись апдейтов
+    """
+    await dispose_async_engine()
+    shutdown_executor()
+    shutdown_recorder()
+
+# ГЛАВНАЯ ФУНКЦИЯ
 
-    application = Application.builder().token(BOT_TOKEN).build()
+def build_application(
+        builder: Optional[ApplicationBuilder] = None,
+        update_processor: Optional[UnitOfWorkUpdateProcessor] = None
+) -> Application:
+    """
+    Собрать Application со всеми хендлерами и задачами
+
+    Args:
+        builder: ApplicationBuilder с токеном (и, например, своим
+            base_url или request) - по умолчанию токен и BOT_API_URL из настроек.
+            Свой request оборачивается в CommitBeforeSendRequest, иначе ответы
+            уходят до COMMIT транзакции апдейта
+        update_processor: Update processor (по умолчанию
+            UnitOfWorkUpdateProcessor на CONCURRENT_UPDATES апдейтов)
+
+    Returns:
+        Application (не запущенный)
+    """
+    if builder is None:
+        builder = (
+            Application.builder()
+            .token(BOT_TOKEN)
+            .request(CommitBeforeSendRequest(HTTPXRequest(connection_pool_size=256)))
+        )
+        if BOT_API_URL:
+            builder = builder.base_url(f"{BOT_API_URL}/bot").base_file_url(f"{BOT_API_URL}/file/bot")
+
+    if update_processor is None:
+        update_processor = UnitOfWorkUpdateProcessor(max(CONCURRENT_UPDATES, 1))
+
+    application = (
+        builder
+        .post_init(startup_handler)
+        .post_shutdown(shutdown_handler)
+        .concurrent_updates(update_processor)
+        .build()
+    )
+
+    if DB_UNIT_OF_WORK and not isinstance(application.bot.request, CommitBeforeSendRequest):
+        logger.warning("Bot requests are not wrapped in CommitBeforeSendRequest: replies go out before COMMIT")
 
     logger.info("Registering handlers...")
 
+    # Запись апдейтов для воспроизведения (при UPDATE_RECORD_DIR)
+    setup_recorder(application)
+
     # ============================================
     # CONVERSATION HANDLERS (должны быть первыми!)
     # ============================================
@@ -531,7 +595,9 @@ def main():
         ],
         states={
             book_management.BOOK_ID_FOR_PHOTO: [
-                MessageHandler(filters.TEXT & ~filters.COMMAND, book_management.add_photo_get_book_id)
+                MessageHandler(filters.TEXT & ~filters.COMMAND, book_management.add_photo_get_book_id),
+                MessageHandler(filters.PHOTO, book_management.add_photos_album_receive),
+                CallbackQueryHandler(book_management.add_photos_done, pattern=r"^bookmgmt_photos_done$")
             ],
             book_management.BOOK_PHOTO: [
                 MessageHandler(filters.PHOTO, book_management.add_photo_receive)
@@ -572,6 +638,70 @@ def main():
 
     application.add_handler(delete_book_conv_handler)
 
+    # ConversationHandler для импорта каталога из файла
+    import_catalog_conv_handler = ConversationHandler(
+        entry_points=[
+            CallbackQueryHandler(book_management.import_catalog_start, pattern=r"^bookmgmt_import$")
+        ],
+        states={
+            book_management.BOOK_IMPORT_FILE: [
+                MessageHandler(filters.Document.ALL, book_management.import_catalog_file)
+            ]
+        },
+        fallbacks=[
+            CallbackQueryHandler(book_management.cancel_book_operation, pattern=r"^bookmgmt_cancel$"),
+            CommandHandler("start", common.cancel_operation),
+            MessageHandler(filters.COMMAND, common.cancel_operation),
+        ],
+        allow_reentry=True,
+        per_message=False
+    )
+
+    application.add_handler(import_catalog_conv_handler)
+
+    # ConversationHandler для переключения доступности
+    toggle_book_conv_handler = ConversationHandler(
+        entry_points=[
+            CallbackQueryHandler(book_management.toggle_book_start, pattern=r"^bookmgmt_toggle$")
+        ],
+        states={
+            book_management.BOOK_ID_FOR_TOGGLE: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, book_management.toggle_book_receive)
+            ]
+        },
+        fallbacks=[
+            CallbackQueryHandler(book_management.cancel_book_operation, pattern=r"^bookmgmt_cancel$"),
+            CommandHandler("start", common.cancel_operation),
+            MessageHandler(filters.COMMAND, common.cancel_operation),
+        ],
+        allow_reentry=True,
+        per_message=False
+    )
+
+    application.add_handler(toggle_book_conv_handler)
+
+    # ConversationHandler для массового изменения цен и наличия
+    bulk_update_conv_handler = ConversationHandler(
+        entry_points=[
+            CallbackQueryHandler(book_management.bulk_update_start, pattern=r"^bookmgmt_bulk_update$")
+        ],
+        states={
+            book_management.BOOK_BULK_UPDATE: [
+                MessageHandler(filters.Document.ALL, book_management.bulk_update_file),
+                MessageHandler(filters.TEXT & ~filters.COMMAND, book_management.bulk_update_text)
+            ]
+        },
+        fallbacks=[
+            CallbackQueryHandler(book_management.cancel_book_operation, pattern=r"^bookmgmt_cancel$"),
+            CommandHandler("start", common.cancel_operation),
+            MessageHandler(filters.COMMAND, common.cancel_operation),
+        ],
+        allow_reentry=True,
+        per_message=False
+    )
+
+    application.add_handler(bulk_update_conv_handler)
+
     # ============================================
     # COMMAND HANDLERS
     # ============================================
@@ -584,6 +714,13 @@ def main():
     application.add_handler(CommandHandler("about", about_handler))
     application.add_handler(CommandHandler("manage_books", book_management.show_book_management_menu))
 
+    # ============================================
+    # INLINE MODE
+    # ============================================
+
+    if INLINE_MODE:
+        application.add_handler(InlineQueryHandler(inline_search.handle_inline_query))
+
     # ============================================
     # CALLBACK HANDLERS
     # ============================================
@@ -612,7 +749,6 @@ def main():
 
     application.add_handler(CallbackQueryHandler(book_management.show_book_management_menu, pattern=r"^bookmgmt_menu$"))
     application.add_handler(CallbackQueryHandler(book_management.list_all_books, pattern=r"^bookmgmt_list$"))
-    application.add_handler(CallbackQueryHandler(book_management.toggle_book_start, pattern=r"^bookmgmt_toggle$"))
 
     # Обработчик кнопки "Главное меню"
     application.add_handler(CallbackQueryHandler(back_to_main_menu_handler, pattern=r"^main_menu$"))
@@ -653,6 +789,24 @@ def main():
 
     logger.info("Handlers registered successfully")
 
+    return application
+
+
+def main():
+    """
+    Главная функция - запуск бота
+    """
+    logger.info("Starting BookHive Bot...")
+
+    # Проверка токена
+    if not BOT_TOKEN or BOT_TOKEN == "your_bot_token_here":
+        logger.error("BOT_TOKEN not set in .env file!")
+        print("\n❌ ОШИБКА: BOT_TOKEN не установлен в .env файле!")
+        print("Получи токен у @BotFather и добавь в .env\n")
+        return
+
+    application = build_application()
+
     logger.info("Bot is starting polling...")
 
     application.run_polling(allowed_updates=Update.ALL_TYPES)
@@ -0,0 +1,355 @@
+# bot/utils/catalog_files.py
+"""
+Чтение и проверка файлов каталога (массовый импорт книг)
+
+Поддерживаемые форматы:
+    .csv          - заголовок в первой строке, разделитель , ; или Tab,
+                    кодировка UTF-8
+    .jsonl/.ndjson - один JSON объект на строку
+    .json         - массив объектов (или {"books": [...]})
+
+CSV и JSON Lines читаются потоком, строка за строкой.
+Обычный .json читается целиком: Telegram отдаёт ботам файлы
+не больше 20 МБ, так что это безопасно.
+
+Колонки импорта книг (заголовки - по-английски или по-русски):
+    title / название         - обязательно
+    author / автор           - обязательно
+    price / цена             - обязательно
+    category / категория     - название или ID категории, обязательно
+    isbn                     - ключ обновления: книга с тем же ISBN обновляется
+    description / описание
+    genres / жанры           - через запятую или | (в JSON - список)
+    is_new / новинка         - да/нет, 1/0, true/false
+    is_available / доступна  - да/нет, 1/0, true/false (по умолчанию - да)
+
+Колонки массового изменения цен и наличия (validate_update_row):
+    id                       - ID книги, обязательно
+    price / цена             - новая цена (пусто - не менять)
+    available / доступна     - да/нет (пусто - не менять)
+То же можно прислать текстом, строками "id;price;available" (parse_update_lines).
+"""
+
+import codecs
+import csv
+import io
+import itertools
+import json
+import math
+import re
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+# Максимальный размер файла, который бот может скачать (Bot API)
+MAX_FILE_SIZE = 20 * 1024 * 1024
+
+CSV_EXTENSIONS = ('.csv',)
+JSON_LINES_EXTENSIONS = ('.jsonl', '.ndjson')
+JSON_EXTENSIONS = ('.json',)
+SUPPORTED_EXTENSIONS = CSV_EXTENSIONS + JSON_LINES_EXTENSIONS + JSON_EXTENSIONS
+
+# Русские заголовки колонок -> поля
+COLUMN_ALIASES = {
+    'название': 'title',
+    'автор': 'author',
+    'цена': 'price',
+    'категория': 'category',
+    'описание': 'description',
+    'жанры': 'genres',
+    'новинка': 'is_new',
+    'доступна': 'is_available',
+    'наличие': 'is_available',
+    'available': 'is_available',
+    'обложка': 'cover_photo_id',
+}
+
+_TRUE = {'1', 'true', 'yes', 'y', 'да', 'д', '+', 'есть'}
+_FALSE = {'0', 'false', 'no', 'n', 'нет', 'н', '-', ''}
+
+_ISBN = re.compile(r'^(\d{9}[\dX]|\d{13})$')
+_DIGITS = re.compile(r'[0-9]+')
+_GENRES_SEPARATOR = re.compile(r'[,|]')
+
+# ID книги - INTEGER в PostgreSQL
+MAX_BOOK_ID = 2 ** 31 - 1
+
+
+class CatalogFileError(ValueError):
+    """Файл нельзя прочитать целиком (формат, кодировка, заголовок)"""
+
+
+@dataclass
+class RowError:
+    """Ошибка в строке файла"""
+    line: int
+    message: str
+
+
+# ЧТЕНИЕ
+
+def _normalize_key(key) -> str:
+    key = str(key or '').strip().lower().replace('ё', 'е')
+    return COLUMN_ALIASES.get(key, key)
+
+
+def _normalize_record(record: dict) -> dict:
+    return {_normalize_key(key): value for key, value in record.items()}
+
+
+def _read_csv(stream: BinaryIO) -> Iterator[Tuple[int, dict]]:
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    header = text.readline()
+    if not header.strip():
+        raise CatalogFileError("Файл пустой")
+
+    try:
+        dialect = csv.Sniffer().sniff(header, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+
+    reader = csv.DictReader(itertools.chain([header], text), dialect=dialect)
+    for record in reader:
+        # Номер строки в файле (с учётом заголовка)
+        yield reader.line_num, _normalize_record(record)
+
+
+def _read_json_lines(stream: BinaryIO) -> Iterator[Tuple[int, dict]]:
+    decoder = codecs.getreader('utf-8-sig')(stream)
+    for line_number, line in enumerate(decoder, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise CatalogFileError(f"Строка {line_number}: некорректный JSON ({e.msg})")
+        if not isinstance(record, dict):
+            raise CatalogFileError(f"Строка {line_number}: ожидается JSON объект")
+        yield line_number, _normalize_record(record)
+
+
+def _read_json(stream: BinaryIO) -> Iterator[Tuple[int, dict]]:
+    try:
+        data = json.load(codecs.getreader('utf-8-sig')(stream))
+    except json.JSONDecodeError as e:
+        raise CatalogFileError(f"Некорректный JSON: {e.msg} (строка {e.lineno})")
+
+    if isinstance(data, dict):
+        data = data.get('books')
+    if not isinstance(data, list):
+        raise CatalogFileError('Ожидается массив объектов или {"books": [...]}')
+
+    for number, record in enumerate(data, start=1):
+        if not isinstance(record, dict):
+            raise CatalogFileError(f"Запись {number}: ожидается JSON объект")
+        yield number, _normalize_record(record)
+
+
+def read_records(stream: BinaryIO, filename: str) -> Iterator[Tuple[int, dict]]:
+    """
+    Записи файла каталога
+
+    Args:
+        stream: Содержимое файла
+        filename: Имя файла (формат - по расширению)
+
+    Yields:
+        (номер строки, словарь колонка -> значение);
+        имена колонок приведены к нижнему регистру, русские заменены на поля
+
+    Raises:
+        CatalogFileError: Неизвестный формат или файл не читается
+    """
+    name = (filename or '').lower()
+
+    if name.endswith(CSV_EXTENSIONS):
+        records = _read_csv(stream)
+    elif name.endswith(JSON_LINES_EXTENSIONS):
+        records = _read_json_lines(stream)
+    elif name.endswith(JSON_EXTENSIONS):
+        records = _read_json(stream)
+    else:
+        raise CatalogFileError(
+            f"Неподдерживаемый формат. Нужен файл {', '.join(SUPPORTED_EXTENSIONS)}"
+        )
+
+    try:
+        yield from records
+    except UnicodeDecodeError:
+        raise CatalogFileError("Файл должен быть в кодировке UTF-8")
+
+
+# ПРОВЕРКА ЗНАЧЕНИЙ
+
+def _text(value) -> str:
+    return '' if value is None else str(value).strip()
+
+
+def parse_book_id(value) -> int:
+    """ID книги: целое число 1..MAX_BOOK_ID"""
+    text = _text(value)
+    if not _DIGITS.fullmatch(text):
+        raise ValueError(f"ID '{text}' - не число" if text else "нет ID")
+    if not 1 <= int(text) <= MAX_BOOK_ID:
+        raise ValueError(f"ID {text} - вне диапазона 1..{MAX_BOOK_ID}")
+    return int(text)
+
+
+def parse_price(value) -> float:
+    """Цена: конечное число >= 0 ("499", "499.90", "499,90"; не inf / nan)"""
+    text = _text(value).replace(' ', '').replace(',', '.')
+    try:
+        price = float(text)
+    except ValueError:
+        raise ValueError(f"цена '{_text(value)}' - не число")
+    if not math.isfinite(price):
+        raise ValueError(f"цена '{_text(value)}' - не число")
+    if price < 0:
+        raise ValueError(f"цена {text} - должна быть >= 0")
+    return price
+
+
+def parse_bool(value, default: bool) -> bool:
+    """Да/нет из ячейки: да/нет, 1/0, true/false, +/-"""
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+
+    text = _text(value).lower()
+    if text == '':
+        return default
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(f"'{value}' - ожидается да/нет")
+
+
+def normalize_isbn(value) -> Optional[str]:
+    """
+    ISBN без дефисов и пробелов (None - пусто)
+
+    Raises:
+        ValueError: Не ISBN-10 / ISBN-13
+    """
+    text = re.sub(r'[\s-]', '', _text(value)).upper()
+    if not text:
+        return None
+    if not _ISBN.match(text):
+        raise ValueError(f"ISBN '{_text(value)}' - нужно 10 или 13 цифр")
+    return text
+
+
+def parse_genres(value) -> List[str]:
+    """Жанры: список или строка через запятую / |"""
+    if not isinstance(value, list):
+        value = _GENRES_SEPARATOR.split(_text(value))
+    genres = (_text(genre).lower() for genre in value)
+    return [genre for genre in genres if genre][:20]
+
+
+def build_category_lookup(categories) -> Dict[str, int]:
+    """Категории для validate_book_row: название (в нижнем регистре) и ID -> ID"""
+    lookup = {}
+    for category in categories:
+        lookup[category.name.strip().lower()] = category.id
+        lookup[str(category.id)] = category.id
+    return lookup
+
+
+def validate_book_row(record: dict, categories: Dict[str, int]) -> dict:
+    """
+    Проверить запись импорта книг
+
+    Args:
+        record: Запись из read_records
+        categories: build_category_lookup(...)
+
+    Returns:
+        dict: Поля для crud.upsert_books
+
+    Raises:
+        ValueError: Описание первой найденной ошибки
+    """
+    title = _text(record.get('title'))
+    author = _text(record.get('author'))
+
+    if not title:
+        raise ValueError("нет названия")
+    if not author:
+        raise ValueError("нет автора")
+    if len(title) > 255 or len(author) > 255:
+        raise ValueError("название или автор длиннее 255 символов")
+
+    if _text(record.get('price')) == '':
+        raise ValueError("нет цены")
+    price = parse_price(record.get('price'))
+
+    category = _text(record.get('category') or record.get('category_id')).lower()
+    if not category:
+        raise ValueError("нет категории")
+    if category not in categories:
+        raise ValueError(f"категория '{category}' не найдена")
+
+    return {
+        'title': title,
+        'author': author,
+        'price': price,
+        'category_id': categories[category],
+        'isbn': normalize_isbn(record.get('isbn')),
+        'description': _text(record.get('description')) or None,
+        'cover_photo_id': _text(record.get('cover_photo_id')) or None,
+        'genres': parse_genres(record.get('genres')),
+        'is_new': parse_bool(record.get('is_new'), default=False),
+        'is_available': parse_bool(record.get('is_available'), default=True),
+    }
+
+
+def parse_update_lines(text: str) -> Iterator[Tuple[int, dict]]:
+    """
+    Записи из текста сообщения: строки "id;price;available"
+
+    Разделитель - ";" или Tab (запятая занята дробной частью цены).
+    Первая строка-заголовок (не число в начале) пропускается.
+
+    Yields:
+        (номер строки, {'id': ..., 'price': ..., 'is_available': ...})
+    """
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+
+        parts = [part.strip() for part in re.split(r'[;\t]', line)]
+        if line_number == 1 and not _DIGITS.fullmatch(parts[0]):
+            continue
+
+        parts += [''] * (3 - len(parts))
+        yield line_number, {'id': parts[0], 'price': parts[1], 'is_available': parts[2]}
+
+
+def validate_update_row(record: dict) -> dict:
+    """
+    Проверить запись изменения цены / наличия
+
+    Returns:
+        dict: {'id', 'price', 'is_available'} для crud.bulk_update_books
+            (None - поле не меняется)
+
+    Raises:
+        ValueError: Описание первой найденной ошибки
+    """
+    book_id = parse_book_id(record.get('id'))
+
+    price = None
+    if _text(record.get('price')):
+        price = parse_price(record.get('price'))
+
+    is_available = None
+    if _text(record.get('is_available')):
+        is_available = parse_bool(record.get('is_available'), default=True)
+
+    if price is None and is_available is None:
+        raise ValueError("нет ни цены, ни наличия")
+
+    return {'id': book_id, 'price': price, 'is_available': is_available}
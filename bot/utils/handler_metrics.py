@@ -0,0 +1,199 @@
+# bot/utils/handler_metrics.py
+"""
+Метрики хендлеров: время, SQL запросы и время в БД на каждый вызов
+
+instrument_handlers() оборачивает callback каждого хендлера Application
+(включая entry_points, states и fallbacks ConversationHandler) -
+для нагрузочных тестов и бенчмарков. Ключ - имя функции хендлера
+вида "catalog.show_category_books".
+
+Бюджет запросов (QUERY_BUDGETS): сколько SQL запросов может выполнить
+один вызов хендлера. Превышение (обычно N+1 - запрос в цикле) попадает
+в HandlerMetrics.violations() вместе с текстами запросов, а бенчмарки
+завершаются с ошибкой.
+
+Использование:
+    metrics = HandlerMetrics()
+    instrument_handlers(application, metrics)
+    ...
+    print(metrics.summary())
+    assert not metrics.violations()
+"""
+
+import functools
+import statistics
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterator, List, Optional
+
+from telegram.ext import Application, BaseHandler, ConversationHandler
+
+from database.query_counter import count_queries
+
+# Бюджет SQL запросов на один вызов хендлера. Считаются запросы самого
+# хендлера: BEGIN / COMMIT единицы работы (bot/utils/update_processor.py)
+# выполняются вне него
+QUERY_BUDGETS: Dict[str, int] = {
+    'main.start_handler': 1,
+    'main.main_menu_callback_handler': 1,
+    'catalog.show_category_books': 2,       # + первая страница, если страница пропала
+    'catalog.show_book_detail': 1,
+    'new_books.show_new_books': 1,
+    'search.handle_search_query': 4,        # + нечёткий поиск, если ничего не найдено
+    'admin.show_admin_panel': 1,
+    'admin.show_detailed_stats': 2,
+    'admin.show_all_books': 2,
+    'admin.show_all_users': 3,
+    'admin.show_all_bookings': 1,
+}
+
+# Сколько запросов сохранять в отчёте о превышении
+VIOLATION_STATEMENTS = 20
+
+
+def handler_name(callback: Callable) -> str:
+    """Имя хендлера: модуль (без пакета) и функция - "admin.show_detailed_stats" """
+    callback = getattr(callback, '__wrapped__', callback)
+    module = callback.__module__.rsplit('.', 1)[-1]
+    return f"{module}.{callback.__qualname__}"
+
+
+def percentile(values: List[float], percent: int) -> float:
+    """Перцентиль (как statistics.quantiles, inclusive)"""
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[percent - 1]
+
+
+def timing_stats(seconds: List[float]) -> dict:
+    """p50 / p95 / p99 / max в миллисекундах (пустой список - пустой словарь)"""
+    if not seconds:
+        return {}
+    values = [value * 1000 for value in seconds]
+    return {
+        'p50_ms': round(percentile(values, 50), 3),
+        'p95_ms': round(percentile(values, 95), 3),
+        'p99_ms': round(percentile(values, 99), 3),
+        'max_ms': round(max(values), 3),
+    }
+
+
+class HandlerMetrics:
+    """
+    Вызовы хендлеров: длительность, число SQL запросов и время в БД
+
+    Args:
+        budgets: Бюджеты запросов {имя хендлера: запросов на вызов}
+            (по умолчанию QUERY_BUDGETS)
+    """
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None):
+        self.budgets = QUERY_BUDGETS if budgets is None else budgets
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+        self.queries: Dict[str, List[int]] = defaultdict(list)
+        self.db_times: Dict[str, List[float]] = defaultdict(list)
+        self.over_budget: Dict[str, dict] = {}
+
+    def record(
+            self,
+            name: str,
+            seconds: float,
+            queries: int,
+            db_seconds: float = 0.0,
+            statements: Optional[List[str]] = None
+    ) -> None:
+        self.timings[name].append(seconds)
+        self.queries[name].append(queries)
+        self.db_times[name].append(db_seconds)
+
+        budget = self.budgets.get(name)
+        if budget is not None and queries > budget:
+            violation = self.over_budget.setdefault(name, {
+                'budget': budget,
+                'calls': 0,
+                'queries_max': 0,
+                'statements': [],
+            })
+            violation['calls'] += 1
+            if queries > violation['queries_max']:
+                violation['queries_max'] = queries
+                violation['statements'] = (statements or [])[:VIOLATION_STATEMENTS]
+
+    def violations(self) -> Dict[str, dict]:
+        """
+        Хендлеры, превысившие бюджет запросов
+
+        Returns:
+            {имя: {'budget', 'calls' (вызовов сверх бюджета), 'queries_max',
+                   'statements' (запросы худшего вызова)}}
+        """
+        return dict(self.over_budget)
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        Сводка по хендлерам (по убыванию числа вызовов)
+
+        Returns:
+            {имя: {'calls', 'p50_ms', 'p95_ms', 'p99_ms', 'mean_ms',
+                   'queries_mean', 'queries_max', 'db_mean_ms', 'budget'}}
+        """
+        result = {}
+        for name in sorted(self.timings, key=lambda name: -len(self.timings[name])):
+            timings = [seconds * 1000 for seconds in self.timings[name]]
+            queries = self.queries[name]
+            result[name] = {
+                'calls': len(timings),
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p95_ms': round(percentile(timings, 95), 3),
+                'p99_ms': round(percentile(timings, 99), 3),
+                'mean_ms': round(statistics.fmean(timings), 3),
+                'queries_mean': round(statistics.fmean(queries), 2),
+                'queries_max': max(queries),
+                'db_mean_ms': round(statistics.fmean(self.db_times[name]) * 1000, 3),
+                'budget': self.budgets.get(name),
+            }
+        return result
+
+
+def _iter_handlers(handlers) -> Iterator[BaseHandler]:
+    """Хендлеры, включая вложенные в ConversationHandler"""
+    for handler in handlers:
+        if isinstance(handler, ConversationHandler):
+            yield from _iter_handlers(handler.entry_points)
+            for state_handlers in handler.states.values():
+                yield from _iter_handlers(state_handlers)
+            yield from _iter_handlers(handler.fallbacks)
+        else:
+            yield handler
+
+
+def _instrumented(callback: Callable, metrics: HandlerMetrics) -> Callable:
+    name = handler_name(callback)
+    # Тексты запросов нужны только для отчёта о превышении бюджета
+    capture = name in metrics.budgets
+
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        with count_queries(capture=capture) as counter:
+            started = time.perf_counter()
+            try:
+                return await callback(update, context)
+            finally:
+                metrics.record(
+                    name, time.perf_counter() - started, counter.count,
+                    counter.db_time, counter.statements
+                )
+
+    return wrapper
+
+
+def instrument_handlers(application: Application, metrics: HandlerMetrics) -> None:
+    """
+    Замерять все хендлеры Application
+
+    Повторный вызов не оборачивает callback второй раз.
+    """
+    for group_handlers in application.handlers.values():
+        for handler in _iter_handlers(group_handlers):
+            if not hasattr(handler.callback, '__wrapped__'):
+                handler.callback = _instrumented(handler.callback, metrics)
@@ -0,0 +1,82 @@
+# bot/utils/pagination.py
+"""
+Курсоры постраничного вывода в callback_data
+
+Курсор книги - (created_at, id) (см. crud.book_cursor).
+В callback_data он кодируется компактно, чтобы уложиться в 64 байта:
+    created_at - микросекунды от эпохи в base36
+    id         - как есть
+
+Формат кнопок каталога:
+    category_{id}_page_{page}_{n|p}_{created_at}_{book_id}
+    n - следующая страница (книги после курсора)
+    p - предыдущая страница (книги перед курсором)
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from database.crud import BookCursor
+
+_EPOCH = datetime(1970, 1, 1)
+_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+# Направления перелистывания
+NEXT = 'n'
+PREV = 'p'
+
+
+def _to_base36(value: int) -> str:
+    if value == 0:
+        return '0'
+
+    digits = []
+    while value:
+        value, remainder = divmod(value, 36)
+        digits.append(_DIGITS[remainder])
+    return ''.join(reversed(digits))
+
+
+def encode_cursor(cursor: BookCursor) -> str:
+    """
+    Закодировать курсор для callback_data
+
+    Args:
+        cursor: (created_at, id)
+
+    Returns:
+        str: Строка вида '{created_at}_{id}'
+    """
+    created_at, book_id = cursor
+    micros = (created_at - _EPOCH) // timedelta(microseconds=1)
+    return f"{_to_base36(micros)}_{book_id}"
+
+
+def decode_cursor(created_at: str, book_id: str) -> BookCursor:
+    """
+    Раскодировать курсор из частей callback_data
+
+    Args:
+        created_at: created_at в base36
+        book_id: ID книги
+
+    Returns:
+        BookCursor: (created_at, id)
+    """
+    return _EPOCH + timedelta(microseconds=int(created_at, 36)), int(book_id)
+
+
+def parse_page_cursor(parts: list) -> Tuple[Optional[str], Optional[BookCursor]]:
+    """
+    Направление и курсор из хвоста callback_data
+
+    Args:
+        parts: Части callback_data после номера страницы
+            ([] или [direction, created_at, book_id])
+
+    Returns:
+        (направление, курсор) или (None, None), если курсора нет
+    """
+    if len(parts) == 3 and parts[0] in (NEXT, PREV):
+        return parts[0], decode_cursor(parts[1], parts[2])
+    return None, None
@@ -0,0 +1,85 @@
+# bot/utils/progress.py
+"""
+Сообщение о ходе долгой операции (импорт, массовые изменения)
+
+Одно сообщение, которое редактируется по мере работы.
+Telegram ограничивает частоту редактирования - промежуточные
+обновления отправляются не чаще раза в interval секунд.
+
+Использование:
+    status = await StatusMessage.send(update.message, "⏳ Начинаю...")
+    await status.update(f"Обработано: {count}")         # может быть пропущено
+    await status.update("✅ Готово", force=True)         # отправится всегда
+    await status.fail("❌ Ошибка записи в БД")            # итог при ошибке
+"""
+
+import logging
+import time
+from typing import Optional
+
+from telegram import Message, InlineKeyboardMarkup
+from telegram.error import BadRequest, RetryAfter, TelegramError
+
+logger = logging.getLogger(__name__)
+
+
+class StatusMessage:
+    """Редактируемое сообщение о ходе операции"""
+
+    def __init__(self, message: Message, interval: float = 2.0):
+        self.message = message
+        self.interval = interval
+        self._last_text = message.text
+        self._last_edit = time.monotonic()
+
+    @classmethod
+    async def send(cls, reply_to: Message, text: str, interval: float = 2.0) -> 'StatusMessage':
+        """Отправить сообщение-статус в ответ на reply_to"""
+        message = await reply_to.reply_text(text, parse_mode='HTML')
+        return cls(message, interval)
+
+    async def update(
+            self,
+            text: str,
+            force: bool = False,
+            reply_markup: Optional[InlineKeyboardMarkup] = None
+    ) -> None:
+        """
+        Обновить текст
+
+        Args:
+            text: Новый текст (HTML)
+            force: Отправить, даже если interval ещё не прошёл (итог операции)
+            reply_markup: Кнопки
+        """
+        if text == self._last_text and reply_markup is None:
+            return
+        if not force and time.monotonic() - self._last_edit < self.interval:
+            return
+
+        try:
+            await self.message.edit_text(text, parse_mode='HTML', reply_markup=reply_markup)
+        except RetryAfter as e:
+            # Промежуточное обновление можно пропустить, итог - нет
+            if not force:
+                logger.debug(f"Status update skipped: retry after {e.retry_after}s")
+                return
+            raise
+        except BadRequest as e:
+            if 'not modified' not in str(e).lower():
+                raise
+
+        self._last_text = text
+        self._last_edit = time.monotonic()
+
+    async def fail(self, text: str) -> None:
+        """
+        Итог операции, завершившейся ошибкой
+
+        Отправляется всегда; если и сообщение не отредактировать -
+        ошибка Telegram только логируется, чтобы не скрыть исходную.
+        """
+        try:
+            await self.update(text, force=True)
+        except TelegramError as e:
+            logger.warning(f"Status failure message not sent: {e}")
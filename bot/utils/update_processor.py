@@ -0,0 +1,97 @@
+# bot/utils/update_processor.py
+"""
+Обработчик апдейтов с единицей работы БД
+
+Каждый апдейт Telegram обрабатывается внутри unit of work
+(database/unit_of_work.py): все вызовы async_crud во всех хендлерах
+этого апдейта идут через одну сессию и транзакцию.
+
+Транзакция фиксируется перед каждым запросом к Bot API
+(CommitBeforeSendRequest) и в конце апдейта: ответ пользователю уходит
+только после COMMIT - если он не удался, запрос не отправляется,
+а ошибка попадает в error handler бота. Соединение с БД при этом
+не занято, пока бот ждёт ответа Telegram.
+
+Задачи JobQueue (уведомления) выполняются вне апдейтов
+(unit_of_work.without_unit_of_work) и открывают сессию на каждый вызов.
+"""
+
+from typing import Awaitable, Any, Optional, Tuple
+
+from telegram.ext import BaseUpdateProcessor
+from telegram.request import BaseRequest, RequestData
+
+from config.settings import DB_UNIT_OF_WORK
+from database.unit_of_work import current_unit_of_work, unit_of_work
+
+
+class UnitOfWorkUpdateProcessor(BaseUpdateProcessor):
+    """
+    Update processor: одна транзакция БД на апдейт
+
+    Args:
+        max_concurrent_updates: Сколько апдейтов обрабатывать одновременно
+            (1 - последовательно)
+    """
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        if not DB_UNIT_OF_WORK:
+            await coroutine
+            return
+
+        name = str(getattr(update, 'update_id', ''))
+        async with unit_of_work(name):
+            await coroutine
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+
+class CommitBeforeSendRequest(BaseRequest):
+    """
+    Запросы к Bot API: сначала COMMIT транзакции апдейта, потом запрос
+
+    Обёртка над запросами бота (HTTPXRequest или любым другим BaseRequest).
+    Вне единицы работы (задачи JobQueue, getUpdates) запрос уходит как есть.
+
+    Args:
+        request: Запросы, которые выполняют HTTP
+    """
+
+    def __init__(self, request: BaseRequest):
+        self.request = request
+
+    @property
+    def read_timeout(self) -> Optional[float]:
+        return self.request.read_timeout
+
+    async def initialize(self) -> None:
+        await self.request.initialize()
+
+    async def shutdown(self) -> None:
+        await self.request.shutdown()
+
+    async def do_request(
+            self,
+            url: str,
+            method: str,
+            request_data: Optional[RequestData] = None,
+            read_timeout=BaseRequest.DEFAULT_NONE,
+            write_timeout=BaseRequest.DEFAULT_NONE,
+            connect_timeout=BaseRequest.DEFAULT_NONE,
+            pool_timeout=BaseRequest.DEFAULT_NONE
+    ) -> Tuple[int, bytes]:
+        uow = current_unit_of_work()
+        if uow is not None:
+            await uow.commit()
+
+        return await self.request.do_request(
+            url, method, request_data,
+            read_timeout=read_timeout,
+            write_timeout=write_timeout,
+            connect_timeout=connect_timeout,
+            pool_timeout=pool_timeout
+        )
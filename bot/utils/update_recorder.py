@@ -0,0 +1,261 @@
+# bot/utils/update_recorder.py
+"""
+Запись входящих апдейтов для воспроизведения (benchmarks/replay.py)
+
+При UPDATE_RECORD_DIR каждый апдейт пишется строкой JSON
+{"ts": время получения, "update": апдейт} в сжатый файл
+updates-ГГГГММДД-ЧЧММСС.jsonl.gz. Файл больше UPDATE_RECORD_MAX_MB
+закрывается и начинается новый; хранятся UPDATE_RECORD_KEEP последних.
+
+Апдейты обезличиваются:
+- Telegram ID пользователей и чатов заменяются псевдонимами
+  (HMAC: один пользователь - один псевдоним во всех файлах)
+- Имена, username, телефоны, контакты и геопозиция удаляются
+- В тексте цифры телефонов и email-адреса маскируются
+  (длина сохраняется - entities остаются верными)
+- Текст и подпись сообщений бота (callback_query.message, ответы
+  с from.is_bot) удаляются целиком: в них имена из ответов
+  ("Привет, Анна!"), для воспроизведения они не нужны
+
+Сериализация, сжатие и запись - в отдельном потоке: хендлер
+только кладёт апдейт в очередь.
+"""
+
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import queue
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from telegram import Update
+from telegram.ext import Application, ContextTypes, TypeHandler
+
+from config.settings import (
+    BOT_TOKEN,
+    UPDATE_RECORD_DIR,
+    UPDATE_RECORD_MAX_MB,
+    UPDATE_RECORD_KEEP,
+    UPDATE_RECORD_SALT,
+)
+
+logger = logging.getLogger(__name__)
+
+FILE_PATTERN = 'updates-*.jsonl.gz'
+
+# Объекты User / Chat внутри апдейта
+PERSON_KEYS = {'from', 'user', 'chat', 'sender_chat', 'forward_from', 'forward_from_chat'}
+
+# Поля, которые не записываются
+DROPPED_KEYS = {
+    'last_name', 'username', 'bio', 'phone_number', 'contact',
+    'location', 'venue', 'photo_url', 'active_usernames',
+}
+
+# Поля сообщений бота, которые не записываются
+BOT_MESSAGE_DROPPED_KEYS = {'text', 'caption', 'entities', 'caption_entities'}
+
+PHONE_RE = re.compile(r'\+?\d[\d\s\-()]{6,}\d')
+EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+')
+
+
+# ОБЕЗЛИЧИВАНИЕ
+
+def pseudonym(telegram_id: int, salt: bytes) -> int:
+    """
+    Псевдоним Telegram ID: тот же знак (группы отрицательные),
+    значение в диапазоне INTEGER колонки users.telegram_id
+    """
+    digest = hmac.new(salt, str(abs(telegram_id)).encode(), hashlib.sha256).digest()
+    value = 1_000_000_000 + int.from_bytes(digest[:8], 'big') % 1_000_000_000
+    return -value if telegram_id < 0 else value
+
+
+def _mask(match: re.Match, fill: str) -> str:
+    return re.sub(r'\w', fill, match.group())
+
+
+def mask_text(text: str) -> str:
+    """Скрыть телефоны и email, сохранив длину"""
+    text = PHONE_RE.sub(lambda match: _mask(match, '0'), text)
+    return EMAIL_RE.sub(lambda match: _mask(match, 'x'), text)
+
+
+def _is_bot_message(data: dict) -> bool:
+    author = data.get('from')
+    return isinstance(author, dict) and author.get('is_bot') is True
+
+
+def anonymize(data: Any, salt: bytes, bot_message: bool = False) -> Any:
+    """
+    Обезличить JSON апдейта (см. описание модуля)
+
+    Args:
+        data: Update.to_dict() или его часть
+        salt: Ключ псевдонимов
+        bot_message: data - сообщение бота (даже без from.is_bot)
+
+    Returns:
+        Новый JSON (исходный не меняется)
+    """
+    if isinstance(data, list):
+        return [anonymize(item, salt) for item in data]
+    if not isinstance(data, dict):
+        return data
+
+    bot_message = bot_message or _is_bot_message(data)
+
+    result = {}
+    for key, value in data.items():
+        if key in DROPPED_KEYS:
+            continue
+        if bot_message and key in BOT_MESSAGE_DROPPED_KEYS:
+            continue
+
+        if key in PERSON_KEYS and isinstance(value, dict):
+            person = anonymize(value, salt)
+            if 'id' in person:
+                person['id'] = pseudonym(person['id'], salt)
+                if 'first_name' in person:
+                    person['first_name'] = f"User {person['id'] % 10_000}"
+                if 'title' in person:
+                    person['title'] = f"Chat {person['id'] % 10_000}"
+            result[key] = person
+        elif key == 'message' and 'chat_instance' in data and isinstance(value, dict):
+            # Сообщение с кнопкой у callback_query - всегда сообщение бота
+            result[key] = anonymize(value, salt, bot_message=True)
+        elif key in ('text', 'caption', 'query') and isinstance(value, str):
+            result[key] = mask_text(value)
+        else:
+            result[key] = anonymize(value, salt)
+
+    return result
+
+
+# ЗАПИСЬ
+
+class UpdateRecorder:
+    """
+    Запись апдейтов в сжатые файлы с ротацией
+
+    Args:
+        directory: Каталог для файлов
+        max_bytes: Размер файла, после которого начинается новый
+        keep: Сколько последних файлов хранить
+        salt: Ключ псевдонимов
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, keep: int, salt: bytes):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.salt = salt
+
+        self.recorded = 0
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._raw = None
+        self._file: Optional[gzip.GzipFile] = None
+        self._thread = threading.Thread(target=self._run, name='update-recorder', daemon=True)
+
+    def start(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._thread.start()
+        logger.info(f"Recording updates to {self.directory}")
+
+    async def record(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Хендлер TypeHandler: апдейт - в очередь записи"""
+        self._queue.put((time.time(), update))
+
+    def close(self) -> None:
+        """Дописать очередь и закрыть файл"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        logger.info(f"Update recorder stopped: {self.recorded} updates recorded")
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            received_at, update = item
+            try:
+                line = json.dumps(
+                    {'ts': round(received_at, 3), 'update': anonymize(update.to_dict(), self.salt)},
+                    ensure_ascii=False
+                )
+                self._write(line + '\n')
+                self.recorded += 1
+            except Exception as e:
+                logger.error(f"Error recording update: {e}")
+
+        self._close_file()
+
+    def _write(self, line: str) -> None:
+        if self._file is None:
+            self._open_file()
+
+        self._file.write(line.encode())
+
+        # Сжатые данные сбрасываются блоками - размер файла приблизительный
+        if self._raw.tell() >= self.max_bytes:
+            self._close_file()
+
+    def _open_file(self) -> None:
+        name = time.strftime('updates-%Y%m%d-%H%M%S', time.localtime())
+        path = self.directory / f"{name}.jsonl.gz"
+        number = 1
+        while path.exists():
+            path = self.directory / f"{name}-{number}.jsonl.gz"
+            number += 1
+
+        self._raw = open(path, 'wb')
+        self._file = gzip.GzipFile(fileobj=self._raw, mode='wb')
+
+        for old_path in sorted(self.directory.glob(FILE_PATTERN))[:-self.keep]:
+            old_path.unlink()
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._raw.close()
+            self._file = self._raw = None
+
+
+_recorder: Optional[UpdateRecorder] = None
+
+
+def setup_recorder(application: Application) -> None:
+    """
+    Включить запись апдейтов, если задан UPDATE_RECORD_DIR
+
+    Хендлер регистрируется в группе -1: видит каждый апдейт
+    и не мешает основным хендлерам (группа 0).
+    """
+    global _recorder
+    if not UPDATE_RECORD_DIR:
+        return
+
+    salt = (UPDATE_RECORD_SALT or BOT_TOKEN).encode()
+    _recorder = UpdateRecorder(
+        Path(UPDATE_RECORD_DIR),
+        max_bytes=int(UPDATE_RECORD_MAX_MB * 1024 * 1024),
+        keep=max(UPDATE_RECORD_KEEP, 1),
+        salt=hashlib.sha256(b'update-recorder:' + salt).digest()
+    )
+    _recorder.start()
+    application.add_handler(TypeHandler(Update, _recorder.record), group=-1)
+
+
+def shutdown_recorder() -> None:
+    """Остановить запись (дописать очередь и закрыть файл)"""
+    global _recorder
+    if _recorder is not None:
+        _recorder.close()
+        _recorder = None
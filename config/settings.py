@@ -10,6 +10,7 @@ import os
 import logging
 import logging.config
 from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
 from typing import List
 
 load_dotenv()
@@ -20,6 +21,10 @@ BOT_TOKEN = os.getenv("BOT_TOKEN")
 if not BOT_TOKEN:
     raise ValueError("BOT_TOKEN not found in .env file!")
 
+# Адрес Bot API (пусто - api.telegram.org). Для тестов производительности -
+# локальная замена: python -m benchmarks.bot_api_server (http://127.0.0.1:8081)
+BOT_API_URL = os.getenv("BOT_API_URL", "").rstrip('/')
+
 # DATABASE SETTINGS
 
 DATABASE_URL = os.getenv('DATABASE_URL')
@@ -44,6 +49,56 @@ else:
 
     logger.info(f"✅ Database config: {DB_HOST}:{DB_PORT}/{DB_NAME}")
 
+# Асинхронный драйвер (asyncpg) для хендлеров бота.
+# По умолчанию строится из DATABASE_URL
+ASYNC_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL')
+if not ASYNC_DATABASE_URL:
+    _async_url = make_url(DATABASE_URL).set(drivername='postgresql+asyncpg')
+
+    # sslmode=require (psycopg2 / libpq, так в URL Railway и Heroku) у asyncpg - ssl=require
+    _query = dict(_async_url.query)
+    if 'sslmode' in _query:
+        _query['ssl'] = _query.pop('sslmode')
+
+    ASYNC_DATABASE_URL = _async_url.set(query=_query).render_as_string(hide_password=False)
+
+# DATABASE POOL SETTINGS
+
+# queue - пул соединений (по умолчанию)
+# null  - без пула, новое соединение на каждый запрос (serverless хостинги)
+DB_POOL_MODE = os.getenv('DB_POOL_MODE', 'queue').lower()
+if DB_POOL_MODE not in ('queue', 'null'):
+    raise ValueError(f"Unknown DB_POOL_MODE: {DB_POOL_MODE} (expected 'queue' or 'null')")
+
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))       # секунды ожидания свободного соединения
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))     # пересоздавать соединения старше N секунд
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+
+# ASYNC CRUD SETTINGS
+
+# Как хендлеры выполняют запросы к БД (database/async_crud.py):
+# asyncpg    - AsyncSession на асинхронном драйвере (по умолчанию)
+# threadpool - синхронный crud в пуле потоков (database/offload.py)
+CRUD_ASYNC_BACKEND = os.getenv('CRUD_ASYNC_BACKEND', 'asyncpg').lower()
+if CRUD_ASYNC_BACKEND not in ('asyncpg', 'threadpool'):
+    raise ValueError(
+        f"Unknown CRUD_ASYNC_BACKEND: {CRUD_ASYNC_BACKEND} (expected 'asyncpg' or 'threadpool')"
+    )
+
+# Размер пула потоков (0 - по размеру пула соединений)
+CRUD_THREADS = int(os.getenv('CRUD_THREADS', '0'))
+# Таймаут одного вызова в пуле потоков, секунд (0 - без таймаута)
+CRUD_CALL_TIMEOUT = float(os.getenv('CRUD_CALL_TIMEOUT', '15'))
+
+# Одна транзакция на апдейт Telegram (database/unit_of_work.py)
+DB_UNIT_OF_WORK = os.getenv('DB_UNIT_OF_WORK', 'true').lower() in ('1', 'true', 'yes')
+# Уровень изоляции этой транзакции (пусто - по умолчанию сервера).
+# REPEATABLE READ - один снимок данных между ответами пользователю
+# (перед каждым запросом к Bot API транзакция фиксируется)
+DB_UOW_ISOLATION = os.getenv('DB_UOW_ISOLATION', 'REPEATABLE READ').upper()
+
 # ADMIN SETTINGS
 
 ADMIN_IDS_STR = os.getenv("ADMIN_IDS", "")
@@ -58,6 +113,44 @@ ADMIN_IDS: List[int] = [
 BOOKS_PER_PAGE = int(os.getenv("BOOKS_PER_PAGE", "5"))
 REMINDER_DAYS_BEFORE = int(os.getenv("REMINDER_DAYS_BEFORE", "1"))
 
+# Откуда брать общую статистику (crud.get_database_stats):
+# query    - один агрегирующий запрос по таблицам (по умолчанию)
+# counters - таблица stats_counters, которую поддерживают триггеры
+STATS_SOURCE = os.getenv("STATS_SOURCE", "query").lower()
+if STATS_SOURCE not in ('query', 'counters'):
+    raise ValueError(f"Unknown STATS_SOURCE: {STATS_SOURCE} (expected 'query' or 'counters')")
+
+# Где искать книги (crud.search_books):
+# postgres - полнотекстовый поиск в БД (по умолчанию)
+# memory   - индекс в памяти процесса (database/search_index.py), без запросов к БД
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "postgres").lower()
+if SEARCH_BACKEND not in ('postgres', 'memory'):
+    raise ValueError(f"Unknown SEARCH_BACKEND: {SEARCH_BACKEND} (expected 'postgres' or 'memory')")
+
+# Inline-режим (@bot запрос): ответы из индекса в памяти.
+# Выключен по умолчанию: индекс держит весь каталог в памяти,
+# и режим нужно включить у @BotFather (/setinline)
+INLINE_MODE = os.getenv("INLINE_MODE", "false").lower() in ('1', 'true', 'yes')
+# Сколько секунд Telegram кеширует ответ на одинаковый inline запрос
+INLINE_CACHE_TIME = int(os.getenv("INLINE_CACHE_TIME", "300"))
+
+# Нечёткий поиск (pg_trgm), если точный ничего не нашёл:
+# минимальная похожесть слова запроса на название/автора (0..1)
+SEARCH_TRGM_THRESHOLD = float(os.getenv("SEARCH_TRGM_THRESHOLD", "0.5"))
+
+# Сколько апдейтов обрабатывать одновременно (0 - последовательно)
+CONCURRENT_UPDATES = int(os.getenv("CONCURRENT_UPDATES", "0"))
+
+# Запись входящих апдейтов для воспроизведения (bot/utils/update_recorder.py):
+# каталог для файлов updates-*.jsonl.gz (пусто - запись выключена)
+UPDATE_RECORD_DIR = os.getenv("UPDATE_RECORD_DIR", "")
+# Новый файл, когда текущий превысил размер (МБ, сжатый)
+UPDATE_RECORD_MAX_MB = float(os.getenv("UPDATE_RECORD_MAX_MB", "50"))
+# Сколько последних файлов хранить
+UPDATE_RECORD_KEEP = int(os.getenv("UPDATE_RECORD_KEEP", "48"))
+# Ключ псевдонимов Telegram ID (по умолчанию - от BOT_TOKEN)
+UPDATE_RECORD_SALT = os.getenv("UPDATE_RECORD_SALT", "")
+
 # LOGGING SETTINGS
 
 LOGGING_CONFIG = {
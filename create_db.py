@@ -6,7 +6,7 @@
 """
 
 from database.connection import create_tables, test_connection, engine
-from database.models import User, Category, Book, Booking
+from database.models import User, Category, Book, Booking, StatsCounter
 
 
 def main():
@@ -29,7 +29,8 @@ def main():
         ("users", "Пользователи бота"),
         ("categories", "Категории книг"),
         ("books", "Каталог книг"),
-        ("bookings", "Брони пользователей")
+        ("bookings", "Брони пользователей"),
+        ("stats_counters", "Счётчики статистики")
     ]
 
     for table_name, description in tables:
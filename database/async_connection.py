@@ -0,0 +1,83 @@
+# database/async_connection.py
+
+"""
+Асинхронное подключение к PostgreSQL (asyncpg)
+
+Используется хендлерами бота через database/async_crud.py,
+чтобы запросы к БД не блокировали event loop.
+Синхронный движок (database/connection.py) остаётся для скриптов.
+"""
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+import logging
+
+from config.settings import ASYNC_DATABASE_URL, DB_POOL_MODE
+from database.connection import PoolStats, _InstrumentedPoolMixin, pool_options, describe_pool
+
+logger = logging.getLogger(__name__)
+
+# POOL
+
+async_pool_stats = PoolStats()
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    stats = async_pool_stats
+
+
+class InstrumentedAsyncNullPool(_InstrumentedPoolMixin, NullPool):
+    stats = async_pool_stats
+
+# ENGINE
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=False,
+    connect_args={
+        "timeout": 10,
+        "server_settings": {"timezone": "utc"}
+    },
+    **pool_options(InstrumentedAsyncQueuePool, InstrumentedAsyncNullPool)
+)
+
+
+@event.listens_for(async_engine.sync_engine, 'connect')
+def _on_connect(dbapi_connection, connection_record):
+    async_pool_stats.record_connect()
+
+
+@event.listens_for(async_engine.sync_engine, 'checkin')
+def _on_checkin(dbapi_connection, connection_record):
+    async_pool_stats.record_checkin()
+
+
+logger.info(f"Async database engine created (pool: {DB_POOL_MODE})")
+
+# SESSION MAKER
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False
+)
+
+# FUNCTIONS
+
+def get_async_pool_stats() -> dict:
+    """
+    Получить статистику пула асинхронного движка
+
+    Returns:
+        dict: Те же поля, что и connection.get_pool_stats()
+    """
+    stats = {'mode': DB_POOL_MODE}
+    stats.update(describe_pool(async_engine.pool, async_pool_stats))
+    return stats
+
+
+async def dispose_async_engine():
+    """Закрыть все соединения пула (при остановке бота)"""
+    await async_engine.dispose()
+    logger.info("Async database engine disposed")
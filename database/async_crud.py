@@ -0,0 +1,254 @@
+# database/async_crud.py
+"""
+Асинхронные CRUD операции для хендлеров бота
+
+Те же функции, что и в database/crud.py, но запросы идут через
+AsyncSession (asyncpg) и не блокируют event loop бота.
+
+Как это работает:
+- открывается AsyncSession
+- синхронная функция из crud выполняется через AsyncSession.run_sync
+- на это время crud.get_session() возвращает синхронную сессию
+  поверх асинхронного соединения (crud.bind_session)
+
+Так логика запросов остаётся в одном месте - database/crud.py,
+а синхронный API по-прежнему доступен для seed_db.py / create_db.py.
+
+При CRUD_ASYNC_BACKEND=threadpool функции вместо этого выполняются
+в пуле потоков (database/offload.py) на синхронном движке.
+
+Внутри unit of work (database/unit_of_work.py) все вызовы используют
+одну сессию и одну транзакцию текущего апдейта; после её завершения -
+снова отдельные сессии.
+
+Использование:
+    from database import async_crud
+    user = await async_crud.get_user_by_telegram_id(telegram_id)
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+from typing import Any, Awaitable, Callable, TypeVar
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from config.settings import CRUD_ASYNC_BACKEND, CRUD_CALL_TIMEOUT, SEARCH_BACKEND
+from database import crud, search_index
+from database.async_connection import AsyncSessionLocal
+from database.offload import offload_stats, run_in_thread
+from database.unit_of_work import UnitOfWork, current_unit_of_work
+
+logger = logging.getLogger(__name__)
+
+# Сколько раз повторить вызов, открывший транзакцию, при ошибке сериализации
+SERIALIZATION_RETRIES = 3
+
+T = TypeVar('T')
+
+# HELPER FUNCTIONS
+
+def _call_bound(
+        session: Session,
+        context: contextvars.Context,
+        func: Callable[..., T],
+        args: tuple,
+        kwargs: dict
+) -> T:
+    """Вызвать CRUD функцию в переданной сессии (внутри run_sync)"""
+    def call() -> T:
+        with crud.bind_session(session):
+            return func(*args, **kwargs)
+
+    # run_sync выполняет код в отдельном greenlet, у которого свой (пустой)
+    # контекст - переносим контекст вызывающей корутины
+    return context.run(call)
+
+
+async def run(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Выполнить синхронную CRUD функцию через AsyncSession
+    (или в пуле потоков при CRUD_ASYNC_BACKEND=threadpool)
+
+    Args:
+        func: Функция из database/crud.py
+        *args, **kwargs: Её аргументы
+
+    Returns:
+        Результат функции
+    """
+    uow = current_unit_of_work()
+    if uow is not None:
+        return await _run_in_unit_of_work(uow, func, args, kwargs)
+
+    return await _run_in_own_session(func, args, kwargs)
+
+
+async def _run_in_own_session(func: Callable[..., T], args: tuple, kwargs: dict) -> T:
+    """Выполнить CRUD функцию в отдельной сессии (вне unit of work)"""
+    if CRUD_ASYNC_BACKEND == 'threadpool':
+        return await run_in_thread(func, *args, **kwargs)
+
+    async with AsyncSessionLocal() as session:
+        return await session.run_sync(
+            _call_bound, contextvars.copy_context(), func, args, kwargs
+        )
+
+
+async def _run_in_unit_of_work(
+        uow: UnitOfWork,
+        func: Callable[..., T],
+        args: tuple,
+        kwargs: dict
+) -> T:
+    """Выполнить CRUD функцию в транзакции текущего апдейта"""
+    async with uow.lock:
+        if not uow.closed:
+            uow.calls += 1
+            for attempt in range(SERIALIZATION_RETRIES + 1):
+                # Вызов начинает транзакцию - при ошибке сериализации его
+                # можно повторить в новой, ничего другого она не содержит
+                first = not uow.started
+                try:
+                    return await _call_in_unit_of_work(uow, func, args, kwargs)
+                except DBAPIError as e:
+                    if not (first and _is_serialization_failure(e)) or attempt == SERIALIZATION_RETRIES:
+                        uow.failed = True
+                        raise
+                    logger.info(f"Serialization failure in {func.__name__}, retrying in a new transaction")
+                    await uow.restart()
+                except BaseException:
+                    # Транзакция апдейта будет откатана целиком
+                    uow.failed = True
+                    raise
+
+    # Апдейт завершился, пока вызов ждал очереди (задача, созданная
+    # из хендлера) - его транзакции уже нет, вызов идёт в своей сессии
+    return await _run_in_own_session(func, args, kwargs)
+
+
+async def _call_in_unit_of_work(
+        uow: UnitOfWork,
+        func: Callable[..., T],
+        args: tuple,
+        kwargs: dict
+) -> T:
+    if CRUD_ASYNC_BACKEND != 'threadpool':
+        session = await uow.get_async_session()
+        return await session.run_sync(
+            _call_bound, contextvars.copy_context(), func, args, kwargs
+        )
+
+    session = await uow.get_sync_session()
+    # Таймаут не прерывает поток: он продолжит работать с сессией апдейта.
+    # Поэтому вызов не отменяется, а передаётся единице работы - её
+    # транзакция откатится только после того, как поток закончит
+    call = asyncio.ensure_future(run_in_thread(
+        _call_bound, session, contextvars.copy_context(), func, args, kwargs, timeout=0
+    ))
+    try:
+        return await asyncio.wait_for(asyncio.shield(call), CRUD_CALL_TIMEOUT or None)
+    except asyncio.TimeoutError:
+        offload_stats.record_timeout()
+        logger.error(f"CRUD call {func.__name__} timed out after {CRUD_CALL_TIMEOUT}s")
+        uow.abandon(call)
+        raise
+    except asyncio.CancelledError:
+        uow.abandon(call)
+        raise
+
+
+def _is_serialization_failure(error: DBAPIError) -> bool:
+    """Ошибка сериализации (40001) или взаимоблокировка (40P01)"""
+    code = getattr(error.orig, 'pgcode', None) or getattr(error.orig, 'sqlstate', None)
+    return code in ('40001', '40P01')
+
+
+def _async(func: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    """Асинхронный двойник CRUD функции"""
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await run(func, *args, **kwargs)
+
+    return wrapper
+
+# USER CRUD
+
+create_user = _async(crud.create_user)
+get_user_by_telegram_id = _async(crud.get_user_by_telegram_id)
+get_user_by_id = _async(crud.get_user_by_id)
+update_user_genres = _async(crud.update_user_genres)
+toggle_user_notifications = _async(crud.toggle_user_notifications)
+get_all_users_with_notifications = _async(crud.get_all_users_with_notifications)
+get_recent_users = _async(crud.get_recent_users)
+get_users_count = _async(crud.get_users_count)
+delete_user = _async(crud.delete_user)
+
+# CATEGORY CRUD
+
+create_category = _async(crud.create_category)
+get_all_categories = _async(crud.get_all_categories)
+get_category_by_id = _async(crud.get_category_by_id)
+get_category_by_name = _async(crud.get_category_by_name)
+update_category = _async(crud.update_category)
+delete_category = _async(crud.delete_category)
+get_categories_count = _async(crud.get_categories_count)
+get_categories_with_counts = _async(crud.get_categories_with_counts)
+
+# BOOK CRUD
+
+create_book = _async(crud.create_book)
+upsert_books = _async(crud.upsert_books)
+get_book_by_id = _async(crud.get_book_by_id)
+get_books_by_category = _async(crud.get_books_by_category)
+get_books_count_by_category = _async(crud.get_books_count_by_category)
+get_category_page = _async(crud.get_category_page)
+get_all_books = _async(crud.get_all_books)
+
+
+async def search_books(query_text: str, limit: int = 20) -> list:
+    """
+    Асинхронный двойник crud.search_books
+
+    При SEARCH_BACKEND=memory отвечает индекс в памяти сразу,
+    не открывая сессию и не занимая соединение из пула. Результат -
+    записи IndexedBook (только поля для вывода, без связей).
+    """
+    if SEARCH_BACKEND == 'memory' and search_index.is_ready():
+        return search_index.search(query_text, limit=limit)
+
+    return await run(crud.search_books, query_text, limit=limit)
+
+
+search_books_fuzzy = _async(crud.search_books_fuzzy)
+get_books_by_genres = _async(crud.get_books_by_genres)
+get_new_books = _async(crud.get_new_books)
+update_book = _async(crud.update_book)
+update_book_photo = _async(crud.update_book_photo)
+remove_book_photo = _async(crud.remove_book_photo)
+update_books_photos = _async(crud.update_books_photos)
+bulk_update_books = _async(crud.bulk_update_books)
+toggle_books_availability = _async(crud.toggle_books_availability)
+delete_book = _async(crud.delete_book)
+delete_books = _async(crud.delete_books)
+get_books_count = _async(crud.get_books_count)
+
+# BOOKING CRUD
+
+create_booking = _async(crud.create_booking)
+get_booking_by_id = _async(crud.get_booking_by_id)
+get_user_bookings = _async(crud.get_user_bookings)
+get_all_bookings = _async(crud.get_all_bookings)
+cancel_booking = _async(crud.cancel_booking)
+complete_booking = _async(crud.complete_booking)
+get_active_booking = _async(crud.get_active_booking)
+get_bookings_count = _async(crud.get_bookings_count)
+get_bookings_for_reminder = _async(crud.get_bookings_for_reminder)
+
+# STATISTICS
+
+get_database_stats = _async(crud.get_database_stats)
+get_counters_stats = _async(crud.get_counters_stats)
+compact_stats_counters = _async(crud.compact_stats_counters)
@@ -10,31 +10,166 @@ from pathlib import Path
 ROOT_DIR = Path(__file__).parent.parent
 sys.path.insert(0, str(ROOT_DIR))
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from contextlib import contextmanager
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import NullPool, QueuePool
 import logging
+import threading
+import time
 
-from config.settings import DATABASE_URL
+from config.settings import (
+    DATABASE_URL,
+    DB_POOL_MODE,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+)
 
 logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
+# POOL STATISTICS
+
+class PoolStats:
+    """
+    Счётчики работы пула соединений
+
+    Attributes:
+        checkouts: Сколько раз соединение выдавалось из пула
+        checkins: Сколько раз соединение возвращалось в пул
+        connects: Сколько новых соединений открыто к PostgreSQL
+        timeouts: Сколько раз не дождались свободного соединения
+        wait_total: Суммарное время ожидания соединения (сек)
+        wait_max: Максимальное время ожидания соединения (сек)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Обнулить счётчики"""
+        with self._lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.connects = 0
+            self.timeouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+
+    def record_checkout(self, wait: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_checkin(self):
+        with self._lock:
+            self.checkins += 1
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'connects': self.connects,
+                'timeouts': self.timeouts,
+                'wait_total_ms': round(self.wait_total * 1000, 2),
+                'wait_avg_ms': round(self.wait_total / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+                'wait_max_ms': round(self.wait_max * 1000, 2),
+            }
+
+
+pool_stats = PoolStats()
+
+
+class _InstrumentedPoolMixin:
+    """Замеряет время выдачи соединения (ожидание в очереди + подключение)"""
+
+    stats: PoolStats
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record_checkout(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    stats = pool_stats
+
+
+class InstrumentedNullPool(_InstrumentedPoolMixin, NullPool):
+    stats = pool_stats
+
+
+def pool_options(queue_pool_class=InstrumentedQueuePool, null_pool_class=InstrumentedNullPool) -> dict:
+    """
+    Параметры пула для create_engine из настроек
+
+    DB_POOL_MODE=null оставляет поведение без пула (Railway/Render serverless):
+    каждое обращение открывает новое соединение.
+
+    Args:
+        queue_pool_class: Класс пула для режима queue
+        null_pool_class: Класс пула для режима null
+
+    Returns:
+        dict: Аргументы для create_engine / create_async_engine
+    """
+    if DB_POOL_MODE == 'null':
+        return {'poolclass': null_pool_class}
+
+    return {
+        'poolclass': queue_pool_class,
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING,
+    }
+
 # ENGINE
 
 engine = create_engine(
     DATABASE_URL,
-    poolclass=NullPool,  # Важно для Railway/Render
     echo=False,
     connect_args={
         "connect_timeout": 10,
         "options": "-c timezone=utc"
-    }
+    },
+    **pool_options()
 )
 
-logger.info("Database engine created")
+
+@event.listens_for(engine, 'connect')
+def _on_connect(dbapi_connection, connection_record):
+    pool_stats.record_connect()
+
+
+@event.listens_for(engine, 'checkin')
+def _on_checkin(dbapi_connection, connection_record):
+    pool_stats.record_checkin()
+
+
+logger.info(f"Database engine created (pool: {DB_POOL_MODE})")
 
 # SESSION MAKER
 
@@ -68,6 +203,41 @@ def get_session() -> Session:
     finally:
         session.close()
 
+def describe_pool(pool, stats: PoolStats) -> dict:
+    """
+    Счётчики пула + его текущее состояние (для QueuePool)
+
+    Args:
+        pool: Пул движка (engine.pool)
+        stats: Счётчики этого пула
+
+    Returns:
+        dict: Статистика пула
+    """
+    description = stats.to_dict()
+
+    if isinstance(pool, QueuePool):
+        description.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow(),
+            'idle': pool.checkedin(),
+        })
+
+    return description
+
+def get_pool_stats() -> dict:
+    """
+    Получить статистику пула соединений
+
+    Returns:
+        dict: Счётчики выдачи/возврата соединений, время ожидания
+              и текущее состояние пула (для DB_POOL_MODE=queue)
+    """
+    stats = {'mode': DB_POOL_MODE}
+    stats.update(describe_pool(engine.pool, pool_stats))
+    return stats
+
 def test_connection() -> bool:
     """
     Проверить подключение к базе данных
@@ -77,7 +247,7 @@ def test_connection() -> bool:
     """
     try:
         with engine.connect() as connection:
-            connection.execute("SELECT 1")
+            connection.execute(text("SELECT 1"))
         logger.info("✅ Database connection successful")
         return True
     except Exception as e:
@@ -96,10 +266,14 @@ def create_tables():
     """
     try:
         # Импортируем модели чтобы они зарегистрировались в Base.metadata
-        from database.models import User, Category, Book, Booking
+        from database.models import User, Category, Book, Booking, StatsCounter
+        from database.migrations import run_migrations
 
         # Создаём все таблицы
         Base.metadata.create_all(bind=engine)
+
+        # Триггеры, индексы и прочее для уже существующих таблиц
+        run_migrations(engine)
         logger.info("✅ All tables created successfully")
         return True
     except Exception as e:
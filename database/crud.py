@@ -10,62 +10,158 @@ CRUD = Create, Read, Update, Delete
 - Book CRUD: create_book, get_books, search_books, etc.
 - Booking CRUD: create_booking, cancel_booking, etc.
 """
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func, desc, cast, String
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session, aliased, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import and_, or_, any_, func, desc, cast, literal, literal_column, select, text, true, tuple_, update, delete, column, Boolean, Float, Integer, String
+from sqlalchemy.dialects.postgresql import ARRAY, array, insert as pg_insert
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 from datetime import datetime, date, timedelta
-from typing import List, Optional, Tuple
+from typing import Callable, ContextManager, Dict, Iterator, List, Literal, Optional, Tuple, Union
+import functools
 import logging
+import re
 
+from config.settings import STATS_SOURCE, SEARCH_BACKEND, SEARCH_TRGM_THRESHOLD
+from database import search_index
 from database.connection import SessionLocal
-from database.models import User, Category, Book, Booking
+from database.models import User, Category, Book, Booking, StatsCounter
 
 logger = logging.getLogger(__name__)
 
 # HELPER FUNCTIONS
 
-def get_session() -> Session:
-    """Получить новую сессию БД"""
+# Сессия, к которой привязаны CRUD функции (см. bind_session)
+_bound_session: ContextVar[Optional[Session]] = ContextVar('bound_session', default=None)
+
+
+def get_session() -> ContextManager[Session]:
+    """
+    Получить сессию БД
+
+    Если сессия привязана через bind_session() - возвращается она
+    (закрывает её тот, кто привязал), иначе открывается новая.
+    """
+    session = _bound_session.get()
+    if session is not None:
+        return nullcontext(session)
     return SessionLocal()
 
+
+@contextmanager
+def bind_session(session: Session) -> Iterator[Session]:
+    """
+    Выполнять CRUD функции в указанной сессии
+
+    Используется в database/async_crud.py: туда передаётся
+    синхронная сессия поверх асинхронного соединения (AsyncSession.run_sync)
+
+    Использование:
+        with bind_session(session):
+            user = get_user_by_telegram_id(telegram_id)
+    """
+    token = _bound_session.set(session)
+    try:
+        yield session
+    finally:
+        _bound_session.reset(token)
+
+def after_commit(session: Session, callback: Callable[[], None]) -> None:
+    """
+    Выполнить callback после фиксации транзакции
+
+    Вызывается сразу после session.commit(). Если сессия принадлежит
+    unit of work (database/unit_of_work.py), её commit() ещё не настоящий -
+    тогда callback выполнится после COMMIT всей транзакции апдейта
+    (и не выполнится при ROLLBACK).
+    """
+    callbacks = session.info.get('after_commit')
+    if callbacks is not None:
+        callbacks.append(callback)
+    else:
+        callback()
+
+
+def commit_returning(session: Session, *objects) -> None:
+    """
+    Зафиксировать транзакцию, сохранив объекты, прочитанные из RETURNING
+
+    Объекты уже заполнены строкой из INSERT/UPDATE ... RETURNING -
+    отсоединяем их от сессии, чтобы commit() не сбросил атрибуты
+    и не понадобился лишний запрос refresh().
+    """
+    for obj in objects:
+        if obj is not None:
+            session.expunge(obj)
+    session.commit()
+
+
+def _update_returning(session: Session, model, condition, fields: dict):
+    """
+    UPDATE model SET fields WHERE condition RETURNING model
+
+    Returns:
+        Обновлённый объект или None, если строка не найдена
+    """
+    return session.execute(
+        update(model).where(condition).values(**fields).returning(model),
+        execution_options={'populate_existing': True, 'synchronize_session': False}
+    ).scalar_one_or_none()
+
+
 # USER CRUD
 
 def create_user(
         telegram_id: int,
         name: str,
         favorite_genres: Optional[List[str]] = None
-) -> User:
+) -> Tuple[User, bool]:
     """
         Создать или обновить пользователя
 
+        Один оператор INSERT ... ON CONFLICT (telegram_id) DO UPDATE ... RETURNING:
+        без предварительного SELECT и refresh() после commit.
+        Признак новой строки - xmax = 0 (у обновлённой строки xmax
+        равен ID обновившей транзакции).
+
         Args:
             telegram_id: ID пользователя в Telegram
             name: Имя пользователя
             favorite_genres: Список любимых жанров
+                (None - у существующего пользователя не меняются)
 
         Returns:
-            User: Объект пользователя
+            (User, True - пользователь создан / False - обновлён)
         """
     with get_session() as session:
-        user = session.query(User).filter_by(telegram_id=telegram_id).first()
+        stmt = pg_insert(User).values(
+            telegram_id=telegram_id,
+            name=name,
+            favorite_genres=favorite_genres or []
+        )
 
-        if user:
-            user.name = name
-            if favorite_genres is not None:
-                user.favorite_genres = favorite_genres
-            logger.info(f"Updated user: {telegram_id}")
-        else:
-            user = User(
-                telegram_id=telegram_id,
-                name=name,
-                favorite_genres=favorite_genres or []
-            )
-            session.add(user)
+        update_values = {'name': stmt.excluded.name}
+        if favorite_genres is not None:
+            update_values['favorite_genres'] = stmt.excluded.favorite_genres
+
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.telegram_id],
+            set_=update_values
+        ).returning(User, literal_column('xmax = 0').label('created'))
+
+        user, created = session.execute(
+            stmt,
+            execution_options={'populate_existing': True}
+        ).one()
+        commit_returning(session, user)
+
+        if created:
             logger.info(f"Created new user: {telegram_id}")
+        else:
+            logger.info(f"Updated user: {telegram_id}")
 
-        session.commit()
-        session.refresh(user)
-        return user
+        return user, created
 
 def get_user_by_telegram_id(telegram_id: int) -> Optional[User]:
     """
@@ -152,6 +248,21 @@ def get_all_users_with_notifications() -> List[User]:
         return users
 
 
+def get_recent_users(limit: int = 10) -> List[User]:
+    """
+    Получить последних зарегистрированных пользователей
+
+    Args:
+        limit: Максимум пользователей
+
+    Returns:
+        Список пользователей (новые первыми)
+    """
+    with get_session() as session:
+        users = session.query(User).order_by(desc(User.created_at)).limit(limit).all()
+        return users
+
+
 def get_users_count() -> int:
     """
     Получить количество пользователей
@@ -304,6 +415,10 @@ def delete_category(category_id: int) -> bool:
         if category:
             session.delete(category)
             session.commit()
+
+            # Книги категории удалены каскадом
+            after_commit(session, lambda: search_index.index.remove_category(category_id))
+
             logger.info(f"Deleted category: {category_id}")
             return True
 
@@ -319,8 +434,92 @@ def get_categories_count() -> int:
     with get_session() as session:
         return session.query(Category).count()
 
+def get_categories_with_counts(available_only: bool = False) -> List[Tuple[Category, int]]:
+    """
+        Получить все категории с количеством книг - одним запросом
+
+        Args:
+            available_only: Считать только доступные книги?
+
+        Returns:
+            Список (категория, количество книг) по имени категории
+        """
+    with get_session() as session:
+        condition = Book.category_id == Category.id
+        if available_only:
+            condition = and_(condition, Book.is_available == True)
+
+        # LEFT JOIN: пустые категории - с нулём
+        rows = session.query(Category, func.count(Book.id)).outerjoin(
+            Book, condition
+        ).group_by(Category.id).order_by(Category.name).all()
+
+        return [(category, count) for category, count in rows]
+
+
 # BOOK CRUD
 
+# Курсор для постраничного вывода книг: (created_at, id) книги
+BookCursor = Tuple[datetime, int]
+
+
+def book_cursor(book: Book) -> BookCursor:
+    """Курсор книги для параметров after/before"""
+    return book.created_at, book.id
+
+
+def _keyset_query(
+        query,
+        limit: int,
+        offset: int = 0,
+        after: Optional[BookCursor] = None,
+        before: Optional[BookCursor] = None
+):
+    """
+    Добавить к запросу книг порядок (created_at DESC, id DESC) и границы страницы
+
+    С курсором - keyset пагинация: WHERE (created_at, id) < курсор,
+    вместо OFFSET, который пропускает все предыдущие строки.
+    Работает и с Query, и с select().
+
+    Returns:
+        (запрос, reverse) - reverse=True: строки прочитаны в обратном
+        порядке и их нужно развернуть
+    """
+    position = tuple_(Book.created_at, Book.id)
+
+    if before is not None:
+        # Предыдущая страница: ближайшие книги "выше" курсора,
+        # читаем в обратном порядке и разворачиваем
+        query = query.filter(position > tuple_(*before)) \
+            .order_by(Book.created_at, Book.id) \
+            .limit(limit)
+        return query, True
+
+    if after is not None:
+        query = query.filter(position < tuple_(*after))
+
+    query = query.order_by(desc(Book.created_at), desc(Book.id))
+
+    if offset and after is None:
+        query = query.offset(offset)
+
+    return query.limit(limit), False
+
+
+def _keyset_page(
+        query,
+        limit: int,
+        offset: int = 0,
+        after: Optional[BookCursor] = None,
+        before: Optional[BookCursor] = None
+) -> List[Book]:
+    """Страница книг в порядке (created_at DESC, id DESC)"""
+    query, reverse = _keyset_query(query, limit, offset, after, before)
+    books = query.all()
+    return books[::-1] if reverse else books
+
+
 def create_book(
         title: str,
         author: str,
@@ -364,9 +563,105 @@ def create_book(
         session.add(book)
         session.commit()
         session.refresh(book)
+
+        after_commit(session, lambda: search_index.index.add(book))
+
         logger.info(f"Created new book: {title} (ID: {book.id})")
         return book
 
+# Поля книги, которые принимает upsert_books
+BOOK_IMPORT_FIELDS = (
+    'title', 'author', 'price', 'category_id', 'isbn', 'description',
+    'cover_photo_id', 'genres', 'is_new', 'is_available'
+)
+
+
+@dataclass
+class BooksUpsertResult:
+    """
+    Результат upsert_books
+
+    Attributes:
+        created: Добавлено новых книг
+        updated: Обновлено существующих (совпал ISBN)
+    """
+    created: int = 0
+    updated: int = 0
+
+
+def upsert_books(rows: List[dict]) -> BooksUpsertResult:
+    """
+    Добавить или обновить пачку книг одним запросом
+
+    INSERT ... VALUES (...), (...) ON CONFLICT (isbn) DO UPDATE ... RETURNING:
+    книга с уже известным ISBN обновляется, остальные добавляются.
+    Книги без ISBN всегда добавляются (NULL не конфликтует).
+    Обложка существующей книги сохраняется, если в строке её нет.
+
+    Args:
+        rows: Словари с полями из BOOK_IMPORT_FIELDS
+            (title, author, price, category_id обязательны)
+
+    Returns:
+        BooksUpsertResult
+    """
+    result = BooksUpsertResult()
+    if not rows:
+        return result
+
+    # Один ISBN дважды в одном INSERT ... ON CONFLICT нельзя - берём последнюю строку
+    by_isbn = {}
+    new_rows = []
+    for row in rows:
+        row = {name: row.get(name) for name in BOOK_IMPORT_FIELDS}
+        row['genres'] = row['genres'] or []
+        row['is_new'] = bool(row['is_new'])
+        row['is_available'] = row['is_available'] is not False
+
+        if row['isbn']:
+            by_isbn[row['isbn']] = row
+        else:
+            new_rows.append(row)
+    new_rows.extend(by_isbn.values())
+
+    with get_session() as session:
+        # Строки передаются параметрами (executemany): SQLAlchemy сам склеивает
+        # их в многострочный VALUES, а скомпилированный запрос кешируется
+        stmt = pg_insert(Book)
+        excluded = stmt.excluded
+
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Book.isbn],
+            set_={
+                'title': excluded.title,
+                'author': excluded.author,
+                'price': excluded.price,
+                'category_id': excluded.category_id,
+                'description': excluded.description,
+                'cover_photo_id': func.coalesce(excluded.cover_photo_id, Book.cover_photo_id),
+                'genres': excluded.genres,
+                'is_new': excluded.is_new,
+                'is_available': excluded.is_available,
+            }
+        ).returning(
+            # Только то, что нужно поисковому индексу - без ORM объектов
+            Book.id, Book.title, Book.author, Book.price,
+            Book.is_available, Book.category_id,
+            literal_column('xmax = 0').label('created')
+        )
+
+        books = session.execute(stmt, new_rows).all()
+        session.commit()
+
+        after_commit(session, lambda: search_index.index.add_many(books))
+
+    result.created = sum(1 for book in books if book.created)
+    result.updated = len(books) - result.created
+
+    logger.info(f"Upserted books: {result.created} created, {result.updated} updated")
+    return result
+
+
 def get_book_by_id(book_id: int) -> Optional[Book]:
     """
         Получить книгу по ID (с категорией)
@@ -388,16 +683,24 @@ def get_books_by_category(
         category_id: int,
         available_only: bool = True,
         limit: int = 10,
-        offset: int = 0
+        offset: int = 0,
+        after: Optional[BookCursor] = None,
+        before: Optional[BookCursor] = None
 ) -> List[Book]:
     """
     Получить книги категории (с пагинацией)
 
+    Порядок: сначала новые (created_at DESC, id DESC).
+    Для перелистывания лучше курсоры after/before, чем offset:
+    страница читается по индексу за одно и то же время на любой глубине.
+
     Args:
         category_id: ID категории
         available_only: Только доступные?
         limit: Количество книг
         offset: Смещение (для пагинации)
+        after: Курсор последней книги текущей страницы - следующая страница
+        before: Курсор первой книги текущей страницы - предыдущая страница
 
     Returns:
         Список книг
@@ -410,12 +713,7 @@ def get_books_by_category(
         if available_only:
             query = query.filter(Book.is_available == True)
 
-        books = query.order_by(desc(Book.created_at)) \
-            .limit(limit) \
-            .offset(offset) \
-            .all()
-
-        return books
+        return _keyset_page(query, limit, offset, after, before)
 
 def get_books_count_by_category(
         category_id: int,
@@ -439,10 +737,115 @@ def get_books_count_by_category(
 
         return query.count()
 
+@dataclass
+class CategoryPage:
+    """
+    Страница книг категории (результат get_category_page)
+
+    Attributes:
+        category: Категория (None - не найдена)
+        books: Книги страницы
+        total: Всего книг в категории (с учётом available_only)
+        page: Номер страницы
+        per_page: Книг на странице
+    """
+    category: Optional[Category]
+    books: List[Book] = field(default_factory=list)
+    total: int = 0
+    page: int = 1
+    per_page: int = 10
+
+    @property
+    def total_pages(self) -> int:
+        """Всего страниц"""
+        return max(1, -(-self.total // self.per_page))
+
+
+# Колонки книги для страницы каталога (get_category_page)
+_BOOK_PAGE_COLUMNS = [
+    column for column in Book.__table__.columns if column.key != 'search_vector'
+]
+
+
+def get_category_page(
+        category_id: int,
+        page: int = 1,
+        per_page: int = 10,
+        available_only: bool = True,
+        after: Optional[BookCursor] = None,
+        before: Optional[BookCursor] = None
+) -> CategoryPage:
+    """
+    Получить категорию, количество её книг и страницу книг одним запросом
+
+    SELECT категории + подзапрос count(*) + LEFT JOIN LATERAL страницы книг:
+    одна сессия и один запрос на нажатие кнопки вместо трёх.
+
+    Args:
+        category_id: ID категории
+        page: Номер страницы (с 1)
+        per_page: Книг на странице
+        available_only: Только доступные?
+        after: Курсор - страница после него (см. get_books_by_category)
+        before: Курсор - страница перед ним
+
+    Returns:
+        CategoryPage (category=None, если категория не найдена)
+    """
+    with get_session() as session:
+        conditions = [Book.category_id == Category.id]
+        if available_only:
+            conditions.append(Book.is_available == True)
+
+        total = select(func.count()) \
+            .select_from(Book) \
+            .where(*conditions) \
+            .scalar_subquery()
+
+        # Колонки книги без search_vector: deferred в подзапросе не действует,
+        # и tsvector каждой книги страницы уходил бы клиенту
+        books_query, reverse = _keyset_query(
+            select(*_BOOK_PAGE_COLUMNS).where(*conditions),
+            limit=per_page,
+            offset=(page - 1) * per_page,
+            after=after,
+            before=before
+        )
+        books_page = books_query.lateral('books_page')
+        page_book = aliased(Book, books_page)
+
+        rows = session.execute(
+            select(Category, total.label('total'), page_book)
+            .outerjoin(books_page, true())
+            .where(Category.id == category_id)
+        ).all()
+
+        if not rows:
+            return CategoryPage(category=None, page=page, per_page=per_page)
+
+        category = rows[0][0]
+        books = [row[2] for row in rows if row[2] is not None]
+        if reverse:
+            books.reverse()
+
+        # Категория уже загружена - проставляем связь без отдельного запроса
+        for book in books:
+            set_committed_value(book, 'category', category)
+
+        return CategoryPage(
+            category=category,
+            books=books,
+            total=rows[0][1],
+            page=page,
+            per_page=per_page
+        )
+
 def get_all_books(
         available_only: bool = True,
         limit: int = 10,
         offset: int = 0,
+        after: Optional[BookCursor] = None,
+        before: Optional[BookCursor] = None
 ) -> List[Book]:
     """
         Получить все книги (с пагинацией)
@@ -451,6 +854,8 @@ def get_all_books(
             available_only: Только доступные?
             limit: Количество
             offset: Смещение
+            after: Курсор - книги после него (следующая страница)
+            before: Курсор - книги перед ним (предыдущая страница)
 
         Returns:
             Список книг
@@ -461,80 +866,212 @@ def get_all_books(
         if available_only:
             query = query.filter(Book.is_available == True)
 
-        books = query.order_by(desc(Book.created_at))\
-                    .limit(limit).offset(offset).all()
+        return _keyset_page(query, limit, offset, after, before)
 
-        return books
+# Конфигурации полнотекстового поиска (как в BOOK_SEARCH_VECTOR_SQL)
+SEARCH_CONFIGS = ('russian', 'english')
+
+
+def _search_tsquery(query_text: str):
+    """
+    tsquery для поискового запроса
+
+    Каждое слово ищется как префикс ('дюн' найдёт 'Дюна') в русской
+    или английской конфигурации, все слова запроса - обязательны.
+    Спецсимволы синтаксиса tsquery отбрасываются.
+
+    Returns:
+        Выражение tsquery или None, если в запросе нет слов
+    """
+    words = re.findall(r'\w+', query_text.lower())[:8]
+    if not words:
+        return None
+
+    word_queries = [
+        functools.reduce(
+            lambda left, right: left.op('||')(right),
+            [
+                func.to_tsquery(literal_column(f"'{config}'::regconfig"), f"{word}:*")
+                for config in SEARCH_CONFIGS
+            ]
+        )
+        for word in words
+    ]
 
-def search_books(query_text: str, limit: int = 20) -> List[Book]:
+    return functools.reduce(lambda left, right: left.op('&&')(right), word_queries)
+
+
+def search_books(query_text: str, limit: int = 20) -> List[Union[Book, search_index.IndexedBook]]:
     """
-        Поиск книг по названию или автору
+        Полнотекстовый поиск книг
+
+        При SEARCH_BACKEND=memory отвечает индекс в памяти
+        (database/search_index.py) - без запроса к БД. Тогда в результате
+        записи IndexedBook: только id, title, author, price, is_available
+        и category_id, без связей (category, bookings) и остальных полей.
+
+        Ищет по названию, автору, жанрам и описанию (books.search_vector,
+        GIN индекс). Сначала - самые релевантные (ts_rank): совпадения
+        в названии и авторе весят больше, чем в описании.
 
         Args:
             query_text: Поисковый запрос
             limit: Максимум результатов
 
         Returns:
-            Список книг
+            Список книг (Book или IndexedBook - см. выше)
         """
+    if SEARCH_BACKEND == 'memory' and search_index.is_ready():
+        return search_index.search(query_text, limit=limit)
+
+    tsquery = _search_tsquery(query_text)
+    if tsquery is None:
+        return []
+
     with get_session() as session:
+        rank = func.ts_rank(Book.search_vector, tsquery)
+
+        books = session.query(Book) \
+            .options(joinedload(Book.category)) \
+            .filter(
+            and_(
+                Book.search_vector.op('@@')(tsquery),
+                Book.is_available == True
+            )
+        ) \
+            .order_by(desc(rank), Book.title) \
+            .limit(limit) \
+            .all()
+
+        logger.info(f"Search '{query_text}': found {len(books)} books")
+        return books
+
+# Установлено ли расширение pg_trgm (проверяется один раз)
+_trigram_available: Optional[bool] = None
+
+
+def has_trigram_search() -> bool:
+    """Доступен ли нечёткий поиск (расширение pg_trgm установлено)"""
+    global _trigram_available
+
+    if _trigram_available is None:
+        with get_session() as session:
+            _trigram_available = bool(session.execute(text(
+                "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+            )).scalar())
+
+        if not _trigram_available:
+            logger.warning("pg_trgm extension is not installed - fuzzy search disabled")
+
+    return _trigram_available
+
+
+def search_books_fuzzy(
+        query_text: str,
+        limit: int = 5,
+        threshold: Optional[float] = None
+) -> List[Book]:
+    """
+    Нечёткий поиск книг по названию и автору (опечатки: "Дюнна", "Толстои")
+
+    Триграммная похожесть слов (pg_trgm word_similarity) по GIN индексам
+    ix_books_title_trgm / ix_books_author_trgm. Используется, когда
+    search_books ничего не нашёл - для подсказок "возможно, вы имели в виду".
+
+    Args:
+        query_text: Поисковый запрос
+        limit: Максимум результатов
+        threshold: Минимальная похожесть 0..1 (по умолчанию SEARCH_TRGM_THRESHOLD)
+
+    Returns:
+        Список книг (самые похожие - первыми); пустой, если pg_trgm нет
+    """
+    if threshold is None:
+        threshold = SEARCH_TRGM_THRESHOLD
+
+    query_text = query_text.strip()
+    if not query_text or not has_trigram_search():
+        return []
+
+    with get_session() as session:
+        # Порог для оператора <% - только до конца текущей транзакции
+        session.execute(select(
+            func.set_config('pg_trgm.word_similarity_threshold', str(threshold), True)
+        ))
+
+        score = func.greatest(
+            func.word_similarity(query_text, Book.title),
+            func.word_similarity(query_text, Book.author)
+        )
+
         books = session.query(Book) \
             .options(joinedload(Book.category)) \
             .filter(
             and_(
                 or_(
-                    Book.title.ilike(f'%{query_text}%'),
-                    Book.author.ilike(f'%{query_text}%')
+                    literal(query_text).op('<%')(Book.title),
+                    literal(query_text).op('<%')(Book.author)
                 ),
                 Book.is_available == True
             )
         ) \
-            .order_by(Book.title) \
+            .order_by(desc(score), Book.title) \
             .limit(limit) \
             .all()
 
-        logger.info(f"Search '{query_text}': found {len(books)} books")
+        logger.info(f"Fuzzy search '{query_text}': found {len(books)} books")
         return books
 
 def get_books_by_genres(
     genres: List[str],
-    limit: int = 10
+    limit: int = 10,
+    rank_by_overlap: bool = False
 ) -> List[Book]:
     """
         Получить книги по жанрам (персонализация)
 
-        Использует PostgreSQL JSONB оператор &&
+        Один оператор JSONB ?| ("есть хотя бы один из жанров"),
+        который обслуживается GIN индексом ix_books_genres.
 
         Args:
             genres: Список жанров
             limit: Максимум книг
+            rank_by_overlap: Сначала книги, у которых больше совпавших жанров
+                (иначе - сначала новые)
 
         Returns:
             Список книг
         """
-    with get_session() as session:
-        # Используем PostgreSQL функцию jsonb_path_exists
-        # или просто проверяем каждый жанр отдельно через contains
+    if not genres:
+        return []
 
-        # Создаём фильтр: хотя бы один жанр должен совпадать
-        genre_filters = []
-        for genre in genres:
-            # Проверяем что genres содержит этот жанр
-            genre_filters.append(
-                Book.genres.contains([genre])
-            )
+    with get_session() as session:
+        wanted = array(genres, type_=String)
 
-        books = session.query(Book) \
+        query = session.query(Book) \
             .options(joinedload(Book.category)) \
             .filter(
             and_(
-                or_(*genre_filters),  # Хотя бы один жанр совпадает
+                Book.genres.has_any(wanted),  # Хотя бы один жанр совпадает
                 Book.is_available == True
             )
-        ) \
-            .order_by(desc(Book.created_at)) \
-            .limit(limit) \
-            .all()
+        )
+
+        if rank_by_overlap:
+            # Сколько жанров книги входит в запрошенные
+            book_genres = func.jsonb_array_elements_text(Book.genres) \
+                .table_valued('value') \
+                .alias('book_genres')
+            overlap = select(func.count()) \
+                .select_from(book_genres) \
+                .where(book_genres.c.value == any_(wanted)) \
+                .scalar_subquery()
+
+            query = query.order_by(desc(overlap), desc(Book.created_at))
+        else:
+            query = query.order_by(desc(Book.created_at))
+
+        books = query.limit(limit).all()
 
         logger.info(f"Found {len(books)} books for genres: {genres}")
         return books
@@ -582,6 +1119,8 @@ def update_book(
     """
     Обновить данные книги
 
+    Один запрос UPDATE ... RETURNING (без SELECT и refresh()).
+
     Args:
         book_id: ID книги
         **kwargs: Поля для обновления (title, author, price, description, etc.)
@@ -589,20 +1128,21 @@ def update_book(
     Returns:
         Book или None
     """
+    # Обновляем только поля модели
+    fields = {key: value for key, value in kwargs.items() if key in Book.__table__.c}
+    if not fields:
+        return get_book_by_id(book_id)
+
     with get_session() as session:
-        book = session.query(Book).filter_by(id=book_id).first()
+        book = _update_returning(session, Book, Book.id == book_id, fields)
 
         if not book:
             logger.warning(f"Book {book_id} not found for update")
             return None
 
-        # Обновляем только переданные поля
-        for key, value in kwargs.items():
-            if hasattr(book, key):
-                setattr(book, key, value)
+        commit_returning(session, book)
 
-        session.commit()
-        session.refresh(book)
+        after_commit(session, lambda: search_index.index.add(book))
 
         logger.info(f"Updated book {book_id}: {book.title}")
         return book
@@ -620,15 +1160,15 @@ def update_book_photo(book_id: int, photo_file_id: str) -> Optional[Book]:
         Book или None
     """
     with get_session() as session:
-        book = session.query(Book).filter_by(id=book_id).first()
+        book = _update_returning(
+            session, Book, Book.id == book_id, {'cover_photo_id': photo_file_id}
+        )
 
         if not book:
             logger.warning(f"Book {book_id} not found for photo update")
             return None
 
-        book.cover_photo_id = photo_file_id
-        session.commit()
-        session.refresh(book)
+        commit_returning(session, book)
 
         logger.info(f"Updated photo for book {book_id}: {book.title}")
         return book
@@ -645,54 +1185,425 @@ def remove_book_photo(book_id: int) -> Optional[Book]:
         Book или None
     """
     with get_session() as session:
-        book = session.query(Book).filter_by(id=book_id).first()
+        book = _update_returning(
+            session, Book, Book.id == book_id, {'cover_photo_id': None}
+        )
 
         if not book:
             logger.warning(f"Book {book_id} not found for photo removal")
             return None
 
-        book.cover_photo_id = None
-        session.commit()
-        session.refresh(book)
+        commit_returning(session, book)
 
         logger.info(f"Removed photo from book {book_id}: {book.title}")
         return book
 
 
-def delete_book(book_id: int) -> bool:
+# Ключ книги в update_books_photos: ID (int) или ISBN (str)
+BookKey = int | str
+
+
+@dataclass
+class BooksPhotoResult:
     """
-    Удалить книгу
+    Результат update_books_photos
+
+    Attributes:
+        updated: Ключ -> (ID, название) книги, которой поставлена обложка
+        not_found: Ключи, для которых книги нет
+        duplicates: Ключи, чья книга уже получила обложку по другому ключу
+            (ID и ISBN одной и той же книги)
+    """
+    updated: Dict[BookKey, Tuple[int, str]] = field(default_factory=dict)
+    not_found: List[BookKey] = field(default_factory=list)
+    duplicates: List[BookKey] = field(default_factory=list)
+
+
+def update_books_photos(covers: List[Tuple[BookKey, str]]) -> BooksPhotoResult:
+    """
+    Поставить обложки многим книгам одним запросом
+
+        WITH covers AS (SELECT * FROM unnest(:ids, :isbns, :file_ids) WITH ORDINALITY),
+             updated AS (UPDATE books SET cover_photo_id = covers.file_id FROM covers
+                         WHERE books.id = covers.id OR books.isbn = covers.isbn
+                         RETURNING ...)
+        SELECT ... FROM covers LEFT JOIN updated ... LEFT JOIN books ...
 
     Args:
-        book_id: ID книги
+        covers: Пары (ID или ISBN книги, Telegram file_id фото);
+            для повторяющегося ключа берётся последняя пара
 
     Returns:
-        True если успешно, False если нет
+        BooksPhotoResult
     """
+    result = BooksPhotoResult()
+
+    by_key = dict(covers)
+    if not by_key:
+        return result
+
+    keys = list(by_key)
+    ids = [key if isinstance(key, int) else None for key in keys]
+    isbns = [key if isinstance(key, str) else None for key in keys]
+
+    covers_cte = select(
+        func.unnest(
+            cast(ids, ARRAY(Integer)),
+            cast(isbns, ARRAY(String)),
+            cast(list(by_key.values()), ARRAY(String))
+        ).table_valued(
+            column('id', Integer),
+            column('isbn', String),
+            column('file_id', String),
+            with_ordinality='n'
+        ).render_derived('v')
+    ).cte('covers')
+
+    books = Book.__table__
+    matches = or_(books.c.id == covers_cte.c.id, books.c.isbn == covers_cte.c.isbn)
+
+    updated = (
+        update(books)
+        .values(cover_photo_id=covers_cte.c.file_id)
+        .where(matches)
+        .returning(books.c.id, books.c.title, covers_cte.c.n)
+        .cte('updated')
+    )
+
+    existing = books.alias('existing')
+    statement = (
+        select(
+            covers_cte.c.n,
+            updated.c.id,
+            updated.c.title,
+            func.count(existing.c.id).label('found')
+        )
+        .select_from(covers_cte)
+        .outerjoin(updated, updated.c.n == covers_cte.c.n)
+        .outerjoin(
+            existing,
+            or_(existing.c.id == covers_cte.c.id, existing.c.isbn == covers_cte.c.isbn)
+        )
+        .group_by(covers_cte.c.n, updated.c.id, updated.c.title)
+    )
+
     with get_session() as session:
-        book = session.query(Book).filter_by(id=book_id).first()
+        rows = session.execute(statement).all()
+        session.commit()
 
-        if not book:
-            logger.warning(f"Book {book_id} not found for deletion")
-            return False
+    for row in sorted(rows, key=lambda row: row.n):
+        key = keys[row.n - 1]
+        if row.id is not None:
+            result.updated[key] = (row.id, row.title)
+        elif row.found:
+            result.duplicates.append(key)
+        else:
+            result.not_found.append(key)
 
-        book_title = book.title
+    logger.info(
+        f"Updated photos: {len(result.updated)} books, {len(result.not_found)} not found, "
+        f"{len(result.duplicates)} duplicates"
+    )
+    return result
 
-        # Проверяем есть ли активные брони на эту книгу
-        active_bookings = session.query(Booking).filter_by(
-            book_id=book_id,
-            status='active'
-        ).count()
 
-        if active_bookings > 0:
-            logger.warning(f"Cannot delete book {book_id}: has {active_bookings} active bookings")
-            return False
+@dataclass
+class BookChange:
+    """Изменение книги в bulk_update_books (было -> стало)"""
+    id: int
+    title: str
+    old_price: float
+    price: float
+    old_available: bool
+    is_available: bool
+
+
+@dataclass
+class BooksBulkUpdateResult:
+    """
+    Результат bulk_update_books
+
+    Attributes:
+        changed: Изменённые книги (было -> стало)
+        unchanged: ID книг, у которых значения уже совпадали
+        not_found: ID, которых нет
+    """
+    changed: List[BookChange] = field(default_factory=list)
+    unchanged: List[int] = field(default_factory=list)
+    not_found: List[int] = field(default_factory=list)
+
+
+def bulk_update_books(changes: List[dict], batch_size: int = 1000) -> BooksBulkUpdateResult:
+    """
+    Изменить цену и/или доступность многих книг
+
+    На каждую пачку - один запрос:
+        WITH changes AS (SELECT * FROM unnest(:ids, :prices, :available)),
+             updated AS (UPDATE books SET ... FROM changes, books AS old ... RETURNING ...)
+        SELECT ... FROM changes LEFT JOIN updated ...
+    books AS old в том же запросе видна до UPDATE - отсюда значения "было".
+    Строки, где ничего не меняется, не перезаписываются.
+    Все пачки - в одной транзакции.
+
+    Args:
+        changes: Словари {'id': ..., 'price': ... или None, 'is_available': ... или None}
+            (None - поле не меняется)
+        batch_size: Книг в одном запросе
+
+    Returns:
+        BooksBulkUpdateResult
+    """
+    result = BooksBulkUpdateResult()
+
+    # Один ID дважды в UPDATE ... FROM применится непредсказуемо - берём последнюю строку
+    by_id = {}
+    for change in changes:
+        by_id[change['id']] = (change['id'], change.get('price'), change.get('is_available'))
+    rows = list(by_id.values())
+
+    if not rows:
+        return result
+
+    books = Book.__table__
+    old = books.alias('old')
+    updated_books = []
+
+    with get_session() as session:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+
+            ids, prices, available = zip(*batch)
+
+            # Пачка передаётся тремя массивами: unnest(...) - та же таблица,
+            # что VALUES, но параметров 3, а не 3 на строку (запрос кешируется)
+            changes_cte = select(
+                func.unnest(
+                    cast(list(ids), ARRAY(Integer)),
+                    cast(list(prices), ARRAY(Float)),
+                    cast(list(available), ARRAY(Boolean))
+                ).table_valued(
+                    column('id', Integer),
+                    column('price', Float),
+                    column('is_available', Boolean)
+                ).render_derived('v')
+            ).cte('changes')
+
+            new_price = func.coalesce(changes_cte.c.price, old.c.price)
+            new_available = func.coalesce(changes_cte.c.is_available, old.c.is_available)
+
+            updated = (
+                update(books)
+                .values(price=new_price, is_available=new_available)
+                .where(
+                    books.c.id == changes_cte.c.id,
+                    old.c.id == changes_cte.c.id,
+                    or_(
+                        new_price.is_distinct_from(old.c.price),
+                        new_available.is_distinct_from(old.c.is_available)
+                    )
+                )
+                .returning(
+                    books.c.id, books.c.title, books.c.author, books.c.category_id,
+                    old.c.price.label('old_price'), books.c.price,
+                    old.c.is_available.label('old_available'), books.c.is_available
+                )
+                .cte('updated')
+            )
+
+            statement = (
+                select(
+                    changes_cte.c.id,
+                    *[returned for returned in updated.c if returned.name != 'id'],
+                    old.c.id.is_not(None).label('exists')
+                )
+                .select_from(changes_cte)
+                .outerjoin(updated, updated.c.id == changes_cte.c.id)
+                .outerjoin(old, old.c.id == changes_cte.c.id)
+            )
+
+            for row in session.execute(statement):
+                if row.title is not None:
+                    result.changed.append(BookChange(
+                        row.id, row.title, row.old_price, row.price,
+                        row.old_available, row.is_available
+                    ))
+                    updated_books.append(row)
+                elif row.exists:
+                    result.unchanged.append(row.id)
+                else:
+                    result.not_found.append(row.id)
+
+        session.commit()
+
+        after_commit(session, lambda: search_index.index.add_many(updated_books))
+
+    logger.info(
+        f"Bulk update: {len(result.changed)} changed, {len(result.unchanged)} unchanged, "
+        f"{len(result.not_found)} not found"
+    )
+    return result
+
+
+def toggle_books_availability(book_ids: List[int]) -> list:
+    """
+    Переключить доступность книг (доступна <-> недоступна) одним UPDATE ... RETURNING
+
+    Args:
+        book_ids: ID книг
+
+    Returns:
+        Строки (id, title, is_available) изменённых книг; отсутствующих ID в списке нет
+    """
+    if not book_ids:
+        return []
 
-        session.delete(book)
+    with get_session() as session:
+        books = session.execute(
+            update(Book)
+            .where(Book.id == any_(cast(array(book_ids), ARRAY(Integer))))
+            .values(is_available=~Book.is_available)
+            .returning(
+                Book.id, Book.title, Book.author, Book.price,
+                Book.is_available, Book.category_id
+            ),
+            execution_options={'synchronize_session': False}
+        ).all()
         session.commit()
 
-        logger.info(f"Deleted book {book_id}: {book_title}")
-        return True
+        after_commit(session, lambda: search_index.index.add_many(books))
+
+    logger.info(f"Toggled availability of {len(books)} books")
+    return books
+
+
+# Причины, по которым книга не удалена
+BookDeleteFailure = Literal['not_found', 'has_active_bookings']
+
+
+@dataclass
+class BookDeleteResult:
+    """
+    Результат delete_book
+
+    Attributes:
+        book_id: ID книги
+        title: Название удалённой книги (None - не удалена)
+        reason: Причина отказа (None - удалена):
+            'not_found' - книги нет
+            'has_active_bookings' - на книгу есть активные брони
+    """
+    book_id: int
+    title: Optional[str] = None
+    reason: Optional[BookDeleteFailure] = None
+
+    @property
+    def deleted(self) -> bool:
+        return self.reason is None
+
+    def __bool__(self) -> bool:
+        return self.deleted
+
+
+@dataclass
+class BooksDeleteResult:
+    """
+    Результат delete_books
+
+    Attributes:
+        deleted: Удалённые книги: ID -> название
+        not_found: ID, которых нет
+        has_active_bookings: ID книг с активными бронями (не удалены)
+    """
+    deleted: Dict[int, str] = field(default_factory=dict)
+    not_found: List[int] = field(default_factory=list)
+    has_active_bookings: List[int] = field(default_factory=list)
+
+
+def delete_books(book_ids: List[int]) -> BooksDeleteResult:
+    """
+    Удалить несколько книг одним запросом
+
+    DELETE ... WHERE id = ANY(:ids) AND NOT EXISTS (активная бронь) RETURNING:
+    проверка броней и удаление - один оператор, без окна между ними.
+    Тот же запрос сообщает, каких книг нет, а какие не удалены из-за броней.
+
+    Args:
+        book_ids: ID книг
+
+    Returns:
+        BooksDeleteResult
+    """
+    book_ids = list(dict.fromkeys(book_ids))
+    result = BooksDeleteResult()
+    if not book_ids:
+        return result
+
+    with get_session() as session:
+        ids = cast(array(book_ids), ARRAY(Integer))
+
+        deleted = (
+            delete(Book)
+            .where(
+                Book.id == any_(ids),
+                ~select(Booking.id).where(
+                    Booking.book_id == Book.id,
+                    Booking.status == 'active'
+                ).exists()
+            )
+            .returning(Book.id, Book.title)
+            .cte('deleted')
+        )
+        requested = func.unnest(ids).table_valued('id').render_derived('requested')
+
+        # books в этом же запросе ещё видна целиком (снимок до DELETE)
+        rows = session.execute(
+            select(requested.c.id, deleted.c.title, Book.id.is_not(None))
+            .select_from(requested)
+            .outerjoin(deleted, deleted.c.id == requested.c.id)
+            .outerjoin(Book, Book.id == requested.c.id)
+        ).all()
+        session.commit()
+
+        for book_id, title, exists in rows:
+            if title is not None:
+                result.deleted[book_id] = title
+            elif not exists:
+                result.not_found.append(book_id)
+            else:
+                result.has_active_bookings.append(book_id)
+
+        if result.deleted:
+            deleted_ids = list(result.deleted)
+            after_commit(session, lambda: search_index.index.remove_many(deleted_ids))
+
+    if result.not_found:
+        logger.warning(f"Books not found for deletion: {result.not_found}")
+    if result.has_active_bookings:
+        logger.warning(f"Cannot delete books with active bookings: {result.has_active_bookings}")
+    logger.info(f"Deleted {len(result.deleted)} books")
+
+    return result
+
+
+def delete_book(book_id: int) -> BookDeleteResult:
+    """
+    Удалить книгу
+
+    Один запрос DELETE ... RETURNING (см. delete_books)
+
+    Args:
+        book_id: ID книги
+
+    Returns:
+        BookDeleteResult (название удалённой книги или причина отказа)
+    """
+    result = delete_books([book_id])
+
+    if book_id in result.deleted:
+        return BookDeleteResult(book_id, title=result.deleted[book_id])
+    if book_id in result.not_found:
+        return BookDeleteResult(book_id, reason='not_found')
+    return BookDeleteResult(book_id, reason='has_active_bookings')
 
 
 def get_books_count() -> int:
@@ -708,15 +1619,45 @@ def get_books_count() -> int:
 
 # BOOKING CRUD
 
+# Причины, по которым бронь не создана (BookingResult.reason)
+BookingFailure = Literal['user_not_found', 'book_not_found', 'book_unavailable', 'already_booked']
+
+
+@dataclass
+class BookingResult:
+    """
+    Результат create_booking
+
+    Attributes:
+        booking: Созданная бронь (None - не создана)
+        reason: Причина отказа (None - бронь создана):
+            'user_not_found' - пользователь не зарегистрирован
+            'book_not_found' - книги нет в каталоге
+            'book_unavailable' - книга недоступна
+            'already_booked' - у пользователя уже есть активная бронь этой книги
+    """
+    booking: Optional[Booking] = None
+    reason: Optional[BookingFailure] = None
+
+    def __bool__(self) -> bool:
+        return self.booking is not None
+
+
 def create_booking(
         user_telegram_id: int,
         book_id: int,
         pickup_date: date,
         comment: Optional[str] = None
-) -> Optional[Booking]:
+) -> BookingResult:
     """
     Создать бронь
 
+    Один оператор INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING:
+    проверка пользователя и книги и вставка выполняются атомарно,
+    а повторная активная бронь отсекается уникальным индексом
+    uq_bookings_user_book_active (два быстрых нажатия не создадут две брони).
+    Тот же запрос возвращает, что именно не прошло проверку.
+
     Args:
         user_telegram_id: Telegram ID пользователя
         book_id: ID книги
@@ -724,51 +1665,66 @@ def create_booking(
         comment: Комментарий
 
     Returns:
-        Booking или None (если ошибка)
+        BookingResult (бронь или причина отказа)
     """
     with get_session() as session:
-        # Получаем пользователя
-        user = session.query(User).filter_by(telegram_id=user_telegram_id).first()
-        if not user:
+        user = select(User.id).where(User.telegram_id == user_telegram_id).cte('u')
+        book = select(Book.id, Book.is_available).where(Book.id == book_id).cte('b')
+
+        inserted = (
+            pg_insert(Booking)
+            .from_select(
+                ['user_id', 'book_id', 'pickup_date', 'comment', 'status'],
+                select(
+                    user.c.id,
+                    book.c.id,
+                    literal(pickup_date, Booking.pickup_date.type),
+                    literal(comment, Booking.comment.type),
+                    literal('active', Booking.status.type)
+                ).select_from(user.join(book, true())).where(book.c.is_available)
+            )
+            .on_conflict_do_nothing(
+                index_elements=[Booking.user_id, Booking.book_id],
+                # Условие частичного индекса - литералом: с параметром ($1 у asyncpg)
+                # PostgreSQL не сопоставит его с uq_bookings_user_book_active
+                index_where=Booking.status == literal_column("'active'")
+            )
+            .returning(*Booking.__table__.c)
+            .cte('inserted')
+        )
+        new_booking = aliased(Booking, inserted)
+
+        # Одна строка всегда: LEFT JOIN от пустого SELECT,
+        # чтобы видеть, какая из проверок не прошла
+        anchor = select(literal(1).label('one')).subquery('anchor')
+        row = session.execute(
+            select(new_booking, user.c.id, book.c.id, book.c.is_available)
+            .select_from(anchor)
+            .outerjoin(user, true())
+            .outerjoin(book, true())
+            .outerjoin(inserted, true())
+        ).one()
+        booking, found_user_id, found_book_id, is_available = row
+
+        if booking is not None:
+            commit_returning(session, booking)
+            logger.info(f"Created booking: {booking.id} (user={booking.user_id}, book={book_id})")
+            return BookingResult(booking=booking)
+
+        if found_user_id is None:
             logger.error(f"User not found: {user_telegram_id}")
-            return None
+            return BookingResult(reason='user_not_found')
 
-        # Проверяем книгу
-        book = session.query(Book).filter_by(id=book_id).first()
-        if not book:
+        if found_book_id is None:
             logger.error(f"Book not found: {book_id}")
-            return None
+            return BookingResult(reason='book_not_found')
 
-        if not book.is_available:
+        if not is_available:
             logger.warning(f"Book not available: {book_id}")
-            return None
+            return BookingResult(reason='book_unavailable')
 
-        # Проверяем, нет ли уже активной брони
-        existing = session.query(Booking).filter_by(
-            user_id=user.id,
-            book_id=book_id,
-            status='active'
-        ).first()
-
-        if existing:
-            logger.warning(f"Active booking already exists: user={user.id}, book={book_id}")
-            return None
-
-        # Создаём бронь
-        booking = Booking(
-            user_id=user.id,
-            book_id=book_id,
-            pickup_date=pickup_date,
-            comment=comment,
-            status='active'
-        )
-
-        session.add(booking)
-        session.commit()
-        session.refresh(booking)
-
-        logger.info(f"Created booking: {booking.id} (user={user.id}, book={book_id})")
-        return booking
+        logger.warning(f"Active booking already exists: user={found_user_id}, book={book_id}")
+        return BookingResult(reason='already_booked')
 
 
 def get_booking_by_id(booking_id: int) -> Optional[Booking]:
@@ -851,48 +1807,99 @@ def get_all_bookings(status: Optional[str] = None) -> List[Booking]:
         return bookings
 
 
-def cancel_booking(booking_id: int) -> bool:
+def _set_booking_status(
+        booking_id: int,
+        status: str,
+        user_telegram_id: Optional[int] = None,
+        only_active: bool = False
+) -> Optional[Booking]:
+    """
+    Сменить статус брони одним запросом
+
+    UPDATE ... RETURNING в CTE и JOIN с книгой в том же запросе.
+    Условия (владелец, активность) проверяются в WHERE самого UPDATE -
+    между проверкой и изменением бронь не может измениться.
+    """
+    conditions = [Booking.id == booking_id]
+
+    if user_telegram_id is not None:
+        conditions.append(
+            Booking.user_id == select(User.id)
+            .where(User.telegram_id == user_telegram_id)
+            .scalar_subquery()
+        )
+
+    if only_active:
+        conditions.append(Booking.status == 'active')
+
+    with get_session() as session:
+        updated = (
+            update(Booking)
+            .where(*conditions)
+            .values(status=status)
+            .returning(*Booking.__table__.c)
+            .cte('updated')
+        )
+        updated_booking = aliased(Booking, updated)
+
+        row = session.execute(
+            select(updated_booking, Book).join(Book, Book.id == updated.c.book_id),
+            execution_options={'populate_existing': True}
+        ).first()
+
+        if row is None:
+            return None
+
+        booking, book = row
+        commit_returning(session, booking, book)
+        set_committed_value(booking, 'book', book)
+        return booking
+
+
+def cancel_booking(
+        booking_id: int,
+        user_telegram_id: Optional[int] = None,
+        only_active: bool = False
+) -> Optional[Booking]:
     """
     Отменить бронь
 
     Args:
         booking_id: ID брони
+        user_telegram_id: Отменить, только если бронь этого пользователя
+        only_active: Отменить, только если бронь активна
 
     Returns:
-        True если отменена, False если не найдена
+        Booking (с загруженной book) или None,
+        если не найдена или не прошла проверки
     """
-    with get_session() as session:
-        booking = session.query(Booking).filter_by(id=booking_id).first()
+    booking = _set_booking_status(booking_id, 'cancelled', user_telegram_id, only_active)
 
-        if booking:
-            booking.status = 'cancelled'
-            session.commit()
-            logger.info(f"Cancelled booking: {booking_id}")
-            return True
+    if booking:
+        logger.info(f"Cancelled booking: {booking_id}")
+    return booking
 
-        return False
 
-
-def complete_booking(booking_id: int) -> bool:
+def complete_booking(
+        booking_id: int,
+        only_active: bool = False
+) -> Optional[Booking]:
     """
     Завершить бронь (клиент забрал книгу)
 
     Args:
         booking_id: ID брони
+        only_active: Завершить, только если бронь активна
 
     Returns:
-        True если завершена, False если не найдена
+        Booking (с загруженной book) или None,
+        если не найдена или не прошла проверки
     """
-    with get_session() as session:
-        booking = session.query(Booking).filter_by(id=booking_id).first()
+    booking = _set_booking_status(booking_id, 'completed', only_active=only_active)
 
-        if booking:
-            booking.status = 'completed'
-            session.commit()
-            logger.info(f"Completed booking: {booking_id}")
-            return True
-
-        return False
+    if booking:
+        logger.info(f"Completed booking: {booking_id}")
+    return booking
 
 
 def get_active_booking(user_telegram_id: int, book_id: int) -> Optional[Booking]:
@@ -974,25 +1981,107 @@ def get_bookings_for_reminder(days_before: int = 1) -> List[Booking]:
 
 # STATISTICS
 
-def get_database_stats() -> dict:
+# Ключи словаря статистики (в порядке вывода)
+STATS_KEYS = (
+    'users_total', 'categories_total',
+    'books_total', 'books_available', 'books_new',
+    'bookings_total', 'bookings_active', 'bookings_completed', 'bookings_cancelled',
+)
+
+
+def get_database_stats(source: Optional[str] = None) -> dict:
     """
     Получить общую статистику БД
 
+    Args:
+        source: Откуда считать - 'query' (один агрегирующий запрос)
+            или 'counters' (таблица stats_counters).
+            По умолчанию - STATS_SOURCE из настроек
+
     Returns:
         dict: Словарь со статистикой
     """
+    if source is None:
+        source = STATS_SOURCE
+
+    if source == 'counters':
+        return get_counters_stats()
+
     with get_session() as session:
-        stats = {
-            'users_total': session.query(User).count(),
-            'categories_total': session.query(Category).count(),
-            'books_total': session.query(Book).count(),
-            'books_available': session.query(Book).filter_by(is_available=True).count(),
-            'books_new': session.query(Book).filter_by(is_new=True).count(),
-            'bookings_total': session.query(Booking).count(),
-            'bookings_active': session.query(Booking).filter_by(status='active').count(),
-            'bookings_completed': session.query(Booking).filter_by(status='completed').count(),
-            'bookings_cancelled': session.query(Booking).filter_by(status='cancelled').count(),
-        }
+        # Каждая таблица читается один раз, условия - через FILTER (WHERE ...)
+        users = select(
+            func.count().label('users_total')
+        ).select_from(User).subquery()
+
+        categories = select(
+            func.count().label('categories_total')
+        ).select_from(Category).subquery()
+
+        books = select(
+            func.count().label('books_total'),
+            func.count().filter(Book.is_available.is_(True)).label('books_available'),
+            func.count().filter(Book.is_new.is_(True)).label('books_new'),
+        ).select_from(Book).subquery()
+
+        bookings = select(
+            func.count().label('bookings_total'),
+            func.count().filter(Booking.status == 'active').label('bookings_active'),
+            func.count().filter(Booking.status == 'completed').label('bookings_completed'),
+            func.count().filter(Booking.status == 'cancelled').label('bookings_cancelled'),
+        ).select_from(Booking).subquery()
+
+        # Подзапросы возвращают по одной строке - соединяем их в одну
+        query = select(users, categories, books, bookings).select_from(
+            users
+            .join(categories, true())
+            .join(books, true())
+            .join(bookings, true())
+        )
+
+        row = session.execute(query).one()
+
+        return {key: row._mapping[key] for key in STATS_KEYS}
 
-        return stats
 
+def get_counters_stats() -> dict:
+    """
+    Получить статистику из таблицы stats_counters
+
+    Не читает сами таблицы - только короткий список дельт счётчиков,
+    которые дописывают триггеры (database/migrations.py).
+
+    Returns:
+        dict: Словарь со статистикой (те же ключи, что у get_database_stats)
+    """
+    with get_session() as session:
+        rows = session.query(
+            StatsCounter.name,
+            func.sum(StatsCounter.delta)
+        ).group_by(StatsCounter.name).all()
+
+        totals = {name: int(value) for name, value in rows}
+
+        return {key: totals.get(key, 0) for key in STATS_KEYS}
+
+
+def compact_stats_counters() -> int:
+    """
+    Свернуть дельты счётчиков в одну строку на счётчик
+
+    Returns:
+        int: Сколько строк осталось в stats_counters
+    """
+    with get_session() as session:
+        # Удаляем видимые дельты и вставляем их суммы одним оператором -
+        # дельты параллельных транзакций не теряются
+        result = session.execute(text("""
+            WITH moved AS (
+                DELETE FROM stats_counters RETURNING name, delta
+            )
+            INSERT INTO stats_counters (name, delta)
+            SELECT name, sum(delta) FROM moved GROUP BY name
+        """))
+        session.commit()
+
+        logger.info(f"Stats counters compacted: {result.rowcount} rows")
+        return result.rowcount
@@ -0,0 +1,249 @@
+# database/migrations.py
+"""
+Идемпотентные изменения схемы БД, которые не выражаются через create_all
+
+Base.metadata.create_all() создаёт только отсутствующие таблицы.
+Здесь - то, что нужно докатить и на уже существующую БД:
+триггеры, функции, индексы на существующих таблицах и т.п.
+
+Каждая миграция - список SQL команд, которые безопасно выполнять
+повторно (IF NOT EXISTS, CREATE OR REPLACE, DROP ... IF EXISTS).
+Выполняются при create_tables() (python create_db.py).
+"""
+
+import logging
+from typing import Dict, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
+
+from database.connection import Base
+
+logger = logging.getLogger(__name__)
+
+# СЧЁТЧИКИ СТАТИСТИКИ
+
+# Счётчики для get_database_stats(source='counters'):
+# таблица -> {имя счётчика: условие для строки таблицы}
+STATS_COUNTERS: Dict[str, Dict[str, str]] = {
+    'users': {
+        'users_total': 'TRUE',
+    },
+    'categories': {
+        'categories_total': 'TRUE',
+    },
+    'books': {
+        'books_total': 'TRUE',
+        'books_available': 'is_available',
+        'books_new': 'is_new',
+    },
+    'bookings': {
+        'bookings_total': 'TRUE',
+        'bookings_active': "status = 'active'",
+        'bookings_completed': "status = 'completed'",
+        'bookings_cancelled': "status = 'cancelled'",
+    },
+}
+
+
+def _counter_deltas_sql(counters: Dict[str, str], rows: str, sign: str) -> str:
+    """INSERT изменений счётчиков по строкам transition table"""
+    aggregates = ', '.join(
+        f"count(*) FILTER (WHERE {condition}) AS {name}"
+        for name, condition in counters.items()
+    )
+    values = ', '.join(f"('{name}', {sign}s.{name})" for name in counters)
+
+    return (
+        f"INSERT INTO stats_counters (name, delta) "
+        f"SELECT c.name, c.delta "
+        f"FROM (SELECT {aggregates} FROM {rows}) AS s, "
+        f"LATERAL (VALUES {values}) AS c(name, delta) "
+        f"WHERE c.delta <> 0;"
+    )
+
+
+def _stats_counters_migration() -> List[str]:
+    """
+    Триггеры, поддерживающие таблицу stats_counters
+
+    Триггеры уровня оператора (FOR EACH STATEMENT) с transition tables:
+    один INSERT в stats_counters на весь оператор, а не на каждую строку -
+    массовые вставки и удаления не замедляются.
+
+    Счётчики не обновляются, а дописываются дельтами: параллельные
+    транзакции не конкурируют за одну строку (и не падают с ошибкой
+    сериализации на REPEATABLE READ). Дельты периодически сворачивает
+    crud.compact_stats_counters().
+    """
+    statements = []
+
+    for table, counters in STATS_COUNTERS.items():
+        function = f"stats_counters_{table}"
+        insert_new = _counter_deltas_sql(counters, 'new_rows', '')
+        insert_old = _counter_deltas_sql(counters, 'old_rows', '-')
+
+        statements.append(f"""
+            CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    {insert_new}
+                END IF;
+                IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                    {insert_old}
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+
+        # Transition tables нельзя объявить у триггера на несколько событий
+        for event, referencing in (
+            ('INSERT', 'NEW TABLE AS new_rows'),
+            ('UPDATE', 'NEW TABLE AS new_rows OLD TABLE AS old_rows'),
+            ('DELETE', 'OLD TABLE AS old_rows'),
+        ):
+            trigger = f"{function}_{event.lower()}"
+            statements.append(f"DROP TRIGGER IF EXISTS {trigger} ON {table}")
+            statements.append(
+                f"CREATE TRIGGER {trigger} AFTER {event} ON {table} "
+                f"REFERENCING {referencing} "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION {function}()"
+            )
+
+    # Начальные значения - один раз, по текущим данным
+    # (таблицы заблокированы от записи до конца миграции)
+    statements.append(f"LOCK TABLE {', '.join(STATS_COUNTERS)} IN SHARE MODE")
+    initial = '\n'.join(
+        _counter_deltas_sql(counters, table, '')
+        for table, counters in STATS_COUNTERS.items()
+    )
+    statements.append(f"""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM stats_counters) THEN
+                {initial}
+            END IF;
+        END;
+        $$
+    """)
+
+    return statements
+
+
+# ИНДЕКСЫ МОДЕЛЕЙ
+
+def _model_indexes_migration() -> List[str]:
+    """
+    Индексы, объявленные в моделях
+
+    create_all не добавляет новые индексы в уже существующие таблицы -
+    создаём недостающие (IF NOT EXISTS).
+    """
+    import database.models  # noqa: F401 - регистрирует модели в Base.metadata
+
+    dialect = postgresql.dialect()
+
+    return [
+        str(CreateIndex(index, if_not_exists=True).compile(dialect=dialect))
+        for table in Base.metadata.sorted_tables
+        for index in sorted(table.indexes, key=lambda index: index.name)
+    ]
+
+
+def _active_bookings_dedup_migration() -> List[str]:
+    """
+    Дубликаты активных броней перед созданием uq_bookings_user_book_active
+
+    До появления уникального индекса два быстрых нажатия могли создать
+    две активные брони одной книги. Оставляем самую раннюю,
+    остальные отменяем - иначе уникальный индекс не создастся.
+    """
+    return ["""
+        UPDATE bookings AS b
+        SET status = 'cancelled', updated_at = now()
+        WHERE b.status = 'active'
+          AND EXISTS (
+              SELECT 1 FROM bookings AS earlier
+              WHERE earlier.status = 'active'
+                AND earlier.user_id = b.user_id
+                AND earlier.book_id = b.book_id
+                AND earlier.id < b.id
+          )
+    """]
+
+
+# КОЛОНКИ КНИГ
+
+def _books_isbn_migration() -> List[str]:
+    """Колонка books.isbn для существующей таблицы (индекс - в model_indexes)"""
+    return ["ALTER TABLE books ADD COLUMN IF NOT EXISTS isbn VARCHAR(20)"]
+
+
+# ПОЛНОТЕКСТОВЫЙ ПОИСК
+
+def _books_search_vector_migration() -> List[str]:
+    """Генерируемая колонка books.search_vector для существующей таблицы"""
+    from database.models import BOOK_SEARCH_VECTOR_SQL
+
+    return [
+        f"ALTER TABLE books ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({BOOK_SEARCH_VECTOR_SQL}) STORED"
+    ]
+
+
+def _trigram_search_migration() -> List[str]:
+    """
+    Расширение pg_trgm и триграммные GIN индексы для нечёткого поиска
+    (crud.search_books_fuzzy)
+
+    Индексы не объявлены в моделях: им нужен operator class из pg_trgm,
+    а расширение есть не на каждом хостинге. Если его нет - миграция
+    пропускается с предупреждением, а нечёткий поиск отключается.
+    """
+    return ["""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+                CREATE EXTENSION IF NOT EXISTS pg_trgm;
+                CREATE INDEX IF NOT EXISTS ix_books_title_trgm
+                    ON books USING gin (title gin_trgm_ops);
+                CREATE INDEX IF NOT EXISTS ix_books_author_trgm
+                    ON books USING gin (author gin_trgm_ops);
+            ELSE
+                RAISE WARNING 'pg_trgm is not available - fuzzy search disabled';
+            END IF;
+        END;
+        $$
+    """]
+
+
+# СПИСОК МИГРАЦИЙ
+
+def get_migrations() -> List[Tuple[str, List[str]]]:
+    """Все миграции по порядку: (название, список SQL команд)"""
+    return [
+        ('books_search_vector', _books_search_vector_migration()),
+        ('books_isbn', _books_isbn_migration()),
+        ('active_bookings_dedup', _active_bookings_dedup_migration()),
+        ('model_indexes', _model_indexes_migration()),
+        ('trigram_search', _trigram_search_migration()),
+        ('stats_counters', _stats_counters_migration()),
+    ]
+
+
+def run_migrations(bind: Engine) -> None:
+    """
+    Выполнить все миграции (каждую - в своей транзакции)
+
+    Args:
+        bind: Движок БД
+    """
+    for name, statements in get_migrations():
+        with bind.begin() as connection:
+            for statement in statements:
+                connection.execute(text(statement))
+
+        logger.info(f"✅ Migration applied: {name}")
@@ -7,6 +7,7 @@ SQLAlchemy модели для BookHive
 - Category: Категории книг
 - Book: Книги в каталоге
 - Booking: Брони книг
+- StatsCounter: Счётчики для статистики (поддерживаются триггерами)
 
 Связи:
 - User -> Bookings (1:N)
@@ -15,11 +16,11 @@ SQLAlchemy модели для BookHive
 """
 
 from sqlalchemy import (
-    Column, Integer, String, Text, Float, Boolean,
-    DateTime, Date, ForeignKey, UniqueConstraint, CheckConstraint, func
+    Column, Integer, BigInteger, String, Text, Float, Boolean,
+    DateTime, Date, ForeignKey, UniqueConstraint, CheckConstraint, Index, Computed, func, text
 )
-from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 
 from database.connection import Base
@@ -179,6 +180,19 @@ class Category(Base):
 
 # МОДЕЛЬ: Book (Книга)
 
+# Полнотекстовый индекс книги (books.search_vector):
+# название и автор - вес A, жанры - B, описание - C.
+# Русская и английская конфигурации - чтобы работали стемминг и стоп-слова
+# для обоих языков каталога
+BOOK_SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('russian'::regconfig, coalesce(title, '') || ' ' || coalesce(author, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(title, '') || ' ' || coalesce(author, '')), 'A') || "
+    "setweight(jsonb_to_tsvector('russian'::regconfig, genres, '[\"string\"]'), 'B') || "
+    "setweight(to_tsvector('russian'::regconfig, coalesce(description, '')), 'C') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'C')"
+)
+
+
 class Book(Base):
     """
     Модель книги
@@ -187,6 +201,7 @@ class Book(Base):
         id: Первичный ключ
         title: Название книги
         author: Автор
+        isbn: ISBN (уникальный, необязательный)
         description: Описание
         price: Цена
         cover_photo_id: file_id обложки из Telegram
@@ -194,6 +209,7 @@ class Book(Base):
         is_available: Доступна для бронирования?
         is_new: Новинка?
         created_at: Дата добавления
+        search_vector: Полнотекстовый индекс (генерируется БД)
         category_id: ID категории (Foreign Key)
         category: Связь с категорией
         bookings: Связь с бронями
@@ -218,6 +234,15 @@ class Book(Base):
         comment="Автор книги"
     )
 
+    # ISBN (ключ для массового импорта, см. crud.upsert_books)
+    isbn = Column(
+        String(20),
+        nullable=True,
+        unique=True,
+        index=True,
+        comment="ISBN (без дефисов)"
+    )
+
     # Описание
     description = Column(
         Text,
@@ -277,6 +302,14 @@ class Book(Base):
         comment="Дата добавления в каталог"
     )
 
+    # Полнотекстовый индекс (генерируемая колонка, см. BOOK_SEARCH_VECTOR_SQL).
+    # deferred - не загружается вместе с книгой, нужен только в WHERE/ORDER BY
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(BOOK_SEARCH_VECTOR_SQL, persisted=True),
+        comment="Полнотекстовый индекс книги"
+    ))
+
     # FOREIGN KEYS
 
     # Foreign Key на категорию
@@ -318,6 +351,7 @@ class Book(Base):
             'id': self.id,
             'title': self.title,
             'author': self.author,
+            'isbn': self.isbn,
             'description': self.description,
             'price': float(self.price),
             'cover_photo_id': self.cover_photo_id,
@@ -328,6 +362,21 @@ class Book(Base):
             'category': self.category.to_dict() if self.category else None
         }
 
+# Индексы для постраничного вывода книг (keyset пагинация по (created_at, id),
+# см. crud.get_books_by_category / crud.get_all_books)
+Index(
+    'ix_books_category_available_created',
+    Book.category_id, Book.is_available, Book.created_at.desc(), Book.id.desc()
+)
+Index('ix_books_created_id', Book.created_at.desc(), Book.id.desc())
+
+# Поиск по жанрам (crud.get_books_by_genres, оператор ?|).
+# Стандартный jsonb_ops: jsonb_path_ops не поддерживает ?| / ?&
+Index('ix_books_genres', Book.genres, postgresql_using='gin')
+
+# Полнотекстовый поиск (crud.search_books)
+Index('ix_books_search_vector', Book.search_vector, postgresql_using='gin')
+
 # МОДЕЛЬ: Booking (Бронь)
 
 class Booking(Base):
@@ -421,6 +470,14 @@ class Booking(Base):
             "status IN ('active', 'completed', 'cancelled')",
             name='check_status_valid'
         ),
+        # Не больше одной активной брони книги у пользователя
+        # (crud.create_booking: INSERT ... ON CONFLICT DO NOTHING)
+        Index(
+            'uq_bookings_user_book_active',
+            'user_id', 'book_id',
+            unique=True,
+            postgresql_where=text("status = 'active'")
+        ),
     )
 
     # RELATIONSHIPS
@@ -453,4 +510,40 @@ class Booking(Base):
             'comment': self.comment,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        }
+
+# МОДЕЛЬ: StatsCounter (Счётчики статистики)
+
+class StatsCounter(Base):
+    """
+    Изменение счётчика статистики
+
+    Строки дописывают триггеры на users/categories/books/bookings
+    (database/migrations.py). Значение счётчика - сумма delta по name.
+
+    Attributes:
+        id: Первичный ключ
+        name: Имя счётчика ('books_total', 'bookings_active', ...)
+        delta: Изменение значения
+    """
+    __tablename__ = 'stats_counters'
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+
+    # Имя счётчика
+    name = Column(
+        String(50),
+        nullable=False,
+        index=True,
+        comment="Имя счётчика"
+    )
+
+    # Изменение
+    delta = Column(
+        BigInteger,
+        nullable=False,
+        comment="Изменение значения счётчика"
+    )
+
+    def __repr__(self):
+        return f"<StatsCounter(name='{self.name}', delta={self.delta})>"
@@ -0,0 +1,219 @@
+# database/offload.py
+"""
+Выполнение блокирующих CRUD функций в пуле потоков
+
+Альтернатива asyncpg для database/async_crud.py (CRUD_ASYNC_BACKEND=threadpool):
+синхронная функция из database/crud.py запускается в ThreadPoolExecutor,
+а хендлер ждёт её через await - event loop продолжает обрабатывать
+другие апдейты.
+
+- Пул ограничен размером пула соединений (больше потоков всё равно
+  будут ждать свободное соединение)
+- Таймаут на каждый вызов (CRUD_CALL_TIMEOUT)
+- Статистика: время ожидания в очереди и выполнения
+
+Использование:
+    from database.offload import offload, run_in_thread
+
+    @offload
+    def heavy_report(...): ...
+
+    report = await heavy_report(...)
+    user = await run_in_thread(crud.get_user_by_telegram_id, telegram_id)
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from config.settings import (
+    CRUD_THREADS,
+    CRUD_CALL_TIMEOUT,
+    DB_POOL_MODE,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# STATISTICS
+
+class OffloadStats:
+    """
+    Счётчики пула потоков
+
+    Attributes:
+        calls: Сколько вызовов завершено
+        timeouts: Сколько вызовов не уложились в таймаут
+        in_flight: Сколько вызовов сейчас ожидают результата
+        queue_wait_total: Суммарное ожидание свободного потока (сек)
+        queue_wait_max: Максимальное ожидание свободного потока (сек)
+        run_total: Суммарное время выполнения (сек)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Обнулить счётчики"""
+        with self._lock:
+            self.calls = 0
+            self.timeouts = 0
+            self.in_flight = 0
+            self.queue_wait_total = 0.0
+            self.queue_wait_max = 0.0
+            self.run_total = 0.0
+
+    def record_submit(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def record_done(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def record_start(self, queue_wait: float):
+        with self._lock:
+            self.queue_wait_total += queue_wait
+            self.queue_wait_max = max(self.queue_wait_max, queue_wait)
+
+    def record_finish(self, run_time: float):
+        with self._lock:
+            self.calls += 1
+            self.run_total += run_time
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'timeouts': self.timeouts,
+                'in_flight': self.in_flight,
+                'queue_wait_avg_ms': round(self.queue_wait_total / self.calls * 1000, 2) if self.calls else 0.0,
+                'queue_wait_max_ms': round(self.queue_wait_max * 1000, 2),
+                'run_avg_ms': round(self.run_total / self.calls * 1000, 2) if self.calls else 0.0,
+            }
+
+
+offload_stats = OffloadStats()
+
+# EXECUTOR
+
+def _default_threads() -> int:
+    """Размер пула потоков: по числу соединений, которые может выдать пул БД"""
+    if CRUD_THREADS > 0:
+        return CRUD_THREADS
+    if DB_POOL_MODE == 'null':
+        return DB_POOL_SIZE
+    return DB_POOL_SIZE + DB_MAX_OVERFLOW
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Получить (и при первом вызове создать) пул потоков"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            threads = _default_threads()
+            _executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='crud')
+            logger.info(f"CRUD thread pool created ({threads} threads)")
+        return _executor
+
+
+def shutdown_executor():
+    """Остановить пул потоков (при остановке бота)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+            logger.info("CRUD thread pool stopped")
+
+# FUNCTIONS
+
+async def run_in_thread(
+        func: Callable[..., T],
+        *args: Any,
+        timeout: Optional[float] = None,
+        **kwargs: Any
+) -> T:
+    """
+    Выполнить блокирующую функцию в пуле потоков
+
+    Контекст (contextvars) вызывающей корутины переносится в поток.
+
+    Args:
+        func: Синхронная функция
+        *args, **kwargs: Её аргументы
+        timeout: Таймаут в секундах (по умолчанию CRUD_CALL_TIMEOUT, 0 - без таймаута)
+
+    Returns:
+        Результат функции
+
+    Raises:
+        asyncio.TimeoutError: Если вызов не уложился в таймаут.
+            Сам поток при этом не прерывается - запрос доработает в фоне.
+    """
+    if timeout is None:
+        timeout = CRUD_CALL_TIMEOUT
+
+    context = contextvars.copy_context()
+    submitted = time.perf_counter()
+
+    def call() -> T:
+        started = time.perf_counter()
+        offload_stats.record_start(started - submitted)
+        try:
+            return context.run(func, *args, **kwargs)
+        finally:
+            offload_stats.record_finish(time.perf_counter() - started)
+
+    offload_stats.record_submit()
+    future = asyncio.get_running_loop().run_in_executor(get_executor(), call)
+
+    try:
+        return await asyncio.wait_for(future, timeout=timeout or None)
+    except asyncio.TimeoutError:
+        offload_stats.record_timeout()
+        logger.error(f"CRUD call {func.__name__} timed out after {timeout}s")
+        raise
+    finally:
+        offload_stats.record_done()
+
+
+def offload(func: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    """
+    Декоратор: превратить блокирующую функцию в корутину,
+    которая выполняется в пуле потоков
+    """
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await run_in_thread(func, *args, **kwargs)
+
+    return wrapper
+
+
+def get_offload_stats() -> dict:
+    """
+    Получить статистику пула потоков
+
+    Returns:
+        dict: Число вызовов, таймаутов, время ожидания в очереди и выполнения
+    """
+    stats = {'threads': _default_threads()}
+    stats.update(offload_stats.to_dict())
+    return stats
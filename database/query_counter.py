@@ -0,0 +1,106 @@
+# database/query_counter.py
+"""
+Подсчёт SQL запросов и времени в БД (события before/after_cursor_execute)
+
+Считает запросы обоих движков - синхронного (database/connection.py)
+и asyncpg (database/async_connection.py). Счётчик хранится в contextvar,
+поэтому считаются только запросы текущего кода: своей задачи asyncio
+или потока, куда контекст передан (database/offload.run_in_thread).
+
+Счётчики вкладываются: запрос учитывается во всех открытых счётчиках
+(например, и в счётчике апдейта, и в счётчике одного хендлера).
+
+Использование:
+    from database.query_counter import count_queries
+
+    with count_queries() as counter:
+        crud.get_category_page(category_id)
+    print(counter.count, counter.db_time)
+
+    with count_queries(capture=True) as counter:
+        ...
+    print(counter.statements)
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+
+from database.connection import engine
+from database.async_connection import async_engine
+
+
+class QueryCounter:
+    """
+    Счётчик запросов
+
+    Attributes:
+        count: Сколько запросов выполнено
+        db_time: Сколько секунд заняли запросы (от отправки до ответа БД)
+        statements: Тексты запросов (только при capture=True)
+    """
+
+    def __init__(self, parent: Optional['QueryCounter'] = None, capture: bool = False):
+        self.parent = parent
+        self.capture = capture
+        self.count = 0
+        self.db_time = 0.0
+        self.statements: List[str] = []
+
+    def __repr__(self):
+        return f"<QueryCounter(count={self.count}, db_time={self.db_time:.4f})>"
+
+
+# Самый внутренний открытый счётчик текущего контекста
+_current: ContextVar[Optional[QueryCounter]] = ContextVar('query_counter', default=None)
+
+
+@contextmanager
+def count_queries(capture: bool = False) -> Iterator[QueryCounter]:
+    """
+    Считать запросы внутри блока
+
+    Args:
+        capture: Сохранять тексты запросов (для отчёта об N+1)
+    """
+    counter = QueryCounter(parent=_current.get(), capture=capture)
+    token = _current.set(counter)
+    try:
+        yield counter
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = _current.get()
+    if counter is None:
+        return
+
+    while counter is not None:
+        counter.count += 1
+        if counter.capture:
+            counter.statements.append(statement)
+        counter = counter.parent
+
+    if context is not None:
+        context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, '_query_started_at', None)
+    if started_at is None:
+        return
+
+    elapsed = time.perf_counter() - started_at
+    counter = _current.get()
+    while counter is not None:
+        counter.db_time += elapsed
+        counter = counter.parent
+
+
+for _engine in (engine, async_engine.sync_engine):
+    event.listen(_engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(_engine, 'after_cursor_execute', _after_cursor_execute)
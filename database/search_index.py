@@ -0,0 +1,625 @@
+# database/search_index.py
+"""
+Поисковый индекс каталога в памяти процесса
+
+Каталог меняется редко (только через админку), а ищут по нему постоянно.
+При SEARCH_BACKEND=memory crud.search_books отвечает отсюда,
+без запроса к PostgreSQL.
+
+Устройство:
+- инвертированный индекс: нормализованное слово -> множество ID книг
+  (слова из названия и автора; нижний регистр, ё -> е)
+- отсортированный словарь слов - поиск по префиксу через bisect
+  ("дюн" найдёт "дюна")
+- по каждой книге хранится короткая запись IndexedBook
+  (то, что нужно для вывода результатов)
+- слова запроса короче MIN_PREFIX_LENGTH ищутся только целиком:
+  префикс из одной-двух букв разворачивается в тысячи слов словаря
+
+Индекс строится при старте бота (build) и обновляется после
+create_book / upsert_books / update_book / delete_book(s) / delete_category.
+
+Поиск идёт без блокировок, по снимку (_IndexState): снимок после
+публикации не меняется, запись (под _lock) подменяет ссылку на новый -
+читатели видят либо старое, либо новое состояние.
+
+Снимок - большая основа (каталог на момент построения) и маленькая
+дельта (книги, изменённые после него). Запись копирует только дельту,
+а не весь каталог; когда в дельте больше MAX_DELTA_BOOKS книг, она
+сливается с основой. Изменения, закоммиченные во время build,
+не теряются - они применяются к построенному индексу.
+
+Использование:
+    from database import search_index
+
+    search_index.build()
+    books = search_index.search("дюна", limit=20)
+"""
+
+import bisect
+import heapq
+import logging
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from database.connection import SessionLocal
+from database.models import Book
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r'\w+')
+
+# Слова запроса короче - без поиска по префиксу, только точное совпадение
+MIN_PREFIX_LENGTH = 3
+
+# Дельта больше (изменённых и удалённых книг) - сливается с основой
+MAX_DELTA_BOOKS = 1000
+
+
+@dataclass(frozen=True)
+class IndexedBook:
+    """
+    Книга в поисковом индексе
+
+    Те же имена полей, что у Book - результаты можно выводить
+    теми же хендлерами и клавиатурами.
+    """
+    __slots__ = ('id', 'title', 'author', 'price', 'is_available', 'category_id')
+
+    id: int
+    title: str
+    author: str
+    price: float
+    is_available: bool
+    category_id: int
+
+
+def _title_key(book: IndexedBook) -> str:
+    return book.title
+
+
+def normalize(text: str) -> List[str]:
+    """Слова текста в нормализованном виде"""
+    return _WORD.findall(text.lower().replace('ё', 'е'))
+
+
+@dataclass
+class _Segment:
+    """
+    Часть индекса: книги и их слова
+
+    Опубликованный сегмент не меняется. Запись меняет копию маленькой
+    дельты (copy), множества ID в ней заменяются новыми, а не правятся на месте.
+    """
+    books: Dict[int, IndexedBook] = field(default_factory=dict)
+    title_postings: Dict[str, Set[int]] = field(default_factory=dict)
+    author_postings: Dict[str, Set[int]] = field(default_factory=dict)
+    vocabulary: List[str] = field(default_factory=list)  # отсортированные слова
+    by_title: List[Tuple[str, int]] = field(default_factory=list)  # (название, ID) по алфавиту
+    available: Set[int] = field(default_factory=set)  # ID доступных книг
+
+    @classmethod
+    def from_books(cls, books: Iterable[IndexedBook]) -> '_Segment':
+        """Сегмент по книгам (книги могут читаться потоком)"""
+        segment = cls()
+        for book in books:
+            segment.books[book.id] = book
+            # Сегмент ещё не опубликован - множества можно пополнять на месте
+            for word in normalize(book.title):
+                segment.title_postings.setdefault(word, set()).add(book.id)
+            for word in normalize(book.author):
+                segment.author_postings.setdefault(word, set()).add(book.id)
+
+        segment.vocabulary = sorted(segment.title_postings.keys() | segment.author_postings.keys())
+        segment.by_title = sorted((book.title, book.id) for book in segment.books.values())
+        segment.available = {book.id for book in segment.books.values() if book.is_available}
+        return segment
+
+    def copy(self) -> '_Segment':
+        """Поверхностная копия: множества ID общие, менять их можно только заменой"""
+        return _Segment(
+            dict(self.books),
+            dict(self.title_postings),
+            dict(self.author_postings),
+            list(self.vocabulary),
+            list(self.by_title),
+            set(self.available),
+        )
+
+
+@dataclass(frozen=True)
+class _IndexState:
+    """
+    Снимок индекса: большая основа + маленькая дельта
+
+    base - книги на момент построения / последнего слияния, не меняется.
+    delta - книги, добавленные или изменённые после него.
+    changed - ID книг основы, которые изменены или удалены: их записи
+    в основе устарели и при поиске пропускаются.
+    """
+    base: _Segment = field(default_factory=_Segment)
+    delta: _Segment = field(default_factory=_Segment)
+    changed: FrozenSet[int] = frozenset()
+
+    def book(self, book_id: int) -> IndexedBook:
+        if book_id in self.delta.books:
+            return self.delta.books[book_id]
+        return self.base.books[book_id]
+
+
+def _word_ids(books: Iterable[IndexedBook], attribute: str) -> Dict[str, Set[int]]:
+    """Слово -> ID книг, у которых оно есть в поле attribute"""
+    words: Dict[str, Set[int]] = {}
+    for book in books:
+        for word in normalize(getattr(book, attribute)):
+            words.setdefault(word, set()).add(book.id)
+    return words
+
+
+def _delta_remove(delta: _Segment, books: List[IndexedBook]) -> None:
+    """Убрать книги из неопубликованной копии дельты"""
+    for book in books:
+        del delta.books[book.id]
+        delta.available.discard(book.id)
+        position = bisect.bisect_left(delta.by_title, (book.title, book.id))
+        del delta.by_title[position]
+
+    for postings, attribute in ((delta.title_postings, 'title'), (delta.author_postings, 'author')):
+        for word, ids in _word_ids(books, attribute).items():
+            remaining = postings[word] - ids
+            if remaining:
+                postings[word] = remaining
+            else:
+                del postings[word]
+
+    for word in {word for book in books for word in normalize(book.title) + normalize(book.author)}:
+        if word not in delta.title_postings and word not in delta.author_postings:
+            del delta.vocabulary[bisect.bisect_left(delta.vocabulary, word)]
+
+
+def _delta_add(delta: _Segment, books: List[IndexedBook]) -> None:
+    """Добавить книги в неопубликованную копию дельты (их там ещё нет)"""
+    for book in books:
+        delta.books[book.id] = book
+        bisect.insort(delta.by_title, (book.title, book.id))
+        if book.is_available:
+            delta.available.add(book.id)
+
+    for postings, attribute in ((delta.title_postings, 'title'), (delta.author_postings, 'author')):
+        for word, ids in _word_ids(books, attribute).items():
+            if word not in delta.title_postings and word not in delta.author_postings:
+                bisect.insort(delta.vocabulary, word)
+            postings[word] = postings.get(word, set()) | ids
+
+
+def _with_books(state: _IndexState, books: List[IndexedBook]) -> _IndexState:
+    """Снимок с добавленными или обновлёнными книгами"""
+    books = list({book.id: book for book in books}.values())
+
+    delta = state.delta.copy()
+    _delta_remove(delta, [delta.books[book.id] for book in books if book.id in delta.books])
+    _delta_add(delta, books)
+
+    changed = state.changed | {book.id for book in books if book.id in state.base.books}
+    return _compacted(_IndexState(state.base, delta, changed))
+
+
+def _without_books(state: _IndexState, book_ids: List[int]) -> _IndexState:
+    """Снимок без указанных книг"""
+    book_ids = set(book_ids)
+    in_delta = [state.delta.books[book_id] for book_id in book_ids if book_id in state.delta.books]
+    in_base = {
+        book_id for book_id in book_ids
+        if book_id in state.base.books and book_id not in state.changed
+    }
+    if not in_delta and not in_base:
+        return state
+
+    delta = state.delta
+    if in_delta:
+        delta = delta.copy()
+        _delta_remove(delta, in_delta)
+
+    return _compacted(_IndexState(state.base, delta, state.changed | in_base))
+
+
+def _without_category(state: _IndexState, category_id: int) -> _IndexState:
+    """Снимок без книг категории"""
+    return _without_books(state, [
+        book.id
+        for segment in (state.base, state.delta)
+        for book in segment.books.values()
+        if book.category_id == category_id
+    ])
+
+
+def _compacted(state: _IndexState) -> _IndexState:
+    """Слить дельту с основой, если она стала больше MAX_DELTA_BOOKS"""
+    if len(state.changed) + len(state.delta.books) <= MAX_DELTA_BOOKS:
+        return state
+    return _IndexState(_merged(state))
+
+
+def _merged(state: _IndexState) -> _Segment:
+    """
+    Новая основа: основа без changed + дельта
+
+    Словари и списки основы копируются один раз на слияние,
+    множества ID - только у слов изменённых книг.
+    """
+    base, delta, changed = state.base, state.delta, state.changed
+    removed = [base.books[book_id] for book_id in changed]
+
+    merged = _Segment(
+        dict(base.books),
+        dict(base.title_postings),
+        dict(base.author_postings),
+    )
+    for book_id in changed:
+        del merged.books[book_id]
+    merged.books.update(delta.books)
+
+    for postings, delta_postings, attribute in (
+        (merged.title_postings, delta.title_postings, 'title'),
+        (merged.author_postings, delta.author_postings, 'author'),
+    ):
+        for word, ids in _word_ids(removed, attribute).items():
+            remaining = postings[word] - ids
+            if remaining:
+                postings[word] = remaining
+            else:
+                del postings[word]
+        for word, ids in delta_postings.items():
+            postings[word] = postings[word] | ids if word in postings else ids
+
+    removed_words = {word for book in removed for word in normalize(book.title) + normalize(book.author)}
+    gone = {
+        word for word in removed_words
+        if word not in merged.title_postings and word not in merged.author_postings
+    }
+    new_words = [
+        word for word in delta.vocabulary
+        if word not in base.title_postings and word not in base.author_postings
+    ]
+
+    # Хвост из новых элементов - сортировка почти упорядоченного списка быстрая
+    merged.vocabulary = [word for word in base.vocabulary if word not in gone]
+    merged.vocabulary.extend(new_words)
+    merged.vocabulary.sort()
+
+    merged.by_title = [entry for entry in base.by_title if entry[1] not in changed]
+    merged.by_title.extend(delta.by_title)
+    merged.by_title.sort()
+
+    merged.available = (base.available - changed) | delta.available
+    return merged
+
+
+def _prefix_words(vocabulary: List[str], prefix: str) -> Iterable[str]:
+    """
+    Слова словаря, начинающиеся с prefix
+
+    Короткие слова (меньше MIN_PREFIX_LENGTH) - только сами по себе.
+    """
+    if len(prefix) < MIN_PREFIX_LENGTH:
+        yield prefix
+        return
+
+    position = bisect.bisect_left(vocabulary, prefix)
+    while position < len(vocabulary) and vocabulary[position].startswith(prefix):
+        yield vocabulary[position]
+        position += 1
+
+
+def _segment_matches(segment: _Segment, words: List[str]) -> Optional[list]:
+    """
+    Для каждого слова запроса - (множества ID по названию, по автору)
+    по всем словам сегмента с этим префиксом
+
+    Returns:
+        None - какое-то слово в сегменте не найдено
+    """
+    matches = []
+    for word in words:
+        title_sets, author_sets = [], []
+        for token in _prefix_words(segment.vocabulary, word):
+            if token in segment.title_postings:
+                title_sets.append(segment.title_postings[token])
+            if token in segment.author_postings:
+                author_sets.append(segment.author_postings[token])
+
+        if not title_sets and not author_sets:
+            return None
+        matches.append((title_sets, author_sets))
+    return matches
+
+
+def _candidates(matches: list) -> Set[int]:
+    """ID книг, где нашлись все слова запроса"""
+    # Начинаем с самого редкого слова, остальные только проверяем
+    matches = sorted(matches, key=lambda sets: sum(map(len, sets[0])) + sum(map(len, sets[1])))
+    title_sets, author_sets = matches[0]
+    candidates = set().union(*title_sets, *author_sets)
+
+    for title_sets, author_sets in matches[1:]:
+        word_sets = title_sets + author_sets
+        if len(word_sets) > 8:
+            candidates &= set().union(*word_sets)
+        else:
+            candidates = {
+                book_id for book_id in candidates
+                if any(book_id in ids for ids in word_sets)
+            }
+        if not candidates:
+            break
+
+    return candidates
+
+
+class SearchIndex:
+    """Инвертированный индекс по названию и автору книг"""
+
+    def __init__(self):
+        self._lock = threading.Lock()  # только для записи, поиск идёт по снимку
+        self._state = _IndexState()
+        self._building = False
+        # Изменения, пришедшие во время build - применяются к новому снимку
+        self._pending: List[Tuple[Callable[..., _IndexState], tuple]] = []
+        self.ready = False
+        self.build_seconds = 0.0
+
+    # ПОСТРОЕНИЕ
+
+    def build(self, batch_size: int = 5000) -> None:
+        """
+        Построить индекс по таблице books
+
+        Книги читаются потоком (yield_per), без загрузки ORM объектов.
+        Изменения каталога, закоммиченные во время построения,
+        запоминаются и применяются к построенному индексу.
+        """
+        started = time.perf_counter()
+
+        # До чтения таблицы: всё, что закоммичено позже, попадёт в _pending
+        with self._lock:
+            self._building = True
+            self._pending = []
+
+        try:
+            with SessionLocal() as session:
+                rows = session.query(
+                    Book.id, Book.title, Book.author, Book.price,
+                    Book.is_available, Book.category_id
+                ).yield_per(batch_size)
+
+                base = _Segment.from_books(IndexedBook(*row) for row in rows)
+        except Exception:
+            with self._lock:
+                self._building = False
+                self._pending = []
+            raise
+
+        with self._lock:
+            state = _IndexState(base)
+            for operation, args in self._pending:
+                state = operation(state, *args)
+
+            self._state = state
+            self._building = False
+            self._pending = []
+            self.ready = True
+
+        self.build_seconds = time.perf_counter() - started
+
+        stats = self.get_stats()
+        logger.info(
+            f"Search index built: {stats['books']} books, {stats['words']} words, "
+            f"{stats['build_ms']} ms, ~{stats['memory_mb']} MB"
+        )
+
+    # ИНКРЕМЕНТАЛЬНОЕ ОБНОВЛЕНИЕ
+
+    def _write(self, operation: Callable[..., _IndexState], *args) -> None:
+        """
+        Применить изменение к снимку и опубликовать новый
+
+        Во время build изменение ещё и запоминается: построение
+        могло прочитать таблицу до него.
+        """
+        with self._lock:
+            if self._building:
+                self._pending.append((operation, args))
+            if self.ready:
+                self._state = operation(self._state, *args)
+
+    def _is_used(self) -> bool:
+        """Построен или строится (иначе изменения не нужны)"""
+        return self.ready or self._building
+
+    def add(self, book: Book) -> None:
+        """Добавить или обновить книгу"""
+        self.add_many([book])
+
+    def add_many(self, books: Iterable) -> None:
+        """
+        Добавить или обновить пачку книг (crud.upsert_books)
+
+        books - объекты Book или строки с теми же полями, что у IndexedBook.
+        """
+        if not self._is_used():
+            return
+
+        indexed = [
+            IndexedBook(
+                book.id, book.title, book.author, book.price,
+                book.is_available, book.category_id
+            )
+            for book in books
+        ]
+        self._write(_with_books, indexed)
+
+    def remove(self, book_id: int) -> None:
+        """Убрать книгу из индекса"""
+        self.remove_many([book_id])
+
+    def remove_many(self, book_ids: Iterable[int]) -> None:
+        """Убрать несколько книг (crud.delete_books)"""
+        if not self._is_used():
+            return
+
+        self._write(_without_books, list(book_ids))
+
+    def remove_category(self, category_id: int) -> None:
+        """Убрать все книги категории (удаление категории каскадом удаляет книги)"""
+        if not self._is_used():
+            return
+
+        self._write(_without_category, category_id)
+
+    # ПОИСК
+
+    def search(
+            self,
+            query_text: str,
+            limit: int = 20,
+            offset: int = 0,
+            available_only: bool = True
+    ) -> List[IndexedBook]:
+        """
+        Найти книги по словам запроса
+
+        Каждое слово запроса ищется как префикс (короче MIN_PREFIX_LENGTH -
+        целиком), все слова обязательны. Сначала книги, где слова найдены
+        в названии, затем - по алфавиту.
+
+        Args:
+            query_text: Поисковый запрос
+            limit: Максимум результатов
+            offset: Пропустить первые N (для постраничной выдачи)
+            available_only: Только доступные?
+
+        Returns:
+            Список IndexedBook
+        """
+        words = normalize(query_text)[:8]
+        if not words:
+            return []
+
+        # Снимок: запись его не меняет, блокировка не нужна
+        state = self._state
+
+        # Слова, найденные в названии, важнее найденных у автора:
+        # раскладываем книги по числу таких слов (операциями над множествами).
+        # Основа и дельта ищутся отдельно: книга целиком в одной из них
+        groups: Dict[int, Set[int]] = {}
+        for segment, outdated in ((state.base, state.changed), (state.delta, None)):
+            matches = _segment_matches(segment, words)
+            if matches is None:
+                continue
+
+            candidates = _candidates(matches)
+            if outdated:
+                candidates -= outdated
+            if available_only:
+                candidates &= segment.available
+            if not candidates:
+                continue
+
+            segment_groups: Dict[int, Set[int]] = {0: candidates}
+            for title_sets, _ in matches:
+                found: Set[int] = set()
+                for ids in title_sets:
+                    found |= ids & candidates
+
+                regrouped: Dict[int, Set[int]] = {}
+                for hits, ids in segment_groups.items():
+                    hit = ids & found
+                    if hit:
+                        regrouped.setdefault(hits + 1, set()).update(hit)
+                    if len(hit) < len(ids):
+                        regrouped.setdefault(hits, set()).update(ids - hit)
+                segment_groups = regrouped
+
+            for hits, ids in segment_groups.items():
+                groups.setdefault(hits, set()).update(ids)
+
+        # Берём лучшие группы, пока не наберём offset + limit,
+        # внутри группы - по алфавиту
+        needed = offset + limit
+        result: List[IndexedBook] = []
+        for hits in sorted(groups, reverse=True):
+            result += self._first_by_title(state, groups[hits], needed - len(result))
+            if len(result) >= needed:
+                break
+
+        return result[offset:needed]
+
+    @staticmethod
+    def _first_by_title(state: _IndexState, ids: Set[int], count: int) -> List[IndexedBook]:
+        """Первые count книг из ids по алфавиту"""
+        if len(ids) * 20 > len(state.base.by_title):
+            # Большая группа: идём по общему алфавитному списку -
+            # нужные книги встречаются часто, просмотр короткий
+            by_title: Iterable[Tuple[str, int]] = state.base.by_title
+            if state.changed:
+                by_title = (entry for entry in by_title if entry[1] not in state.changed)
+            if state.delta.by_title:
+                by_title = heapq.merge(by_title, state.delta.by_title)
+
+            result = []
+            for _, book_id in by_title:
+                if book_id in ids:
+                    result.append(state.book(book_id))
+                    if len(result) == count:
+                        break
+            return result
+
+        books = [state.book(book_id) for book_id in ids]
+        return heapq.nsmallest(count, books, key=_title_key)
+
+    # СТАТИСТИКА
+
+    def get_stats(self) -> dict:
+        """Размер индекса, время построения и примерный объём памяти"""
+        state = self._state
+
+        memory = 0
+        for segment in (state.base, state.delta):
+            memory += sys.getsizeof(segment.books) + sys.getsizeof(segment.vocabulary)
+            for book in segment.books.values():
+                memory += sys.getsizeof(book) + sys.getsizeof(book.title) + sys.getsizeof(book.author)
+            for postings in (segment.title_postings, segment.author_postings):
+                memory += sys.getsizeof(postings)
+                for word, ids in postings.items():
+                    memory += sys.getsizeof(word) + sys.getsizeof(ids)
+
+        new_words = [
+            word for word in state.delta.vocabulary
+            if word not in state.base.title_postings and word not in state.base.author_postings
+        ]
+
+        return {
+            'ready': self.ready,
+            'books': len(state.base.books) - len(state.changed) + len(state.delta.books),
+            'words': len(state.base.vocabulary) + len(new_words),
+            'delta_books': len(state.delta.books),
+            'build_ms': round(self.build_seconds * 1000, 1),
+            'memory_mb': round(memory / 1024 / 1024, 2),
+        }
+
+
+# Общий индекс процесса
+index = SearchIndex()
+
+build = index.build
+search = index.search
+get_stats = index.get_stats
+
+
+def is_ready() -> bool:
+    """Построен ли индекс"""
+    return index.ready
@@ -0,0 +1,642 @@
+# database/synthetic.py
+"""
+Синтетический каталог для нагрузочных тестов и бенчмарков
+
+Генерирует категории, книги, пользователей и брони с правдоподобными
+распределениями и загружает их через COPY ... FROM STDIN - миллион
+книг и десять миллионов броней загружаются за минуты, а не за часы
+(seed_db.py добавляет объекты через ORM по одному).
+
+Распределения:
+- популярность книг, активность пользователей, плодовитость авторов
+  и размер категорий - по Ципфу (вес k-го по рангу ~ 1 / k^s);
+  ранги перемешаны, так что популярные книги - не первые по ID
+- жанры книги - 1-3 жанра своей категории и иногда жанр чужой
+- статусы броней - доли active / cancelled, остальные completed;
+  активные брони - последних двух недель, не больше одной
+  активной брони книги у пользователя (uq_bookings_user_book_active)
+- даты создания - за последние DatasetConfig.years лет, со сгущением
+  к текущему дню (каталог и аудитория растут); бронь не раньше
+  появления книги и пользователя
+
+Одинаковые DatasetConfig (включая seed) дают одинаковые данные
+(даты - относительно момента запуска).
+
+Использование:
+    python generate_db.py --size large --truncate
+
+    from database.synthetic import DatasetConfig, generate
+    generate(DatasetConfig(books=10_000, bookings=50_000), truncate=True)
+"""
+
+import io
+import itertools
+import json
+import logging
+import math
+import random
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from database.connection import engine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DatasetConfig:
+    """
+    Параметры синтетического набора данных
+
+    Attributes:
+        categories: Количество категорий
+        books: Количество книг
+        users: Количество пользователей
+        bookings: Количество броней
+        book_zipf: Показатель Ципфа популярности книг
+        user_zipf: Показатель Ципфа активности пользователей
+        author_zipf: Показатель Ципфа плодовитости авторов
+        category_zipf: Показатель Ципфа размера категорий
+        active_ratio: Доля активных броней
+        cancelled_ratio: Доля отменённых броней (остальные - completed)
+        available_ratio: Доля доступных книг
+        isbn_ratio: Доля книг с ISBN
+        years: За сколько лет распределены даты создания
+        seed: Зерно генератора случайных чисел
+    """
+    categories: int = 12
+    books: int = 10_000
+    users: int = 2_000
+    bookings: int = 100_000
+    book_zipf: float = 0.9
+    user_zipf: float = 0.7
+    author_zipf: float = 1.0
+    category_zipf: float = 0.7
+    active_ratio: float = 0.05
+    cancelled_ratio: float = 0.2
+    available_ratio: float = 0.9
+    isbn_ratio: float = 0.8
+    years: float = 3.0
+    seed: int = 42
+
+
+# Готовые размеры (python generate_db.py --size ...)
+PRESETS: Dict[str, DatasetConfig] = {
+    'small': DatasetConfig(categories=8, books=2_000, users=500, bookings=10_000),
+    'medium': DatasetConfig(categories=12, books=100_000, users=20_000, bookings=1_000_000),
+    'large': DatasetConfig(categories=20, books=1_000_000, users=200_000, bookings=10_000_000),
+}
+
+
+@dataclass
+class DatasetStats:
+    """Сколько строк загружено и сколько это заняло"""
+    rows: Dict[str, int] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.timings.values())
+
+
+# СЛОВАРИ
+
+# (категория, эмодзи, жанры категории)
+CATEGORY_GENRES: List[Tuple[str, str, List[str]]] = [
+    ("Фантастика", "🚀", ["фантастика", "космоопера", "антиутопия", "киберпанк", "эпик"]),
+    ("Детектив", "🔍", ["детектив", "триллер", "нуар", "криминал"]),
+    ("Роман", "💕", ["роман", "мелодрама", "семейная сага"]),
+    ("Классика", "📚", ["классика", "исторический", "философия"]),
+    ("Психология", "🧠", ["психология", "саморазвитие", "наука"]),
+    ("Бизнес", "💼", ["бизнес", "стартапы", "маркетинг", "финансы"]),
+    ("Фэнтези", "🐉", ["фэнтези", "магия", "эпик", "приключения"]),
+    ("История", "🏛️", ["история", "биография", "исторический"]),
+    ("Детская литература", "🧸", ["детское", "сказки", "приключения"]),
+    ("Наука", "🔬", ["наука", "научпоп", "физика", "биология"]),
+    ("Поэзия", "🪶", ["поэзия", "классика", "лирика"]),
+    ("Ужасы", "👻", ["ужасы", "мистика", "триллер"]),
+    ("Приключения", "🧭", ["приключения", "путешествия", "исторический"]),
+    ("Комиксы", "💥", ["комиксы", "манга", "графический роман"]),
+    ("Кулинария", "🍳", ["кулинария", "хобби"]),
+    ("Искусство", "🎨", ["искусство", "дизайн", "архитектура"]),
+]
+
+# Жанры, которые встречаются в любой категории
+COMMON_GENRES = ["бестселлер", "новинка", "экранизация", "классика", "для подростков"]
+
+TITLE_HEADS = [
+    "Тайна", "Тень", "Дорога", "Песнь", "Хроники", "Город", "Сердце", "Ночь",
+    "Последний день", "Дом", "Путь", "Мастер", "Время", "Остров", "Письма",
+    "Код", "Игра", "Легенда", "Пламя", "Память", "Карта", "Ключ", "Сон",
+    "Возвращение", "Наследие", "Голос", "Берег", "Тишина", "Зеркало", "Страж",
+]
+
+TITLE_TAILS = [
+    "старого дома", "северного ветра", "забытых звёзд", "тихой реки",
+    "чёрного леса", "последнего императора", "времени", "моря", "двух миров",
+    "белой ночи", "огня", "пустыни", "стеклянного города", "далёких берегов",
+    "осени", "потерянного острова", "серебряной луны", "железной горы",
+    "снов", "шпиона", "алхимика", "капитана", "маяка", "библиотекаря",
+    "вечности", "сада", "ледяной страны", "солнца", "пепла", "рассвета",
+]
+
+FEMALE_NAMES = [
+    "Анна", "Мария", "Елена", "Ольга", "Наталья", "Ирина", "Татьяна", "Светлана",
+    "Дарья", "Полина", "Алиса", "Вера", "Софья", "Ксения", "Юлия",
+]
+
+MALE_NAMES = [
+    "Александр", "Дмитрий", "Сергей", "Андрей", "Алексей", "Михаил", "Иван",
+    "Николай", "Павел", "Артём", "Максим", "Евгений", "Владимир", "Олег", "Илья",
+]
+
+LAST_NAMES = [
+    "Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов",
+    "Михайлов", "Новиков", "Фёдоров", "Морозов", "Волков", "Алексеев", "Лебедев",
+    "Семёнов", "Егоров", "Павлов", "Козлов", "Степанов", "Николаев", "Орлов",
+    "Андреев", "Макаров", "Никитин", "Захаров", "Зайцев", "Соловьёв", "Борисов",
+    "Яковлев", "Григорьев", "Романов", "Воробьёв", "Сергеев", "Кузьмин", "Фролов",
+    "Александров", "Дмитриев", "Королёв", "Гусев", "Киселёв", "Ильин", "Максимов",
+    "Поляков", "Сорокин", "Виноградов", "Ковалёв", "Белов", "Медведев", "Антонов",
+    "Тарасов", "Жуков", "Баранов", "Филиппов", "Комаров", "Давыдов", "Беляев",
+    "Герасимов", "Богданов", "Осипов", "Сидоров",
+]
+
+INITIALS = "АБВГДЕЖЗИКЛМНОПРСТУФХЦЧШЭЮЯ"
+
+
+def person_name(first: str, last: str, middle: str = '') -> str:
+    """Имя и фамилия в нужном роде (Иванов -> Иванова)"""
+    if first in FEMALE_NAMES:
+        last += 'а'
+    return f"{first} {middle} {last}" if middle else f"{first} {last}"
+
+
+# РАСПРЕДЕЛЕНИЯ
+
+class ZipfSampler:
+    """
+    Выбор элементов с весом 1 / rank^s
+
+    Args:
+        items: Элементы; ранги им назначаются случайно
+        s: Показатель (0 - равномерно, 1 - классический Ципф)
+        rng: Генератор случайных чисел
+    """
+
+    def __init__(self, items: Sequence, s: float, rng: random.Random):
+        self.items = list(items)
+        rng.shuffle(self.items)
+        self.cum_weights = list(itertools.accumulate(
+            1.0 / rank ** s for rank in range(1, len(self.items) + 1)
+        ))
+        self.rng = rng
+
+    def sample(self, k: int) -> list:
+        """k элементов с повторениями"""
+        return self.rng.choices(self.items, cum_weights=self.cum_weights, k=k)
+
+    def one(self):
+        return self.sample(1)[0]
+
+
+def _spread_timestamp(rng: random.Random, now: float, seconds: float) -> float:
+    """Момент за последние seconds секунд; ближе к now - гуще (растущий сервис)"""
+    return now - seconds * rng.random() ** 2
+
+
+def isbn13(serial: int) -> str:
+    """ISBN-13 с префиксом 979 и правильной контрольной цифрой"""
+    digits = f"979{serial % 10 ** 9:09d}"
+    checksum = sum(int(digit) * (3 if position % 2 else 1) for position, digit in enumerate(digits))
+    return digits + str((10 - checksum % 10) % 10)
+
+
+class Clock:
+    """
+    Моменты времени - секунды от 1970-01-01 по местному времени (без пояса)
+
+    Форматирование для COPY через кеш строк дат и времени суток:
+    str(datetime) на 10M броней заметно дольше.
+    """
+    EPOCH = datetime(1970, 1, 1)
+
+    def __init__(self, now: datetime):
+        self.now = int((now - self.EPOCH).total_seconds())
+        self._dates: Dict[int, str] = {}
+        self._times = [
+            f"{hour:02d}:{minute:02d}:{second:02d}"
+            for hour in range(24) for minute in range(60) for second in range(60)
+        ]
+
+    def date(self, moment: float, days: int = 0) -> str:
+        """Дата момента (+ days дней), 'YYYY-MM-DD'"""
+        day = int(moment) // 86400 + days
+        text = self._dates.get(day)
+        if text is None:
+            text = self._dates[day] = (self.EPOCH + timedelta(days=day)).date().isoformat()
+        return text
+
+    def datetime(self, moment: float) -> str:
+        """'YYYY-MM-DD HH:MM:SS'"""
+        moment = int(moment)
+        return f"{self.date(moment)} {self._times[moment % 86400]}"
+
+
+# COPY
+
+# Экранирование текстового формата COPY
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _copy_value(value) -> str:
+    """Значение в текстовом формате COPY"""
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    if isinstance(value, str):
+        return value.translate(_COPY_ESCAPES)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False).translate(_COPY_ESCAPES)
+    # Числа и даты экранировать не нужно
+    return str(value)
+
+
+def copy_rows(
+        cursor,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[tuple | str],
+        chunk_rows: int = 100_000
+) -> int:
+    """
+    Загрузить строки через COPY ... FROM STDIN
+
+    Строка - кортеж значений или уже готовая строка COPY (с '\\n').
+    Строки отправляются порциями по chunk_rows - память не растёт
+    с размером таблицы. Следующая порция готовится в отдельном потоке,
+    пока БД принимает текущую (psycopg2 отпускает GIL на время COPY).
+
+    Returns:
+        int: Сколько строк загружено
+    """
+    statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    rows = iter(rows)
+
+    def next_chunk() -> Tuple[int, io.StringIO]:
+        buffer = io.StringIO()
+        count = 0
+        for row in itertools.islice(rows, chunk_rows):
+            buffer.write(row if isinstance(row, str) else '\t'.join(map(_copy_value, row)) + '\n')
+            count += 1
+        buffer.seek(0)
+        return count, buffer
+
+    total = 0
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending = executor.submit(next_chunk)
+        while True:
+            count, buffer = pending.result()
+            if not count:
+                break
+
+            pending = executor.submit(next_chunk)
+            cursor.copy_expert(statement, buffer)
+
+            total += count
+            logger.debug(f"COPY {table}: {total} rows")
+
+    return total
+
+
+def _secondary_indexes(cursor, tables: Sequence[str]) -> List[Tuple[str, str]]:
+    """
+    Индексы таблиц, которые можно удалить и построить заново:
+    не первичные ключи и не индексы ограничений UNIQUE
+    """
+    cursor.execute("""
+        SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+        FROM pg_index AS i
+        WHERE i.indrelid = ANY(%s::regclass[])
+          AND NOT i.indisprimary
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint AS c WHERE c.conindid = i.indexrelid)
+        ORDER BY 1
+    """, (list(tables),))
+    return cursor.fetchall()
+
+
+def _foreign_keys(cursor, tables: Sequence[str]) -> List[Tuple[str, str, str]]:
+    """Внешние ключи таблиц: (таблица, имя, определение)"""
+    cursor.execute("""
+        SELECT c.conrelid::regclass::text, c.conname, pg_get_constraintdef(c.oid)
+        FROM pg_constraint AS c
+        WHERE c.conrelid = ANY(%s::regclass[]) AND c.contype = 'f'
+        ORDER BY 1, 2
+    """, (list(tables),))
+    return cursor.fetchall()
+
+
+def _next_id(cursor, table: str) -> int:
+    cursor.execute(f"SELECT coalesce(max(id), 0) + 1 FROM {table}")
+    return cursor.fetchone()[0]
+
+
+def _sync_sequence(cursor, table: str) -> None:
+    """Сдвинуть последовательность id после вставки явных id"""
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+        f"coalesce(max(id), 0) + 1, false) FROM {table}"
+    )
+
+
+# ГЕНЕРАЦИЯ
+
+class _Generator:
+    """Строки для COPY; общее состояние - ID и даты уже созданных строк"""
+
+    def __init__(self, config: DatasetConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.clock = Clock(datetime.now())
+        self.now_ts = self.clock.now
+        self.span = config.years * 365 * 86400
+
+    # Категории
+
+    def _category_specs(self) -> Iterator[Tuple[str, str, List[str]]]:
+        """(название, эмодзи, жанры) категорий набора; после 16-й - с номером"""
+        for number in range(self.config.categories):
+            name, emoji, genres = CATEGORY_GENRES[number % len(CATEGORY_GENRES)]
+            if number >= len(CATEGORY_GENRES):
+                name = f"{name} {number // len(CATEGORY_GENRES) + 1}"
+            yield name, emoji, genres
+
+    def category_rows(self, existing: Dict[str, int]) -> List[tuple]:
+        """Категории, которых ещё нет (name, emoji, description)"""
+        return [
+            (name, emoji, f"{name}: {', '.join(genres)}")
+            for name, emoji, genres in self._category_specs()
+            if name not in existing
+        ]
+
+    def set_categories(self, categories: Dict[str, int]) -> None:
+        """Категории набора (название -> ID) и их жанры"""
+        self.category_genres = {
+            categories[name]: genres for name, _, genres in self._category_specs()
+        }
+
+        self.categories = ZipfSampler(self.category_genres, self.config.category_zipf, self.rng)
+        self.all_genres = sorted(
+            {genre for genres in self.category_genres.values() for genre in genres}
+            | set(COMMON_GENRES)
+        )
+
+    # Книги
+
+    def _authors(self) -> ZipfSampler:
+        count = max(50, self.config.books // 8)
+        first_names = FEMALE_NAMES + MALE_NAMES
+        names = [person_name(first, last) for last in LAST_NAMES for first in first_names]
+        if count > len(names):
+            names += [
+                person_name(first, last, f"{initial}.")
+                for initial in INITIALS for last in LAST_NAMES for first in first_names
+            ]
+        return ZipfSampler(names[:count], self.config.author_zipf, self.rng)
+
+    def book_rows(self, first_id: int) -> Iterator[tuple]:
+        """
+        (id, title, author, isbn, description, price, genres,
+         is_available, is_new, created_at, category_id)
+
+        Даты создания запоминаются в self.book_created - для броней.
+        """
+        config, rng = self.config, self.rng
+        authors = self._authors()
+        self.book_ids = range(first_id, first_id + config.books)
+        self.book_created = array('d')
+        new_since = self.now_ts - 30 * 86400
+
+        for book_id in self.book_ids:
+            category_id = self.categories.one()
+            genres = rng.sample(
+                self.category_genres[category_id],
+                min(len(self.category_genres[category_id]), rng.choice((1, 1, 2, 2, 3)))
+            )
+            if rng.random() < 0.2:
+                extra = rng.choice(COMMON_GENRES)
+                if extra not in genres:
+                    genres.append(extra)
+
+            title = f"{rng.choice(TITLE_HEADS)} {rng.choice(TITLE_TAILS)}"
+            if rng.random() < 0.15:
+                title += f". Книга {rng.randint(2, 7)}"
+
+            created = _spread_timestamp(rng, self.now_ts, self.span)
+            self.book_created.append(created)
+
+            yield (
+                book_id,
+                title,
+                authors.one(),
+                isbn13(book_id) if rng.random() < config.isbn_ratio else None,
+                f"{title} - {', '.join(genres)}." if rng.random() < 0.5 else None,
+                max(99, round(rng.lognormvariate(math.log(600), 0.45), -1)),
+                genres,
+                rng.random() < config.available_ratio,
+                created >= new_since,
+                self.clock.datetime(created),
+                category_id,
+            )
+
+    # Пользователи
+
+    def user_rows(self, first_id: int, first_telegram_id: int) -> Iterator[tuple]:
+        """(id, telegram_id, name, favorite_genres, notifications_enabled, created_at)"""
+        config, rng = self.config, self.rng
+        self.user_ids = range(first_id, first_id + config.users)
+        self.user_created = array('d')
+
+        for number, user_id in enumerate(self.user_ids):
+            created = _spread_timestamp(rng, self.now_ts, self.span)
+            self.user_created.append(created)
+
+            yield (
+                user_id,
+                first_telegram_id + number,
+                f"{rng.choice(FEMALE_NAMES + MALE_NAMES)} {rng.choice(LAST_NAMES)[0]}.",
+                rng.sample(self.all_genres, rng.choice((0, 1, 2, 2, 3))),
+                rng.random() < 0.8,
+                self.clock.datetime(created),
+            )
+
+    # Брони
+
+    def booking_rows(self) -> Iterator[str]:
+        """
+        Готовые строки COPY: user_id, book_id, status, pickup_date, created_at, updated_at
+
+        Строк десятки миллионов - форматируются сразу, без кортежей.
+        """
+        config, random_ = self.config, self.rng.random
+        books = ZipfSampler(range(len(self.book_ids)), config.book_zipf, self.rng)
+        users = ZipfSampler(range(len(self.user_ids)), config.user_zipf, self.rng)
+
+        # Горячий цикл: всё нужное - в локальных переменных
+        book_created, user_created = self.book_created, self.user_created
+        first_book, first_user = self.book_ids.start, self.user_ids.start
+        as_date, as_datetime = self.clock.date, self.clock.datetime
+        now = self.now_ts
+        active_since = now - 14 * 86400
+        active_ratio = config.active_ratio
+        cancelled_below = config.active_ratio + config.cancelled_ratio
+        active_pairs = set()
+
+        remaining = config.bookings
+        while remaining:
+            chunk = min(remaining, 100_000)
+            remaining -= chunk
+
+            for book, user in zip(books.sample(chunk), users.sample(chunk)):
+                earliest = max(book_created[book], user_created[user])
+                ids = f"{first_user + user}\t{first_book + book}"
+
+                roll = random_()
+                if roll < active_ratio and (user << 32 | book) not in active_pairs:
+                    active_pairs.add(user << 32 | book)
+                    since = max(earliest, active_since)
+                    created = as_datetime(since + random_() * (now - since))
+                    pickup_date = as_date(now, int(random_() * 15))
+                    yield f"{ids}\tactive\t{pickup_date}\t{created}\t{created}\n"
+                    continue
+
+                status = 'cancelled' if roll < cancelled_below else 'completed'
+                created = earliest + random_() * (now - earliest)
+                pickup_date = as_date(created, 1 + int(random_() * 14))
+                updated = min(now, created + int(random_() * 15) * 86400)
+                yield (
+                    f"{ids}\t{status}\t{pickup_date}\t"
+                    f"{as_datetime(created)}\t{as_datetime(updated)}\n"
+                )
+
+
+def generate(
+        config: DatasetConfig,
+        truncate: bool = False,
+        drop_indexes: bool = True
+) -> DatasetStats:
+    """
+    Сгенерировать набор данных и загрузить его в БД
+
+    Всё выполняется в одной транзакции: при ошибке БД остаётся как была.
+
+    Args:
+        config: Параметры набора
+        truncate: Очистить таблицы перед загрузкой (с обнулением ID)
+        drop_indexes: На время загрузки удалить вторичные индексы и внешние
+            ключи таблиц и создать их заново в конце - так быстрее, но
+            таблицы заблокированы до конца загрузки
+
+    Returns:
+        DatasetStats
+    """
+    stats = DatasetStats()
+    generator = _Generator(config)
+    tables = ('users', 'categories', 'books', 'bookings')
+
+    def step(name: str, started: float) -> None:
+        stats.timings[name] = round(time.perf_counter() - started, 2)
+        logger.info(f"Synthetic data: {name} done in {stats.timings[name]} s")
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SET LOCAL synchronous_commit = off")
+        cursor.execute("SET LOCAL maintenance_work_mem = '512MB'")
+
+        started = time.perf_counter()
+        indexes = _secondary_indexes(cursor, tables) if drop_indexes else []
+        foreign_keys = _foreign_keys(cursor, tables) if drop_indexes else []
+        for table, name, _ in foreign_keys:
+            cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {name}")
+        for name, _ in indexes:
+            cursor.execute(f"DROP INDEX {name}")
+
+        if truncate:
+            cursor.execute(
+                "TRUNCATE bookings, books, categories, users, stats_counters RESTART IDENTITY"
+            )
+        step('prepare', started)
+
+        # Категории - немного, обычным INSERT
+        started = time.perf_counter()
+        cursor.execute("SELECT name, id FROM categories")
+        for row in generator.category_rows(dict(cursor.fetchall())):
+            cursor.execute(
+                "INSERT INTO categories (name, emoji, description) VALUES (%s, %s, %s)", row
+            )
+        cursor.execute("SELECT name, id FROM categories")
+        generator.set_categories(dict(cursor.fetchall()))
+        stats.rows['categories'] = config.categories
+        step('categories', started)
+
+        started = time.perf_counter()
+        stats.rows['books'] = copy_rows(
+            cursor, 'books',
+            ('id', 'title', 'author', 'isbn', 'description', 'price', 'genres',
+             'is_available', 'is_new', 'created_at', 'category_id'),
+            generator.book_rows(_next_id(cursor, 'books'))
+        )
+        _sync_sequence(cursor, 'books')
+        step('books', started)
+
+        started = time.perf_counter()
+        cursor.execute("SELECT coalesce(max(telegram_id), 100000000) + 1 FROM users")
+        first_telegram_id = cursor.fetchone()[0]
+        stats.rows['users'] = copy_rows(
+            cursor, 'users',
+            ('id', 'telegram_id', 'name', 'favorite_genres', 'notifications_enabled', 'created_at'),
+            generator.user_rows(_next_id(cursor, 'users'), first_telegram_id)
+        )
+        _sync_sequence(cursor, 'users')
+        step('users', started)
+
+        started = time.perf_counter()
+        stats.rows['bookings'] = copy_rows(
+            cursor, 'bookings',
+            ('user_id', 'book_id', 'status', 'pickup_date', 'created_at', 'updated_at'),
+            generator.booking_rows()
+        )
+        step('bookings', started)
+
+        started = time.perf_counter()
+        for _, definition in indexes:
+            cursor.execute(definition)
+        # Внешний ключ проверяется одним соединением таблиц, а не на каждой строке
+        for table, name, definition in foreign_keys:
+            cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+        step('indexes', started)
+
+        connection.commit()
+
+        # ANALYZE - вне транзакции загрузки, иначе планировщик не знает новых размеров
+        started = time.perf_counter()
+        for table in tables:
+            cursor.execute(f"ANALYZE {table}")
+        connection.commit()
+        step('analyze', started)
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+    logger.info(f"Synthetic data loaded: {stats.rows} in {stats.total_seconds:.1f} s")
+    return stats
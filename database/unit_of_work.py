@@ -0,0 +1,320 @@
+# database/unit_of_work.py
+"""
+Единица работы (unit of work) - одна транзакция БД на один апдейт Telegram
+
+Без неё каждый вызов async_crud открывает свою сессию и своё соединение:
+хендлер профиля делает 5 запросов - 5 раз берёт соединение из пула
+и 5 раз делает COMMIT, а данные между запросами могут разъехаться.
+
+С unit of work:
+- сессия открывается лениво, при первом вызове async_crud внутри апдейта
+- все последующие вызовы async_crud в этом апдейте используют её же
+  (одно соединение, одна транзакция, один снимок данных)
+- в конце апдейта - один COMMIT (или ROLLBACK, если запрос к БД упал)
+
+Функции crud по-прежнему вызывают session.commit() - но сессия открыта
+поверх уже начатой транзакции соединения (join_transaction_mode),
+поэтому настоящий COMMIT выполняется только при завершении транзакции
+единицы работы.
+
+Перед каждым запросом к Bot API транзакция фиксируется досрочно
+(commit(), bot/utils/update_processor.py - CommitBeforeSendRequest):
+ответ пользователю уходит только после COMMIT, и соединение не занято,
+пока бот ждёт Telegram. Следующий вызов async_crud в том же апдейте
+открывает новую транзакцию. Поэтому уровень изоляции по умолчанию -
+REPEATABLE READ: один снимок данных на каждый участок хендлера между
+ответами, а ошибка сериализации (40001) откатывает запись до того,
+как пользователь получил подтверждение. Вызов, с которого началась
+транзакция, при такой ошибке повторяется в новой (async_crud) - так
+две параллельные брони одной книги получают already_booked, а не ошибку.
+
+Вызов в пуле потоков, не уложившийся в CRUD_CALL_TIMEOUT, не прерывает
+свой поток - тот продолжает работать с сессией. Единица работы помечается
+неудачной и до конца транзакции не выдаёт сессию другим вызовам,
+а ROLLBACK выполняется только после того, как поток закончит.
+
+Закрытая единица работы (после finish) не открывает новую транзакцию:
+current_unit_of_work() для неё возвращает None, и код, который всё ещё
+видит её в контексте (задачи, созданные из хендлера), работает с
+отдельными сессиями. Задачи JobQueue оборачиваются without_unit_of_work:
+APScheduler запускает их в контексте того кода, который их запланировал,
+- в том числе внутри апдейта.
+
+Использование:
+    from database.unit_of_work import unit_of_work
+
+    async with unit_of_work():
+        user = await async_crud.get_user_by_telegram_id(telegram_id)
+        bookings = await async_crud.get_user_bookings(user.id)
+
+В боте unit of work открывается автоматически для каждого апдейта
+(bot/utils/update_processor.py).
+"""
+
+import asyncio
+import functools
+import logging
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from config.settings import DB_UOW_ISOLATION
+from database.connection import engine
+from database.async_connection import async_engine
+from database.offload import run_in_thread
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Текущая единица работы (своя у каждого апдейта - contextvars
+# копируются в каждую задачу asyncio)
+_current: ContextVar[Optional['UnitOfWork']] = ContextVar('unit_of_work', default=None)
+
+
+class UnitOfWork:
+    """Одна транзакция БД на несколько вызовов async_crud"""
+
+    def __init__(self, name: str = ''):
+        self.name = name
+        self.calls = 0
+        # Сколько транзакций завершено (COMMIT перед ответами + в конце апдейта)
+        self.transactions = 0
+        self.failed = False
+        # Завершена (COMMIT / ROLLBACK выполнен) - новая транзакция не откроется
+        self.closed = False
+        # Сессия не потокобезопасна - вызовы внутри апдейта идут по очереди
+        self.lock = asyncio.Lock()
+        # Действия после настоящего COMMIT (см. crud.after_commit)
+        self.after_commit: List[Callable[[], None]] = []
+        self._connection: Optional[AsyncConnection | Connection] = None
+        self._session: Optional[AsyncSession | Session] = None
+        # Вызов в пуле потоков, не уложившийся в таймаут: его поток ещё
+        # работает с сессией (см. abandon)
+        self._abandoned: Optional[asyncio.Future] = None
+
+    @property
+    def started(self) -> bool:
+        """Открыта ли уже транзакция"""
+        return self._session is not None
+
+    # ОТКРЫТИЕ
+
+    def _check_open(self) -> None:
+        if self.closed:
+            raise RuntimeError(f"Unit of work {self.name or '-'} is already finished")
+        if self._abandoned is not None:
+            raise RuntimeError(
+                f"Unit of work {self.name or '-'} is unusable: a timed out call still uses its session"
+            )
+
+    async def get_async_session(self) -> AsyncSession:
+        """Сессия на asyncpg (открывается при первом обращении)"""
+        self._check_open()
+        if self._session is None:
+            connection = await async_engine.connect()
+            if DB_UOW_ISOLATION:
+                connection = await connection.execution_options(
+                    isolation_level=DB_UOW_ISOLATION
+                )
+            await connection.begin()
+
+            self._connection = connection
+            self._session = AsyncSession(
+                bind=connection,
+                join_transaction_mode='rollback_only',
+                autoflush=False,
+                expire_on_commit=False,
+                info={'after_commit': self.after_commit}
+            )
+
+        return self._session
+
+    async def get_sync_session(self) -> Session:
+        """Синхронная сессия для пула потоков (открывается при первом обращении)"""
+        self._check_open()
+        if self._session is None:
+            # Без таймаута вызова: ожидание соединения ограничено DB_POOL_TIMEOUT,
+            # а брошенный по таймауту поток унёс бы соединение из пула
+            self._connection, self._session = await run_in_thread(
+                self._open_sync, self.after_commit, timeout=0
+            )
+
+        return self._session
+
+    @staticmethod
+    def _open_sync(after_commit: list) -> tuple[Connection, Session]:
+        connection = engine.connect()
+        if DB_UOW_ISOLATION:
+            connection = connection.execution_options(isolation_level=DB_UOW_ISOLATION)
+        connection.begin()
+
+        session = Session(
+            bind=connection,
+            join_transaction_mode='rollback_only',
+            autoflush=False,
+            expire_on_commit=False,
+            info={'after_commit': after_commit}
+        )
+        return connection, session
+
+    # ЗАВЕРШЕНИЕ
+
+    def abandon(self, call: asyncio.Future) -> None:
+        """
+        Вызов в пуле потоков не уложился в таймаут
+
+        Его поток не прерывается и продолжает работать с сессией: транзакция
+        будет откатана, а до её завершения сессия другим вызовам не выдаётся.
+
+        Args:
+            call: Future вызова (завершится вместе с потоком)
+        """
+        self.failed = True
+        self._abandoned = call
+
+    async def commit(self) -> None:
+        """
+        COMMIT (или ROLLBACK при ошибке) текущей транзакции без закрытия
+        единицы работы - следующий вызов async_crud откроет новую
+
+        Вызывается перед каждым запросом к Bot API и при завершении апдейта.
+        """
+        # Дождаться вызова async_crud, который ещё выполняется (задача из хендлера)
+        async with self.lock:
+            transaction = self._detach()
+        await self._end(*transaction)
+
+    async def restart(self) -> None:
+        """
+        Откатить текущую транзакцию, чтобы повторить вызов в новой
+
+        Вызывающий уже держит lock (см. async_crud._run_in_unit_of_work).
+        """
+        self.failed = True
+        await self._end(*self._detach())
+
+    def _detach(self) -> tuple:
+        transaction = self._session, self._connection, self._abandoned, self.failed
+        self._session = self._connection = self._abandoned = None
+        self.failed = False
+        return transaction
+
+    async def _end(
+            self,
+            session: Optional[AsyncSession | Session],
+            connection: Optional[AsyncConnection | Connection],
+            abandoned: Optional[asyncio.Future],
+            failed: bool
+    ) -> None:
+        if session is None:
+            return
+
+        if abandoned is not None:
+            # Поток брошенного вызова ещё работает с сессией и соединением
+            await asyncio.wait([abandoned])
+            if not abandoned.cancelled():
+                abandoned.exception()
+
+        try:
+            if isinstance(session, AsyncSession):
+                try:
+                    if failed:
+                        await connection.rollback()
+                    else:
+                        await connection.commit()
+                finally:
+                    await session.close()
+                    await connection.close()
+            else:
+                await run_in_thread(self._finish_sync, session, connection, failed, timeout=0)
+        except BaseException:
+            self.after_commit.clear()
+            raise
+
+        if not failed:
+            for callback in self.after_commit:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error(f"Error in after-commit callback: {e}")
+        self.after_commit.clear()
+        self.transactions += 1
+
+        logger.debug(
+            f"Unit of work {self.name or '-'}: {self.calls} calls, "
+            f"{'rolled back' if failed else 'committed'}"
+        )
+
+    async def finish(self):
+        """Завершить транзакцию и закрыть единицу работы"""
+        self.closed = True
+        await self.commit()
+
+    @staticmethod
+    def _finish_sync(session: Session, connection: Connection, failed: bool):
+        try:
+            if failed:
+                connection.rollback()
+            else:
+                connection.commit()
+        finally:
+            session.close()
+            connection.close()
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    """Единица работы текущего апдейта (None - вне unit of work или она завершена)"""
+    uow = _current.get()
+    if uow is None or uow.closed:
+        return None
+    return uow
+
+
+@asynccontextmanager
+async def unit_of_work(name: str = '') -> AsyncIterator[UnitOfWork]:
+    """
+    Выполнить блок в одной транзакции БД
+
+    Вложенный вызов присоединяется к внешней единице работы.
+
+    Args:
+        name: Имя для логов (например, id апдейта)
+    """
+    outer = current_unit_of_work()
+    if outer is not None:
+        yield outer
+        return
+
+    uow = UnitOfWork(name)
+    token = _current.set(uow)
+    try:
+        yield uow
+    except BaseException:
+        uow.failed = True
+        raise
+    finally:
+        _current.reset(token)
+        await uow.finish()
+
+
+def without_unit_of_work(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """
+    Выполнять корутину вне единицы работы апдейта
+
+    Для задач JobQueue: вызовы async_crud внутри открывают свои сессии,
+    даже если задачу запланировал (или вызвал напрямую) хендлер апдейта.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        token = _current.set(None)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _current.reset(token)
+
+    return wrapper
@@ -0,0 +1,75 @@
+# generate_db.py
+"""
+Синтетические данные для нагрузочных тестов (database/synthetic.py)
+
+Запуск:
+    python generate_db.py --size small --truncate
+    python generate_db.py --size large --truncate          # 1M книг, 10M броней
+    python generate_db.py --books 50000 --bookings 500000 --seed 7
+
+Без --truncate данные добавляются к существующим.
+"""
+
+import argparse
+import dataclasses
+import logging
+
+from database.synthetic import DatasetConfig, PRESETS, generate
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Сгенерировать синтетические данные BookHive")
+    parser.add_argument('--size', choices=sorted(PRESETS), default='small',
+                        help="готовый размер набора (по умолчанию small)")
+    parser.add_argument('--truncate', action='store_true',
+                        help="очистить таблицы перед загрузкой")
+    parser.add_argument('--keep-indexes', action='store_true',
+                        help="не удалять индексы и внешние ключи на время загрузки")
+
+    # Любое поле DatasetConfig можно переопределить: --books 50000, --active-ratio 0.1
+    for config_field in dataclasses.fields(DatasetConfig):
+        parser.add_argument(f"--{config_field.name.replace('_', '-')}",
+                            type=config_field.type,
+                            dest=config_field.name, default=None)
+
+    return parser.parse_args()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    args = parse_args()
+
+    overrides = {
+        config_field.name: getattr(args, config_field.name)
+        for config_field in dataclasses.fields(DatasetConfig)
+        if getattr(args, config_field.name) is not None
+    }
+    config = dataclasses.replace(PRESETS[args.size], **overrides)
+
+    print("🧪 Generating synthetic BookHive data")
+    print("=" * 60)
+    print(f"📁 Categories: {config.categories}")
+    print(f"📚 Books:      {config.books:,}")
+    print(f"👤 Users:      {config.users:,}")
+    print(f"📋 Bookings:   {config.bookings:,}")
+    print(f"🎲 Seed:       {config.seed}")
+    print()
+
+    try:
+        stats = generate(config, truncate=args.truncate, drop_indexes=not args.keep_indexes)
+    except Exception as e:
+        print(f"\n❌ Error during generation: {e}")
+        import traceback
+        traceback.print_exc()
+        return
+
+    print()
+    for step, seconds in stats.timings.items():
+        print(f"   ⏱️  {step:12} {seconds:8.2f} s")
+
+    print("\n" + "=" * 60)
+    print(f"✅ Loaded {sum(stats.rows.values()):,} rows in {stats.total_seconds:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,320 @@
+# test_consistency.py
+"""
+Тестирование согласованности данных
+
+- Единица работы апдейта (database/unit_of_work.py): после завершения
+  не открывает новую транзакцию, задачи JobQueue выполняются вне её
+- Параллельные брони одной книги под транзакциями апдейтов
+- COMMIT перед каждым запросом к Bot API (CommitBeforeSendRequest)
+- Вызов в пуле потоков, не уложившийся в таймаут
+- Обложки из альбома (задача JobQueue после апдейта) сохраняются в БД
+- Обезличивание записанных апдейтов (bot/utils/update_recorder.py)
+
+Запуск: python test_consistency.py
+"""
+
+import asyncio
+import json
+from datetime import date, timedelta
+
+from sqlalchemy import text
+from telegram import Bot, Update
+from telegram.request import BaseRequest
+
+from benchmarks.load_test import Harness
+from bot.handlers.book_management import MEDIA_GROUP_WAIT
+from bot.utils.update_processor import CommitBeforeSendRequest
+from bot.utils.update_recorder import anonymize
+from config.settings import ADMIN_IDS
+from database import async_crud, crud
+from database.async_connection import async_engine, dispose_async_engine
+from database.connection import engine
+from database.unit_of_work import current_unit_of_work, unit_of_work, without_unit_of_work
+
+TEST_TELEGRAM_ID = 999999998
+TEST_ADMIN_ID = 999999997
+
+
+def check(condition: bool, message: str) -> None:
+    if not condition:
+        raise AssertionError(message)
+    print(f"  ✅ {message}")
+
+
+def test_closed_unit_of_work():
+    """Завершённая единица работы не открывает транзакцию"""
+    print("🔒 Testing closed unit of work...")
+
+    async def run():
+        finished = asyncio.Event()
+        late_calls = []
+
+        async def spawned_task():
+            # Задача из хендлера, которая пережила апдейт - видит его единицу работы
+            await finished.wait()
+            late_calls.append(current_unit_of_work())
+            late_calls.append(await async_crud.get_books_count())
+
+        async with unit_of_work('closed-check') as uow:
+            await async_crud.get_books_count()
+            task = asyncio.create_task(spawned_task())
+
+        finished.set()
+        await task
+
+        check(uow.closed, "Unit of work is closed after the update")
+        check(late_calls[0] is None, "current_unit_of_work() is None for a closed unit of work")
+        check(uow.calls == 1, "Late call ran in its own session, not in the finished transaction")
+
+        try:
+            await uow.get_async_session()
+            check(False, "get_async_session() raises after finish")
+        except RuntimeError:
+            check(True, "get_async_session() raises after finish")
+
+        check(async_engine.pool.checkedout() == 0, "No connection left checked out")
+
+        @without_unit_of_work
+        async def job():
+            return current_unit_of_work()
+
+        async with unit_of_work('job-check'):
+            check(await job() is None, "JobQueue job started inside an update runs without its unit of work")
+
+        # Соединения пула привязаны к event loop этого asyncio.run
+        await dispose_async_engine()
+
+    asyncio.run(run())
+    print()
+
+
+def test_concurrent_bookings():
+    """Две брони одной книги из параллельных апдейтов"""
+    print("📋 Testing concurrent bookings...")
+
+    crud.create_user(TEST_TELEGRAM_ID, "Test Consistency User")
+    book = crud.get_all_books(limit=1)[0]
+    pickup = date.today() + timedelta(days=3)
+
+    async def book_in_update(name):
+        async with unit_of_work(name):
+            return await async_crud.create_booking(TEST_TELEGRAM_ID, book.id, pickup)
+
+    async def run():
+        try:
+            return await asyncio.gather(
+                book_in_update('booking-1'), book_in_update('booking-2'),
+                return_exceptions=True
+            )
+        finally:
+            await dispose_async_engine()
+
+    try:
+        results = asyncio.run(run())
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            raise AssertionError(f"Concurrent booking failed: {errors[0]}")
+
+        reasons = sorted(str(result.reason) for result in results)
+        check(reasons == ['None', 'already_booked'], "One booking created, the other is already_booked")
+    finally:
+        crud.delete_user(TEST_TELEGRAM_ID)
+
+    print()
+
+
+def test_commit_before_reply():
+    """Ответ пользователю уходит после COMMIT транзакции апдейта"""
+    print("📨 Testing commit before reply...")
+
+    sent = []
+
+    class RecordingRequest(BaseRequest):
+        async def initialize(self):
+            pass
+
+        async def shutdown(self):
+            pass
+
+        async def do_request(self, url, method, request_data=None, *args, **kwargs):
+            # Другое соединение видит запись, соединение апдейта возвращено в пул
+            user = crud.get_user_by_telegram_id(TEST_TELEGRAM_ID)
+            sent.append((user is not None, async_engine.pool.checkedout()))
+            return 200, b'{"ok": true, "result": true}'
+
+    async def run():
+        request = CommitBeforeSendRequest(RecordingRequest())
+        async with unit_of_work('reply-check') as uow:
+            await async_crud.create_user(TEST_TELEGRAM_ID, "Test Consistency User")
+            await request.post('https://api.telegram.org/botTOKEN/sendMessage')
+            check(not uow.started, "Reply ended the update's transaction")
+
+            user = await async_crud.get_user_by_telegram_id(TEST_TELEGRAM_ID)
+            check(user is not None, "Next call in the update opened a new transaction")
+
+        check(uow.transactions == 2, "Update made two transactions: before the reply and at the end")
+        await dispose_async_engine()
+
+    try:
+        asyncio.run(run())
+        check(sent == [(True, 0)], "Reply was sent after COMMIT, with no connection checked out")
+    finally:
+        crud.delete_user(TEST_TELEGRAM_ID)
+
+    print()
+
+
+def test_timed_out_call():
+    """Вызов в пуле потоков не уложился в таймаут - сессию никто не получит"""
+    print("⏱️ Testing timed out threadpool call...")
+
+    def slow_query():
+        with crud.get_session() as session:
+            session.execute(text("SELECT pg_sleep(1)"))
+            return True
+
+    async def run():
+        failed = []
+        async with unit_of_work('timeout-check') as uow:
+            try:
+                await async_crud.run(slow_query)
+            except asyncio.TimeoutError:
+                failed.append('timeout')
+            try:
+                await async_crud.get_books_count()
+            except RuntimeError:
+                failed.append('unusable')
+
+            call = uow._abandoned
+            await uow.commit()
+            check(call is not None and call.done(), "Rollback waited for the timed out call's thread")
+            check(await async_crud.get_books_count() > 0, "Unit of work is usable again after the rollback")
+
+        check(failed == ['timeout', 'unusable'], "Timed out call made the unit of work unusable")
+        check(engine.pool.checkedout() == 0, "No connection left checked out")
+
+    backend, timeout = async_crud.CRUD_ASYNC_BACKEND, async_crud.CRUD_CALL_TIMEOUT
+    async_crud.CRUD_ASYNC_BACKEND, async_crud.CRUD_CALL_TIMEOUT = 'threadpool', 0.2
+    try:
+        asyncio.run(run())
+    finally:
+        async_crud.CRUD_ASYNC_BACKEND, async_crud.CRUD_CALL_TIMEOUT = backend, timeout
+
+    print()
+
+
+def test_album_covers():
+    """Обложки альбома записываются задачей JobQueue уже после апдейта"""
+    print("📸 Testing album covers...")
+
+    books = crud.get_all_books(available_only=False, limit=2)
+    old_covers = {book.id: book.cover_photo_id for book in books}
+    file_ids = {book.id: f"consistency_cover_{book.id}" for book in books}
+    admin = {'id': TEST_ADMIN_ID, 'is_bot': False, 'first_name': 'Admin'}
+
+    async def run():
+        async with Harness(concurrency=4) as harness:
+            api = harness.api
+            await harness.send(api.message_update(admin, "/manage_books"))
+            await harness.send(api.callback_update(admin, "bookmgmt_add_photo"))
+
+            for book in books:
+                data = api.message_update(admin, '')
+                message = data['message']
+                del message['text']
+                message['media_group_id'] = 'consistency_album'
+                message['caption'] = str(book.id)
+                message['photo'] = [{
+                    'file_id': file_ids[book.id], 'file_unique_id': file_ids[book.id][-16:],
+                    'width': 800, 'height': 1200
+                }]
+                await harness.send(data)
+
+            await asyncio.sleep(MEDIA_GROUP_WAIT + 1)
+            reply = api.last_messages[TEST_ADMIN_ID].get('text', '')
+
+        check(f"Обновлено книг: <b>{len(books)}</b>" in reply, "Album job reported the covers as updated")
+        check(async_engine.pool.checkedout() == 0, "No connection left checked out by the job")
+        await dispose_async_engine()
+
+    ADMIN_IDS.append(TEST_ADMIN_ID)
+    try:
+        asyncio.run(run())
+        saved = {book_id: crud.get_book_by_id(book_id).cover_photo_id for book_id in file_ids}
+        check(saved == file_ids, "Album covers are saved in the database")
+    finally:
+        ADMIN_IDS.remove(TEST_ADMIN_ID)
+        for book_id, cover in old_covers.items():
+            crud.update_book_photo(book_id, cover)
+        crud.delete_user(TEST_ADMIN_ID)
+
+    print()
+
+
+def test_anonymized_callback():
+    """В записанном нажатии кнопки нет имени пользователя"""
+    print("🕵️ Testing update anonymization...")
+
+    first_name = "Анна-Consistency"
+    user = {'id': TEST_TELEGRAM_ID, 'is_bot': False, 'first_name': first_name, 'username': 'anna_c'}
+    bot = {'id': 123456, 'is_bot': True, 'first_name': 'Bookstore Bot', 'username': 'bookstore_bot'}
+    greeting = f"Привет, {first_name}!"
+
+    data = {
+        'update_id': 1,
+        'callback_query': {
+            'id': '1',
+            'from': user,
+            'chat_instance': '1',
+            'data': 'catalog',
+            'message': {
+                'message_id': 10,
+                'date': 0,
+                'chat': {'id': TEST_TELEGRAM_ID, 'type': 'private', 'first_name': first_name},
+                'from': bot,
+                'text': greeting,
+                'entities': [{'type': 'bold', 'offset': 8, 'length': len(first_name)}],
+            },
+        },
+    }
+    # Как в UpdateRecorder: через объект Update
+    update = Update.de_json(data, Bot('123456:TEST'))
+    recorded = json.dumps(anonymize(update.to_dict(), b'test-salt'), ensure_ascii=False)
+
+    check(first_name not in recorded, "Recorded callback update contains no first_name")
+    check('anna_c' not in recorded, "Recorded callback update contains no username")
+    check(str(TEST_TELEGRAM_ID) not in recorded, "Telegram ID is replaced by a pseudonym")
+    check('"catalog"' in recorded, "Callback data is kept for replay")
+
+    # Сообщение с кнопкой без from (бывает у старых сообщений) - тоже без текста
+    del data['callback_query']['message']['from']
+    recorded = json.dumps(anonymize(data, b'test-salt'), ensure_ascii=False)
+    check(first_name not in recorded, "Callback message text is dropped even without from.is_bot")
+
+    print()
+
+
+def main():
+    print("🧪 Testing data consistency")
+    print("=" * 60)
+    print()
+
+    try:
+        test_closed_unit_of_work()
+        test_concurrent_bookings()
+        test_commit_before_reply()
+        test_timed_out_call()
+        test_album_covers()
+        test_anonymized_callback()
+
+        print("=" * 60)
+        print("✅ All consistency tests passed!")
+
+    except Exception as e:
+        print(f"\n❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == '__main__':
+    main()
@@ -14,12 +14,16 @@ def test_user_crud():
     print("👤 Testing User CRUD...")
 
     # Create
-    user = crud.create_user(
+    user, created = crud.create_user(
         telegram_id=999999999,
         name="Test CRUD User",
         favorite_genres=["фантастика", "детектив"]
     )
-    print(f"  ✅ Created: {user}")
+    print(f"  ✅ Created: {user} (new: {created})")
+
+    # Повторная регистрация - обновление той же строки
+    user, created = crud.create_user(telegram_id=999999999, name="Test CRUD User 2")
+    print(f"  ✅ Upserted: {user.name}, genres kept: {user.favorite_genres} (new: {created})")
 
     # Read
     user_found = crud.get_user_by_telegram_id(999999999)
@@ -148,14 +152,23 @@ def test_booking_crud():
     book = crud.get_all_books(limit=1)[0]
 
     # Create
-    booking = crud.create_booking(
+    result = crud.create_booking(
         user_telegram_id=user.telegram_id,
         book_id=book.id,
         pickup_date=date.today() + timedelta(days=10),
         comment="Test CRUD booking"
     )
+    booking = result.booking
     print(f"  ✅ Created: {booking}")
 
+    # Повторная активная бронь той же книги
+    duplicate = crud.create_booking(
+        user_telegram_id=user.telegram_id,
+        book_id=book.id,
+        pickup_date=date.today() + timedelta(days=10)
+    )
+    print(f"  ✅ Duplicate rejected: {duplicate.reason}")
+
     # Read by ID
     found = crud.get_booking_by_id(booking.id)
     print(f"  ✅ Found: {found}")